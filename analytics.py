@@ -0,0 +1,210 @@
+import html
+
+import numpy as np
+import pandas as pd
+
+
+def _format_int(value):
+    """Formatea un entero con '.' como separador de miles (formato local)."""
+    return f'{int(value):,}'.replace(',', '.')
+
+
+def _format_percent(value):
+    """Formatea un porcentaje con un decimal y ',' decimal (formato local)."""
+    return f'{value:.1f}%'.replace('.', ',')
+
+
+# --- Ranking de la matriz de votos ---
+
+def rank_votes(votes):
+    """
+    Calcula, en un solo paso sobre la matriz de votos, el puesto de cada candidato en
+    cada unidad (localidad, departamento, mesa) y los datos del primero y el segundo.
+
+    Los empates comparten puesto (ranking de competición: 1, 1, 3, ...). Entre candidatos
+    empatados, el primero y el segundo se eligen por el orden de las columnas, así que el
+    resultado es determinístico.
+
+    Args:
+        votes (np.ndarray): Matriz de enteros de forma (unidades, candidatos).
+
+    Returns:
+        dict: Arreglos de largo `unidades` ('winner', 'runner_up': índice de columna, -1 si no hay;
+        'winner_votes', 'runner_up_votes', 'total', 'margin', 'margin_pct' (sobre el total de
+        las columnas), 'tie', 'no_votes') y 'rank': matriz (unidades, candidatos) con el
+        puesto de cada candidato.
+    """
+    votes = np.asarray(votes, dtype=np.int64)
+    n_units, n_candidates = votes.shape
+    rows = np.arange(n_units)
+    # Puesto = 1 + cantidad de candidatos con más votos. Con pocos candidatos, comparar
+    # columna contra columna es más rápido que ordenar cada fila.
+    rank = np.ones((n_units, n_candidates), dtype=np.int16 if n_candidates < 2 ** 15 else np.int64)
+    for j in range(n_candidates):
+        rank[:, j] += (votes > votes[:, j:j + 1]).sum(axis=1, dtype=rank.dtype)
+
+    if n_candidates:
+        winner = votes.argmax(axis=1)
+        winner_votes = votes[rows, winner]
+    else:
+        winner = np.full(n_units, -1)
+        winner_votes = np.zeros(n_units, dtype=np.int64)
+    if n_candidates > 1:
+        others = votes.copy()
+        others[rows, winner] = np.iinfo(np.int64).min
+        runner_up = others.argmax(axis=1)
+        runner_up_votes = votes[rows, runner_up]
+    else:
+        runner_up = np.full(n_units, -1)
+        runner_up_votes = np.zeros(n_units, dtype=np.int64)
+
+    total = votes.sum(axis=1)
+    margin = winner_votes - runner_up_votes
+    margin_pct = np.zeros(n_units)
+    np.divide(margin * 100.0, total, out=margin_pct, where=total > 0)
+    no_votes = winner_votes <= 0
+    return {
+        'winner': winner,
+        'runner_up': runner_up,
+        'winner_votes': winner_votes,
+        'runner_up_votes': runner_up_votes,
+        'total': total,
+        'margin': margin,
+        'margin_pct': margin_pct,
+        'tie': (margin == 0) & ~no_votes & (n_candidates > 1),
+        'no_votes': no_votes,
+        'rank': rank,
+    }
+
+
+def analyze_units(df, unit_col, candidate_cols):
+    """
+    Arma la tabla de resultados por unidad (localidad o departamento) para cualquier cargo.
+    Las filas repetidas de una misma unidad se suman antes de calcular el ranking.
+
+    Args:
+        df (pd.DataFrame): Tabla con una columna de unidad y una columna de votos por candidato.
+        unit_col (str): Columna con el nombre de la unidad.
+        candidate_cols (list): Columnas de votos, una por candidato.
+
+    Returns:
+        pd.DataFrame: Una fila por unidad (en orden de aparición) con los votos de cada
+        candidato y las columnas 'Total', 'Ganador', 'Votos Ganador', 'Segundo', 'Votos Segundo',
+        'Margen', 'Margen (%)', 'Empate', 'Sin votos' y 'Puesto <candidato>'. 'Ganador' y
+        'Segundo' son categóricas (vacías en las unidades sin votos).
+    """
+    codes, units = pd.factorize(df[unit_col])
+    votes = df[candidate_cols].to_numpy(dtype=np.int64)
+    if len(units) != len(df):
+        # Suma las filas de una misma unidad (bincount es exacto mientras los totales sean < 2**53).
+        votes = np.column_stack([np.bincount(codes, weights=votes[:, j], minlength=len(units))
+                                 for j in range(len(candidate_cols))]).astype(np.int64).reshape(len(units), -1)
+    return analyze_matrix(units, candidate_cols, votes, unit_col)
+
+
+def analyze_matrix(units, candidate_cols, votes, unit_col):
+    """
+    Igual que analyze_units, pero a partir de una matriz de votos ya agregada (una fila por
+    unidad), p. ej. una tabla del cubo de resultados (ver cube.py).
+
+    Args:
+        units (list): Nombres de las unidades, uno por fila de `votes`.
+        candidate_cols (list): Nombres de los candidatos, uno por columna de `votes`.
+        votes (np.ndarray): Matriz de enteros de forma (unidades, candidatos).
+        unit_col (str): Nombre del índice de la tabla (p. ej. 'Localidad').
+
+    Returns:
+        pd.DataFrame: La tabla descrita en analyze_units.
+    """
+    votes = np.asarray(votes, dtype=np.int64).reshape(len(units), len(candidate_cols))
+    ranking = rank_votes(votes)
+
+    columns = {candidate: votes[:, j] for j, candidate in enumerate(candidate_cols)}
+    columns['Total'] = ranking['total']
+    columns['Ganador'] = pd.Categorical.from_codes(np.where(ranking['no_votes'], -1, ranking['winner']),
+                                                   categories=list(candidate_cols))
+    columns['Votos Ganador'] = ranking['winner_votes']
+    columns['Segundo'] = pd.Categorical.from_codes(np.where(ranking['no_votes'], -1, ranking['runner_up']),
+                                                   categories=list(candidate_cols))
+    columns['Votos Segundo'] = ranking['runner_up_votes']
+    columns['Margen'] = ranking['margin']
+    columns['Margen (%)'] = ranking['margin_pct']
+    columns['Empate'] = ranking['tie']
+    columns['Sin votos'] = ranking['no_votes']
+    for j, candidate in enumerate(candidate_cols):
+        columns[f'Puesto {candidate}'] = ranking['rank'][:, j]
+    return pd.DataFrame(columns, index=pd.Index(np.asarray(units, dtype=object), name=unit_col))
+
+
+def candidate_summary(results, candidate):
+    """
+    Clasifica las unidades según el resultado de un candidato.
+
+    Args:
+        results (pd.DataFrame): Tabla devuelta por analyze_units.
+        candidate (str): Nombre del candidato (columna de votos).
+
+    Returns:
+        dict: Listas de nombres de unidad ordenadas alfabéticamente: 'won' (primero sin empate),
+        'tied' (empatado en el primer puesto), 'lost' (no fue el más votado) y 'no_votes'
+        (unidades sin votos válidos).
+    """
+    first = (results[f'Puesto {candidate}'] == 1).to_numpy()
+    tie = results['Empate'].to_numpy()
+    no_votes = results['Sin votos'].to_numpy()
+    names = results.index.to_numpy()
+
+    def units(mask):
+        return sorted(names[mask].tolist())
+
+    return {
+        'won': units(first & ~tie & ~no_votes),
+        'tied': units(first & tie),
+        'lost': units(~first & ~no_votes),
+        'no_votes': units(no_votes),
+    }
+
+
+def results_table_html(results, unit_label):
+    """
+    Genera una tabla HTML con el ganador, el segundo y el margen de cada unidad.
+
+    Args:
+        results (pd.DataFrame): Tabla devuelta por analyze_units.
+        unit_label (str): Encabezado de la columna de unidades (p. ej. 'Localidad').
+
+    Returns:
+        str: La tabla HTML (los nombres se escapan). En un empate, el ganador lista a todos los
+        candidatos empatados en el primer puesto y el segundo es el mejor de los demás (o '-').
+    """
+    candidates = [column[len('Puesto '):] for column in results.columns if column.startswith('Puesto ')]
+    rank = results[[f'Puesto {candidate}' for candidate in candidates]].to_numpy()
+    votes = results[candidates].to_numpy(dtype=np.int64)
+    # Mejor candidato fuera del primer puesto: el segundo de las unidades con empate.
+    below_first = rank > 1
+    next_best = np.where(below_first, votes, np.iinfo(np.int64).min).argmax(axis=1) if candidates else None
+
+    rows = []
+    columns = ['Ganador', 'Votos Ganador', 'Segundo', 'Votos Segundo', 'Margen', 'Margen (%)', 'Empate', 'Sin votos']
+    for i, (unit, row) in enumerate(zip(results.index.tolist(), results[columns].itertuples(index=False))):
+        winner, winner_votes, runner_up, runner_up_votes, margin, margin_pct, tie, no_votes = row
+        unit = html.escape(str(unit))
+        if no_votes:
+            rows.append(f'<tr><td>{unit}</td><td colspan="4">Sin votos válidos</td></tr>')
+            continue
+        if tie:
+            tied = [html.escape(candidates[j]) for j in np.flatnonzero(rank[i] == 1)]
+            winner_text = 'Empate: ' + ' / '.join(tied)
+            if below_first[i].any():
+                runner_up_text = f'{html.escape(candidates[next_best[i]])} ({_format_int(votes[i, next_best[i]])})'
+            else:
+                runner_up_text = '-'
+        else:
+            winner_text = html.escape(str(winner))
+            runner_up_text = ('-' if pd.isna(runner_up)
+                              else f'{html.escape(str(runner_up))} ({_format_int(runner_up_votes)})')
+        rows.append(f'<tr><td>{unit}</td><td>{winner_text} ({_format_int(winner_votes)})</td>'
+                    f'<td>{runner_up_text}</td><td>{_format_int(margin)}</td>'
+                    f'<td>{_format_percent(margin_pct)}</td></tr>')
+    return (f'<table class="results-table"><thead><tr><th>{html.escape(unit_label)}</th><th>Ganador</th><th>Segundo</th>'
+            f'<th>Margen</th><th>Margen (%)</th></tr></thead><tbody>{"".join(rows)}</tbody></table>')
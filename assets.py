@@ -0,0 +1,313 @@
+import base64
+import hashlib
+import html
+import json
+import os
+import re
+import struct
+import zlib
+from io import BytesIO
+
+import numpy as np
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow es opcional: sin él solo se generan PNG (con el códec de este módulo).
+    Image = None
+
+# Subdirectorio (dentro del directorio de salida) donde se guardan las imágenes procesadas.
+ASSETS_DIRNAME = 'assets'
+# Se incrementa cuando cambia el procesamiento, para regenerar las imágenes cacheadas.
+ASSET_PIPELINE_VERSION = 1
+# Tamaño (en px CSS) con el que se muestran las fotos de los candidatos (ver .candidate-image).
+CANDIDATE_IMAGE_SIZE = 100
+# Densidades de pantalla para las que se genera cada imagen (1x y 2x para pantallas de alta densidad).
+IMAGE_DENSITIES = (1, 2)
+# Calidad de la codificación WebP (solo con Pillow).
+WEBP_QUALITY = 80
+# Las imágenes codificadas de hasta este tamaño se incrustan como data URI en lugar de enlazarse.
+INLINE_MAX_BYTES = 2048
+
+# Imagen de reemplazo (SVG incrustado) para candidatos sin foto. Usa comillas simples para
+# poder ir dentro de un atributo HTML entre comillas dobles.
+PLACEHOLDER_IMAGE = ('data:image/svg+xml,' + re.sub(r'\s+', ' ', '''
+    <svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 100 100'>
+    <rect width='100' height='100' fill='%23dee2e6'/>
+    <circle cx='50' cy='38' r='18' fill='%23adb5bd'/>
+    <ellipse cx='50' cy='88' rx='32' ry='24' fill='%23adb5bd'/></svg>''').strip())
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Registro en memoria de las variantes ya codificadas, indexado por la clave de cada imagen. Permite
+# generar varios informes en un mismo proceso (ver batch.py) sin volver a reducir las mismas fotos.
+_VARIANT_REGISTRY = {}
+
+
+# --- Códec PNG mínimo (para trabajar sin Pillow) ---
+
+def _unfilter_row(filter_type, row, previous, bpp):
+    """Deshace el filtro PNG de una fila (arreglos uint8) y devuelve la fila original."""
+    if filter_type == 0:
+        return row
+    if filter_type == 1:
+        # Sub: suma acumulada (módulo 256) de los bytes del mismo canal.
+        return (np.cumsum(row.reshape(-1, bpp).astype(np.int64), axis=0) % 256).astype(np.uint8).ravel()
+    if filter_type == 2:
+        return row + previous
+    out = row.astype(np.int64)
+    up = previous.astype(np.int64)
+    for i in range(len(out)):
+        left = out[i - bpp] if i >= bpp else 0
+        if filter_type == 3:
+            out[i] = (out[i] + ((left + up[i]) >> 1)) & 0xFF
+        else:
+            upper_left = up[i - bpp] if i >= bpp else 0
+            estimate = left + up[i] - upper_left
+            pa, pb, pc = abs(estimate - left), abs(estimate - up[i]), abs(estimate - upper_left)
+            predictor = left if pa <= pb and pa <= pc else (up[i] if pb <= pc else upper_left)
+            out[i] = (out[i] + predictor) & 0xFF
+    return out.astype(np.uint8)
+
+
+def read_png(path):
+    """
+    Decodifica un PNG de 8 bits por canal (escala de grises, RGB, con o sin alfa), no entrelazado.
+
+    Args:
+        path (str): Ruta al archivo PNG.
+
+    Returns:
+        np.ndarray: Pixeles RGBA, de forma (alto, ancho, 4) y tipo uint8.
+
+    Raises:
+        ValueError: Si el archivo no es un PNG de un formato soportado.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if not data.startswith(_PNG_SIGNATURE):
+        raise ValueError(f'{path} no es un PNG')
+    position, idat = len(_PNG_SIGNATURE), []
+    header = None
+    while position < len(data):
+        length, chunk_type = struct.unpack('>I4s', data[position:position + 8])
+        body = data[position + 8:position + 8 + length]
+        if chunk_type == b'IHDR':
+            header = struct.unpack('>IIBBBBB', body)
+        elif chunk_type == b'IDAT':
+            idat.append(body)
+        elif chunk_type == b'IEND':
+            break
+        position += 12 + length
+    if header is None:
+        raise ValueError(f'{path} no tiene encabezado IHDR')
+    width, height, bit_depth, color_type, _, _, interlace = header
+    channels = {0: 1, 2: 3, 4: 2, 6: 4}.get(color_type)
+    if bit_depth != 8 or channels is None or interlace:
+        raise ValueError(f'formato PNG no soportado en {path} (profundidad {bit_depth}, tipo {color_type})')
+
+    raw = np.frombuffer(zlib.decompress(b''.join(idat)), dtype=np.uint8).reshape(height, width * channels + 1)
+    pixels = np.empty((height, width * channels), dtype=np.uint8)
+    previous = np.zeros(width * channels, dtype=np.uint8)
+    for y in range(height):
+        previous = pixels[y] = _unfilter_row(raw[y, 0], raw[y, 1:], previous, channels)
+    pixels = pixels.reshape(height, width, channels)
+    if channels < 3:
+        gray, alpha = pixels[..., :1], pixels[..., 1:]
+        pixels = np.concatenate([gray, gray, gray] + ([alpha] if channels == 2 else []), axis=2)
+    if pixels.shape[2] == 3:
+        pixels = np.concatenate([pixels, np.full((height, width, 1), 255, dtype=np.uint8)], axis=2)
+    return pixels
+
+
+def encode_png(pixels):
+    """
+    Codifica pixeles RGBA como PNG. Descarta el canal alfa si la imagen es opaca y elige,
+    para cada fila, el filtro (ninguno, Sub o Up) con menor suma de diferencias absolutas.
+
+    Args:
+        pixels (np.ndarray): Pixeles RGBA, de forma (alto, ancho, 4) y tipo uint8.
+
+    Returns:
+        bytes: El archivo PNG.
+    """
+    if (pixels[..., 3] == 255).all():
+        pixels = pixels[..., :3]
+    height, width, channels = pixels.shape
+    rows = pixels.reshape(height, width * channels).astype(np.int16)
+    sub = rows.copy()
+    sub[:, channels:] -= rows[:, :-channels]
+    up = rows.copy()
+    up[1:] -= rows[:-1]
+    candidates = np.stack([rows, sub, up]) % 256
+    # Heurística habitual: se miden los bytes filtrados como enteros con signo.
+    cost = np.abs(np.where(candidates > 127, candidates - 256, candidates)).sum(axis=2)
+    filters = cost.argmin(axis=0)
+    filtered = candidates[filters, np.arange(height)].astype(np.uint8)
+    raw = np.column_stack([filters.astype(np.uint8), filtered]).tobytes()
+
+    def chunk(chunk_type, body):
+        return struct.pack('>I', len(body)) + chunk_type + body + struct.pack('>I', zlib.crc32(chunk_type + body))
+
+    color_type = 6 if channels == 4 else 2
+    return (_PNG_SIGNATURE + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw, 9)) + chunk(b'IEND', b''))
+
+
+def _area_weights(source, target):
+    """Matriz (target, source) con la fracción de cada pixel de origen que cae en cada pixel de destino."""
+    edges = np.arange(target + 1) * (source / target)
+    starts, ends = edges[:-1, None], edges[1:, None]
+    positions = np.arange(source)[None, :]
+    overlap = np.clip(np.minimum(ends, positions + 1) - np.maximum(starts, positions), 0, None)
+    return overlap / overlap.sum(axis=1, keepdims=True)
+
+
+def resize_cover(pixels, size):
+    """
+    Recorta la imagen al cuadrado central y la reduce a `size` x `size` promediando áreas
+    (equivale a 'object-fit: cover' en un contenedor cuadrado). Los colores se promedian
+    premultiplicados por el alfa para no oscurecer los bordes transparentes.
+
+    Args:
+        pixels (np.ndarray): Pixeles RGBA, de forma (alto, ancho, 4) y tipo uint8.
+        size (int): Lado de la imagen resultante; no debe superar el lado menor de la original.
+
+    Returns:
+        np.ndarray: Pixeles RGBA de forma (size, size, 4).
+    """
+    height, width = pixels.shape[:2]
+    side = min(height, width)
+    top, left = (height - side) // 2, (width - side) // 2
+    square = pixels[top:top + side, left:left + side].astype(np.float64)
+    alpha = square[..., 3:] / 255
+    premultiplied = np.concatenate([square[..., :3] * alpha, square[..., 3:]], axis=2)
+    weights = _area_weights(side, size)
+    resized = np.tensordot(np.tensordot(weights, premultiplied, axes=(1, 0)), weights, axes=(1, 1)).transpose(0, 2, 1)
+    result_alpha = resized[..., 3:] / 255
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rgb = np.where(result_alpha > 0, resized[..., :3] / result_alpha, 0)
+    return np.clip(np.rint(np.concatenate([rgb, resized[..., 3:]], axis=2)), 0, 255).astype(np.uint8)
+
+
+# --- Variantes de cada imagen ---
+
+def _encode_variants(source_path, size):
+    """
+    Genera las variantes de una imagen: {(formato, densidad): bytes}. Con Pillow se generan
+    WebP y PNG; sin Pillow, solo PNG. Las densidades que superan la resolución de la
+    original se omiten (no se amplía la imagen).
+    """
+    def sides(width, height):
+        result = {}
+        for density in IMAGE_DENSITIES:
+            side = min(size * density, width, height)
+            if side not in result.values():
+                result[density] = side
+        return result
+
+    variants = {}
+    if Image is not None:
+        with Image.open(source_path) as image:
+            image = image.convert('RGBA')
+            for density, side in sides(image.width, image.height).items():
+                resized = ImageOps.fit(image, (side, side), method=Image.LANCZOS)
+                for fmt, options in (('webp', {'quality': WEBP_QUALITY, 'method': 6}), ('png', {'optimize': True})):
+                    buffer = BytesIO()
+                    resized.save(buffer, format=fmt.upper(), **options)
+                    variants[(fmt, density)] = buffer.getvalue()
+        return variants
+    pixels = read_png(source_path)
+    for density, side in sides(pixels.shape[1], pixels.shape[0]).items():
+        variants[('png', density)] = encode_png(resize_cover(pixels, side))
+    return variants
+
+
+def _slug(name):
+    """Nombre de archivo seguro a partir del nombre de la imagen original."""
+    return re.sub(r'[^a-z0-9]+', '-', os.path.splitext(name)[0].lower()).strip('-') or 'imagen'
+
+
+def build_image_variants(source_path, output_dir, size=CANDIDATE_IMAGE_SIZE):
+    """
+    Reduce una imagen al tamaño en que se muestra y la guarda en `output_dir` con nombres que
+    incluyen el hash de su contenido (p. ej. 'sergio-massa.3f2a9c1b.2x.webp'), de modo que el
+    navegador puede cachearlas indefinidamente. Las variantes pequeñas se devuelven como data URI.
+
+    El resultado se cachea en un manifiesto dentro de `output_dir`, indexado por el hash del
+    contenido de la imagen original: mientras no cambie (y sus archivos sigan existiendo),
+    la imagen no se vuelve a procesar.
+
+    Args:
+        source_path (str): Ruta a la imagen original.
+        output_dir (str): Directorio donde se guardan las variantes.
+        size (int): Tamaño de visualización, en px CSS.
+
+    Returns:
+        dict: {formato: [(url relativa a output_dir o data URI, densidad), ...]}, con los formatos
+        en orden de preferencia (el último es el de respaldo), y 'size': lado a 1x en px.
+    """
+    with open(source_path, 'rb') as f:
+        source_hash = hashlib.sha256(f.read()).hexdigest()
+    key = f'v{ASSET_PIPELINE_VERSION}|{size}|{IMAGE_DENSITIES}|{Image is not None}|{source_hash}'
+    manifest_path = os.path.join(output_dir, 'manifest.json')
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    slug = _slug(os.path.basename(source_path))
+    entry = manifest.get(slug)
+    if entry and entry['key'] == key and all(os.path.exists(os.path.join(output_dir, name)) for name in entry['files']):
+        return entry['result']
+
+    os.makedirs(output_dir, exist_ok=True)
+    result, files = {}, []
+    if key not in _VARIANT_REGISTRY:
+        _VARIANT_REGISTRY[key] = _encode_variants(source_path, size)
+    for (fmt, density), data in _VARIANT_REGISTRY[key].items():
+        if len(data) <= INLINE_MAX_BYTES:
+            url = f'data:image/{fmt};base64,{base64.b64encode(data).decode("ascii")}'
+        else:
+            url = f'{slug}.{hashlib.sha256(data).hexdigest()[:10]}.{density}x.{fmt}'
+            path = os.path.join(output_dir, url)
+            if not os.path.exists(path):
+                with open(path, 'wb') as f:
+                    f.write(data)
+            files.append(url)
+        result.setdefault(fmt, []).append((url, density))
+    result['size'] = size
+    # Elimina las variantes anteriores de la misma imagen.
+    for name in os.listdir(output_dir):
+        if name.startswith(f'{slug}.') and name not in files and name != 'manifest.json':
+            os.remove(os.path.join(output_dir, name))
+    manifest[slug] = {'key': key, 'files': files, 'result': result}
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    return result
+
+
+def picture_html(variants, alt, base_url, css_class):
+    """
+    Arma un elemento <picture> con una fuente por formato (en orden de preferencia) y un <img>
+    de respaldo, con srcset por densidad, tamaño explícito y carga diferida.
+
+    Args:
+        variants (dict): Resultado de build_image_variants.
+        alt (str): Texto alternativo.
+        base_url (str): Prefijo de las URLs relativas (directorio de las variantes respecto del HTML).
+        css_class (str): Clase CSS del <img>.
+
+    Returns:
+        str: El fragmento HTML.
+    """
+    def srcset(entries):
+        return ', '.join(f'{url if url.startswith("data:") else base_url + url} {density}x'
+                         for url, density in entries)
+
+    formats = [fmt for fmt in variants if fmt != 'size']
+    fallback = variants[formats[-1]]
+    sources = ''.join(f'<source type="image/{fmt}" srcset="{srcset(variants[fmt])}">' for fmt in formats[:-1])
+    src = fallback[0][0] if fallback[0][0].startswith('data:') else base_url + fallback[0][0]
+    size = variants['size']
+    return (f'<picture>{sources}<img src="{src}" srcset="{srcset(fallback)}" width="{size}" height="{size}" '
+            f'alt="{html.escape(alt)}" class="{css_class}" loading="lazy" decoding="async"></picture>')
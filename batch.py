@@ -0,0 +1,222 @@
+import argparse
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+
+import main
+from ingest import normalize_name
+from instrumentation import span, traced
+
+# Subdirectorio (dentro del directorio de salida) donde se escriben por defecto los informes de un lote.
+BATCH_DIRNAME = 'informes'
+# Claves de una especificación que reemplazan a las rutas de datos de main.py.
+SPEC_DATA_PATHS = {
+    'departamentos': 'csv_file_path',
+    'localidades': 'localidades_csv_file_path',
+    'presidente': 'presidente_csv_file_path',
+}
+# Claves admitidas en cada especificación del manifiesto.
+SPEC_KEYS = {'name', 'output_dir', 'mesas', 'region', 'map_tiles', 'bundle', 'split_assets'} | set(SPEC_DATA_PATHS)
+
+
+# --- Manifiesto ---
+
+def report_dirname(name):
+    """Nombre de directorio para un informe (p. ej. 'Ñorquin' -> 'norquin', 'Zona Norte' -> 'zona_norte')."""
+    return re.sub(r'[^a-z0-9]+', '_', normalize_name(name)).strip('_') or 'informe'
+
+
+def normalize_spec(spec, base_dir, defaults=None):
+    """
+    Completa y valida la especificación de un informe del lote.
+
+    Args:
+        spec (dict): {'name', 'output_dir', 'departamentos', 'localidades', 'presidente', 'mesas',
+            'region', 'map_tiles', 'bundle', 'split_assets'}. Solo 'name' es obligatorio.
+        base_dir (str): Directorio contra el que se resuelven las rutas relativas.
+        defaults (dict): Valores comunes a todos los informes del lote.
+
+    Returns:
+        dict: La especificación con rutas absolutas y valores por defecto.
+
+    Raises:
+        ValueError: Si falta el nombre, hay claves desconocidas o la región no es una lista.
+    """
+    spec = {**(defaults or {}), **spec}
+    unknown = set(spec) - SPEC_KEYS
+    if unknown:
+        raise ValueError(f"claves desconocidas en la especificación: {', '.join(sorted(unknown))}")
+    if not spec.get('name'):
+        raise ValueError("cada informe del lote necesita un 'name'")
+    region = spec.get('region')
+    if region is not None and (not isinstance(region, list) or not all(isinstance(name, str) for name in region)):
+        raise ValueError(f"la región de '{spec['name']}' debe ser una lista de departamentos")
+
+    def resolve(path):
+        return path if path is None else os.path.normpath(os.path.join(base_dir, path))
+
+    normalized = {
+        'name': spec['name'],
+        'output_dir': resolve(spec.get('output_dir')) or os.path.join(main.OUTPUT_DIR, BATCH_DIRNAME,
+                                                                       report_dirname(spec['name'])),
+        'mesas': resolve(spec.get('mesas')),
+        'region': region or None,
+        'map_tiles': bool(spec.get('map_tiles', False)),
+        'bundle': bool(spec.get('bundle', False)),
+        'split_assets': bool(spec.get('split_assets', False)),
+    }
+    for key in SPEC_DATA_PATHS:
+        normalized[key] = resolve(spec.get(key))
+    return normalized
+
+
+def load_manifest(path):
+    """
+    Lee un manifiesto de lote: un JSON con {'defaults': {...}, 'reports': [...]} (o directamente
+    la lista de informes). Las rutas relativas se resuelven respecto del directorio del manifiesto.
+
+    Args:
+        path (str): Ruta al manifiesto.
+
+    Returns:
+        list: Especificaciones normalizadas (ver normalize_spec).
+
+    Raises:
+        ValueError: Si el manifiesto no es válido o dos informes comparten directorio de salida.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if isinstance(manifest, list):
+        manifest = {'reports': manifest}
+    base_dir = os.path.dirname(os.path.abspath(path))
+    specs = [normalize_spec(spec, base_dir, manifest.get('defaults')) for spec in manifest.get('reports', [])]
+    check_output_dirs(specs)
+    return specs
+
+
+def department_specs():
+    """
+    Especificaciones del conjunto habitual: el informe de toda la Zona Norte más uno por
+    cada departamento de DEPARTMENT_GEOJSON_FILES.
+
+    Returns:
+        list: Especificaciones normalizadas (ver normalize_spec).
+    """
+    specs = [normalize_spec({'name': 'Zona Norte'}, main.BASE_DIR)]
+    for _, depto_name in main.DEPARTMENT_GEOJSON_FILES:
+        specs.append(normalize_spec({'name': depto_name, 'region': [depto_name]}, main.BASE_DIR))
+    check_output_dirs(specs)
+    return specs
+
+
+def check_output_dirs(specs):
+    """Verifica que cada informe del lote tenga su propio directorio de salida."""
+    seen = {}
+    for spec in specs:
+        other = seen.setdefault(os.path.abspath(spec['output_dir']), spec['name'])
+        if other != spec['name']:
+            raise ValueError(f"'{other}' y '{spec['name']}' usan el mismo directorio de salida: {spec['output_dir']}")
+
+
+# --- Ejecución del lote ---
+
+@contextmanager
+def report_settings(spec):
+    """
+    Apunta temporalmente las rutas de datos y de salida de main.py a las de un informe del
+    lote; al salir del bloque se restauran los valores anteriores.
+
+    Args:
+        spec (dict): Especificación normalizada del informe.
+    """
+    output_dir = spec['output_dir']
+    overrides = {
+        'OUTPUT_DIR': output_dir,
+        'output_html_path': os.path.join(output_dir, os.path.basename(main.output_html_path)),
+        'mapa_output_path': os.path.join(output_dir, os.path.basename(main.mapa_output_path)),
+    }
+    for key, attribute in SPEC_DATA_PATHS.items():
+        if spec[key] is not None:
+            overrides[attribute] = spec[key]
+    previous = {attribute: getattr(main, attribute) for attribute in overrides}
+    os.makedirs(output_dir, exist_ok=True)
+    for attribute, value in overrides.items():
+        setattr(main, attribute, value)
+    try:
+        yield
+    finally:
+        for attribute, value in previous.items():
+            setattr(main, attribute, value)
+
+
+def run_batch(specs, use_cache=True, jobs=1):
+    """
+    Genera todos los informes del lote en el proceso actual. Lo que no depende de cada
+    informe se carga una sola vez y se comparte: las geometrías simplificadas (registro de
+    geometry.py), las fotos reducidas (registro de assets.py), la plantilla de Plotly y las
+    librerías ya importadas. Un error en un informe no detiene el resto del lote.
+
+    Args:
+        specs (list): Especificaciones normalizadas (ver load_manifest o department_specs).
+        use_cache (bool): Si es False, se regeneran todas las secciones de cada informe.
+        jobs (int): Procesos a usar dentro de cada informe.
+
+    Returns:
+        list: Un dict por informe con 'name', 'output', 'seconds' y 'error' (None si se generó bien).
+    """
+    results = []
+    for spec in specs:
+        print(f"--- Informe '{spec['name']}' ---")
+        start = time.perf_counter()
+        error = None
+        try:
+            with span(f"lote:{spec['name']}"), report_settings(spec):
+                main.generate_election_report(use_cache=use_cache, jobs=jobs, mesas_path=spec['mesas'],
+                                              map_tiles=spec['map_tiles'], bundle=spec['bundle'],
+                                              region=spec['region'], split_assets=spec['split_assets'])
+        except Exception as e:
+            error = str(e)
+            print(f"Error al generar el informe '{spec['name']}': {e}")
+        results.append({'name': spec['name'], 'output': spec['output_dir'],
+                        'seconds': time.perf_counter() - start, 'error': error})
+    return results
+
+
+def print_batch_summary(results):
+    """Muestra el tiempo de cada informe del lote y los que fallaron."""
+    print(f"\n{'informe':<30} {'tiempo (s)':>10}  salida")
+    for result in results:
+        status = f"ERROR: {result['error']}" if result['error'] else result['output']
+        print(f"{result['name'][:30]:<30} {result['seconds']:>10.2f}  {status}")
+    failed = sum(1 for result in results if result['error'])
+    total = sum(result['seconds'] for result in results)
+    print(f"{len(results) - failed} de {len(results)} informe(s) generados en {total:.1f} s.")
+
+
+# --- Ejecución del script ---
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Genera varios informes (por departamento, elección o región) en un solo proceso.')
+    parser.add_argument('manifest', nargs='?', help='Manifiesto JSON con los informes a generar.')
+    parser.add_argument('--por-departamento', action='store_true',
+                        help='Genera el informe de la Zona Norte y uno por departamento (sin manifiesto).')
+    parser.add_argument('--only', nargs='+', metavar='NOMBRE', help='Genera solo los informes indicados.')
+    parser.add_argument('--no-cache', action='store_true', help='Regenera todas las secciones de cada informe.')
+    parser.add_argument('--jobs', '-j', type=int, default=1, help='Procesos a usar dentro de cada informe.')
+    parser.add_argument('--trace', nargs='?', const=os.path.join(main.OUTPUT_DIR, BATCH_DIRNAME, 'traza'),
+                        metavar='PREFIJO', help='Guarda la traza del lote (ver main.py --trace).')
+    args = parser.parse_args()
+    if bool(args.manifest) == args.por_departamento:
+        parser.error('indique un manifiesto o --por-departamento')
+    try:
+        batch_specs = load_manifest(args.manifest) if args.manifest else department_specs()
+    except (OSError, ValueError) as e:
+        parser.error(f'manifiesto no válido: {e}')
+    if args.only:
+        batch_specs = [spec for spec in batch_specs if spec['name'] in args.only]
+    run = traced(run_batch, args.trace) if args.trace else run_batch
+    batch_results = run(batch_specs, use_cache=not args.no_cache, jobs=max(1, args.jobs))
+    print_batch_summary(batch_results)
+    if any(result['error'] for result in batch_results):
+        raise SystemExit(1)
@@ -0,0 +1,65 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Permite importar los módulos del proyecto al ejecutar el script desde cualquier directorio.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import analyze_units, candidate_summary  # noqa: E402
+from bench_localidades import CANDIDATOS  # noqa: E402
+
+
+def synthetic_mesas(n, seed=0):
+    """Tabla sintética con una fila por mesa (votos por candidato); incluye empates y mesas sin votos."""
+    rng = np.random.default_rng(seed)
+    votes = rng.integers(0, 40, size=(n, len(CANDIDATOS)))
+    votes[::97] = 0
+    votes[::89, 1] = votes[::89, 0]
+    df = pd.DataFrame(votes, columns=CANDIDATOS)
+    df.insert(0, 'Mesa', [f'Mesa {i}' for i in range(n)])
+    return df
+
+
+def legacy_summary(df, candidate):
+    """Versión anterior: idxmax/max y luego un recorrido con iterrows."""
+    df = df.copy()
+    df['Max'] = df[CANDIDATOS].max(axis=1)
+    won, lost = [], []
+    for _, row in df.iterrows():
+        if row[candidate] == row['Max'] and row[candidate] > 0:
+            won.append(row['Mesa'])
+        else:
+            lost.append(row['Mesa'])
+    return sorted(won), sorted(lost)
+
+
+def run(sizes, legacy_max):
+    print(f"{'N':>9} {'vectorizado (s)':>16} {'anterior (s)':>13}")
+    for n in sizes:
+        df = synthetic_mesas(n)
+        start = time.perf_counter()
+        summary = candidate_summary(analyze_units(df, 'Mesa', CANDIDATOS), CANDIDATOS[0])
+        elapsed = time.perf_counter() - start
+        row = f'{n:>9} {elapsed:>16.3f}'
+        if n <= legacy_max:
+            start = time.perf_counter()
+            won, lost = legacy_summary(df, CANDIDATOS[0])
+            row += f' {time.perf_counter() - start:>13.3f}'
+            # La versión anterior contaba los empates como victorias.
+            assert won == sorted(summary['won'] + summary['tied'])
+            assert lost == sorted(summary['lost'] + summary['no_votes'])
+        print(row)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark del cálculo de ganadores y márgenes.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000],
+                        help='Cantidades de unidades (mesas) a medir.')
+    parser.add_argument('--legacy-max', type=int, default=100000,
+                        help='N máximo para medir también la versión anterior con iterrows (es lenta).')
+    args = parser.parse_args()
+    run(args.sizes, args.legacy_max)
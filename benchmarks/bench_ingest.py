@@ -0,0 +1,119 @@
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# Permite importar los módulos del proyecto al ejecutar el script desde cualquier directorio.
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from ingest import CARGO_GOBERNADOR, CARGO_PRESIDENTE, ingest_mesas  # noqa: E402
+
+LOCALIDADES_CSV = os.path.join(BASE_DIR, 'Datos_Norte_NQN - localidades.csv')
+PRESIDENTE_CSV = os.path.join(BASE_DIR, 'Datos_Norte_NQN - Copia de presidente.csv')
+CANDIDATOS_PRESIDENTE = ['Sergio Massa', 'Javier Milei', 'Patricia Bullrich', 'Juan Schiaretti', 'Myriam Bregman']
+
+
+def _load_sources():
+    """Carga los CSV agregados del repositorio, que sirven de base para los datos sintéticos."""
+    localidades = pd.read_csv(LOCALIDADES_CSV)
+    candidatos = [col for col in localidades.columns if col not in ['Localidad', 'Departamento']]
+    for col in candidatos:
+        localidades[col] = localidades[col].replace('-', '0').astype(int)
+    presidente = pd.read_csv(PRESIDENTE_CSV, decimal=',', thousands='.')
+    return localidades, candidatos, presidente
+
+
+def write_synthetic_mesas(path, mesas_por_unidad, seed=0):
+    """
+    Escribe un CSV de resultados por mesa cuyos totales coinciden exactamente con los CSV
+    agregados del repositorio: los votos de cada localidad (Gobernador) y de cada departamento
+    (Presidente) se reparten al azar entre `mesas_por_unidad` mesas.
+
+    Args:
+        path (str): Ruta del CSV a escribir.
+        mesas_por_unidad (int): Cantidad de mesas por localidad o departamento.
+        seed (int): Semilla del generador aleatorio.
+
+    Returns:
+        int: Cantidad de filas escritas.
+    """
+    rng = np.random.default_rng(seed)
+    localidades, candidatos, presidente = _load_sources()
+    units = [(CARGO_GOBERNADOR, row['Departamento'], row['Localidad'], candidatos, [row[c] for c in candidatos])
+             for _, row in localidades.iterrows()]
+    units += [(CARGO_PRESIDENTE, row['Departamento'], row['Departamento'], CANDIDATOS_PRESIDENTE,
+               [row[c] for c in CANDIDATOS_PRESIDENTE]) for _, row in presidente.iterrows()]
+    rows = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('Mesa,Cargo,Departamento,Localidad,Candidato,Votos\n')
+        for cargo, depto, localidad, names, votes in units:
+            # Reparto multinomial: la suma por candidato se conserva exactamente.
+            split = np.stack([rng.multinomial(v, np.full(mesas_por_unidad, 1 / mesas_por_unidad)) for v in votes], axis=1)
+            frame = pd.DataFrame({
+                'Mesa': np.repeat(np.arange(mesas_por_unidad), len(names)),
+                'Cargo': cargo,
+                'Departamento': depto.upper(),
+                'Localidad': localidad,
+                'Candidato': np.tile(names, mesas_por_unidad),
+                'Votos': split.ravel(),
+            })
+            frame.to_csv(f, header=False, index=False)
+            rows += len(frame)
+    return rows
+
+
+def check(aggregator):
+    """Verifica que la ingesta reproduzca los CSV agregados del repositorio."""
+    localidades, candidatos, presidente = _load_sources()
+    got = aggregator.localidades_frame()
+    assert got['Localidad'].tolist() == localidades['Localidad'].tolist()
+    assert (got[candidatos].to_numpy() == localidades[candidatos].to_numpy()).all()
+    got = aggregator.presidente_frame().set_index('Departamento')
+    expected = presidente.set_index('Departamento')[CANDIDATOS_PRESIDENTE]
+    assert (got.loc[expected.index, CANDIDATOS_PRESIDENTE].to_numpy() == expected.to_numpy()).all()
+
+
+def measure(path, chunksize):
+    """Ingresa el CSV (en este proceso) e informa tiempo y memoria máxima."""
+    start = time.perf_counter()
+    aggregator = ingest_mesas(path, chunksize=chunksize)
+    elapsed = time.perf_counter() - start
+    check(aggregator)
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f'RESULT {aggregator.rows} {elapsed:.3f} {peak_mb:.1f}')
+
+
+def run(mesas, chunksize):
+    """Genera archivos de distinto tamaño y mide cada ingesta en un proceso separado."""
+    print(f"{'filas':>10} {'MB':>8} {'tiempo (s)':>11} {'filas/s':>11} {'RSS máx. (MB)':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in mesas:
+            path = os.path.join(tmp, f'mesas_{n}.csv')
+            write_synthetic_mesas(path, n)
+            size_mb = os.path.getsize(path) / 1e6
+            # Cada medición corre en un proceso nuevo para que la memoria máxima no se arrastre.
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), '--measure', path,
+                                     '--chunksize', str(chunksize)], capture_output=True, text=True, check=True).stdout
+            _, rows, elapsed, peak_mb = next(line for line in output.splitlines() if line.startswith('RESULT')).split()
+            rows, elapsed = int(rows), float(elapsed)
+            print(f'{rows:>10} {size_mb:>8.1f} {elapsed:>11.2f} {rows / elapsed:>11.0f} {float(peak_mb):>14.1f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark de la ingesta por bloques del CSV de mesas.')
+    parser.add_argument('--mesas', type=int, nargs='+', default=[100, 1000, 10000],
+                        help='Cantidades de mesas por localidad/departamento a generar.')
+    parser.add_argument('--chunksize', type=int, default=200_000, help='Filas por bloque.')
+    parser.add_argument('--measure', metavar='CSV', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        measure(args.measure, args.chunksize)
+    else:
+        run(args.mesas, args.chunksize)
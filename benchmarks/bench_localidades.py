@@ -0,0 +1,77 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Permite importar los módulos del proyecto al ejecutar el script desde cualquier directorio.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from charts import build_locality_figures  # noqa: E402
+from plotly_payload import build_plotly_payload, figure_to_spec  # noqa: E402
+
+CANDIDATOS = ['Rolando Figueroa', 'Marcos Koopmann Irizar', 'Ramón Rioseco',
+              'Mario Pablo Cervi', 'Carlos Eguía', 'Patricia Jure']
+LAYOUT_CONFIG = dict(autosize=True, height=500, bargap=0.15)
+
+
+def synthetic_localidades(n, seed=0):
+    """
+    Genera una tabla de localidades sintética con el mismo formato que 'Datos_Norte_NQN - localidades.csv'.
+
+    Args:
+        n (int): Cantidad de localidades.
+        seed (int): Semilla del generador aleatorio.
+
+    Returns:
+        pd.DataFrame: Tabla con columnas Localidad, un candidato por columna y Departamento.
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.integers(0, 5000, size=(n, len(CANDIDATOS))), columns=CANDIDATOS)
+    df.insert(0, 'Localidad', [f'Localidad {i}' for i in range(n)])
+    df['Departamento'] = [f'Departamento {i % 16}' for i in range(n)]
+    return df
+
+
+def legacy_locality_figures(df, candidate_cols):
+    """Versión anterior: filtra el DataFrame por localidad y llama a px.bar en cada una."""
+    import plotly.express as px
+    specs = []
+    for name in df['Localidad'].unique().tolist():
+        df_current = df[df['Localidad'] == name].copy()
+        df_long = df_current.melt(id_vars=['Localidad', 'Departamento'], var_name='Candidato', value_name='Votos')
+        fig = px.bar(df_long, x='Candidato', y='Votos', color='Candidato', text='Votos', opacity=0.7,
+                     color_discrete_sequence=px.colors.qualitative.D3)
+        fig.update_layout(**LAYOUT_CONFIG)
+        specs.append((name, figure_to_spec(fig)))
+    return specs
+
+
+def run(sizes, legacy_max):
+    """Mide el tiempo total y por localidad del constructor vectorizado (y del anterior, para N chicos)."""
+    print(f"{'N':>8} {'vectorizado (s)':>16} {'µs/localidad':>14} {'anterior (s)':>14} {'µs/localidad':>14}")
+    for n in sizes:
+        df = synthetic_localidades(n)
+        start = time.perf_counter()
+        figures = build_locality_figures(df, CANDIDATOS)
+        build_plotly_payload({name: figure_to_spec(spec) for name, spec in figures if spec}, LAYOUT_CONFIG)
+        elapsed = time.perf_counter() - start
+        row = f'{n:>8} {elapsed:>16.3f} {elapsed / n * 1e6:>14.1f}'
+        if n <= legacy_max:
+            start = time.perf_counter()
+            legacy_locality_figures(df, CANDIDATOS)
+            legacy = time.perf_counter() - start
+            row += f' {legacy:>14.3f} {legacy / n * 1e6:>14.1f}'
+        print(row)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark de los gráficos por localidad.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 50000],
+                        help='Cantidades de localidades a medir.')
+    parser.add_argument('--legacy-max', type=int, default=1000,
+                        help='N máximo para medir también la versión anterior con px.bar (es lenta).')
+    args = parser.parse_args()
+    run(args.sizes, args.legacy_max)
@@ -0,0 +1,73 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Permite importar los módulos del proyecto al ejecutar el script desde cualquier directorio.
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from geometry import PolygonIndex, assign_departments  # noqa: E402
+
+DEPARTMENT_LAYERS = [('minasg.geojson', 'Minas'), ('chosmalal.geojson', 'Chos Malal'),
+                     ('pehuenches.geojson', 'Pehuenches'), ('ñorquin.geojson', 'Ñorquin'),
+                     ('loncopue.geojson', 'Loncopue')]
+
+
+def brute_force_locate(index, lon, lat, block=2000):
+    """Referencia: regla par-impar de cada punto contra todas las aristas de cada polígono."""
+    result = np.full(len(lon), -1)
+    for polygon in range(len(index.names)):
+        edges = index.edges[index.edge_owner == polygon]
+        inside = np.zeros(len(lon), dtype=bool)
+        for start in range(0, len(edges), block):
+            e = edges[start:start + block]
+            crossing = (e[None, :, 1] > lat[:, None]) != (e[None, :, 3] > lat[:, None])
+            with np.errstate(divide='ignore', invalid='ignore'):
+                x_cross = e[None, :, 0] + (lat[:, None] - e[None, :, 1]) * (e[None, :, 2] - e[None, :, 0]) / (e[None, :, 3] - e[None, :, 1])
+            inside ^= np.sum(crossing & (lon[:, None] < x_cross), axis=1) % 2 == 1
+        result[inside] = polygon
+    return result
+
+
+def run(sizes, check):
+    layers = [(os.path.join(BASE_DIR, 'mapas', filename), name) for filename, name in DEPARTMENT_LAYERS]
+    start = time.perf_counter()
+    index = PolygonIndex.from_layers(layers)
+    print(f'Índice: {len(index.edges)} aristas, grilla {index.shape[0]}x{index.shape[1]}, '
+          f'{time.perf_counter() - start:.3f} s')
+    rng = np.random.default_rng(0)
+    x0, y0, x1, y1 = index.bounds
+    print(f"{'puntos':>9} {'asignación (s)':>15} {'puntos/s':>12} {'con etiqueta (s)':>17}")
+    for n in sizes:
+        lon, lat = rng.uniform(x0, x1, n), rng.uniform(y0, y1, n)
+        start = time.perf_counter()
+        located = index.locate(lon, lat)
+        elapsed = time.perf_counter() - start
+        # Etiquetas correctas salvo un 1% cambiadas al azar, para medir también el cruce con el CSV.
+        # Los puntos fuera de todos los departamentos nunca coinciden.
+        labels = np.asarray(index.names + ['Fuera'], dtype=object)[located]
+        labels[rng.random(n) < 0.01] = 'Minas'
+        df = pd.DataFrame({'Longitud': lon, 'Latitud': lat, 'Departamento': labels})
+        start = time.perf_counter()
+        checked = assign_departments(df, index)
+        elapsed_check = time.perf_counter() - start
+        print(f'{n:>9} {elapsed:>15.3f} {n / elapsed:>12.0f} {elapsed_check:>17.3f}'
+              f'  (no coinciden: {(~checked["Departamento coincide"] & (located >= 0)).sum()} dentro,'
+              f' {(located < 0).sum()} fuera)')
+        if check:
+            sample = slice(0, min(n, 20000))
+            expected = brute_force_locate(index, lon[sample], lat[sample])
+            assert (expected == located[sample]).all(), 'la asignación no coincide con la referencia'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark de la asignación de puntos a departamentos.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 500000, 1000000],
+                        help='Cantidades de puntos a asignar.')
+    parser.add_argument('--no-check', action='store_true', help='No compara con la referencia por fuerza bruta.')
+    args = parser.parse_args()
+    run(args.sizes, not args.no_check)
@@ -0,0 +1,57 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Permite importar los módulos del proyecto al ejecutar el script desde cualquier directorio.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_report import CANDIDATOS_PRESIDENTE  # noqa: E402
+from projection import DEFAULT_DRAWS, DEFAULT_UNIT_DRAWS, project_results  # noqa: E402
+
+
+def synthetic_partial(n, pending=None, seed=0):
+    """
+    Votos escrutados sintéticos de `n` unidades, de las que `pending` (al azar) no terminaron el
+    escrutinio; sin `pending`, ninguna terminó (el peor caso de la proyección).
+    """
+    rng = np.random.default_rng(seed)
+    votes = rng.integers(0, 5000, size=(n, len(CANDIDATOS_PRESIDENTE)))
+    scrutinized = np.ones(n)
+    partial = rng.choice(n, size=n if pending is None else min(pending, n), replace=False)
+    scrutinized[partial] = rng.uniform(0.3, 0.99, size=len(partial))
+    return [f'Unidad {i}' for i in range(n)], votes, scrutinized
+
+
+def run(sizes, pending, draws, unit_draws, repeat):
+    print(f"{'unidades':>9} {'pendientes':>11} {'simulaciones':>13} {'por unidad':>11} {'tiempo (s)':>11}")
+    for n in sizes:
+        units, votes, scrutinized = synthetic_partial(n, pending)
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            projection = project_results(units, CANDIDATOS_PRESIDENTE, votes, scrutinized, draws=draws,
+                                         unit_draws=unit_draws)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        # Las unidades completas no cambian y el total proyectado contiene lo ya escrutado.
+        complete = scrutinized == 1
+        assert np.array_equal(projection.mean[complete], votes[complete])
+        assert (projection.total_mean >= votes.sum(axis=0)).all()
+        print(f'{n:>9} {int((~complete).sum()):>11} {draws:>13} {projection.unit_draws:>11} {best:>11.3f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark de la proyección de Monte Carlo del resultado final.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5, 100, 2000],
+                        help='Cantidades de unidades (departamentos o localidades).')
+    parser.add_argument('--pending', type=int, default=None,
+                        help='Unidades con el escrutinio sin terminar en cada medición (por defecto, todas).')
+    parser.add_argument('--draws', type=int, default=DEFAULT_DRAWS, help='Cantidad de simulaciones del total.')
+    parser.add_argument('--unit-draws', type=int, default=DEFAULT_UNIT_DRAWS,
+                        help='Cantidad de simulaciones de cada unidad pendiente.')
+    parser.add_argument('--repeat', type=int, default=3, help='Ejecuciones por tamaño; se toma la más rápida.')
+    args = parser.parse_args()
+    run(args.sizes, args.pending, args.draws, args.unit_draws, max(1, args.repeat))
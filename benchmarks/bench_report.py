@@ -0,0 +1,350 @@
+import argparse
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Permite importar los módulos del proyecto al ejecutar el script desde cualquier directorio.
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+CANDIDATOS_GOBERNADOR = ['Rolando Figueroa', 'Marcos Koopmann Irizar', 'Ramón Rioseco',
+                         'Mario Pablo Cervi', 'Carlos Eguía', 'Patricia Jure']
+CANDIDATOS_PRESIDENTE = ['Sergio Massa', 'Javier Milei', 'Patricia Bullrich', 'Juan Schiaretti', 'Myriam Bregman']
+# Caja (oeste, sur, este, norte) sobre la que se reparten los departamentos sintéticos (norte de Neuquén).
+AREA_BOUNDS = (-71.4, -38.4, -68.2, -36.0)
+# Etapas que se pueden medir, en el orden en que se ejecutan.
+STAGES = ['datasets', 'validacion', 'cubo', 'departamentos', 'localidades', 'presidente', 'mapa', 'informe', 'informe_cache']
+# Variación relativa a partir de la cual --compare marca una medición como regresión.
+REGRESSION_THRESHOLD = 0.2
+
+
+# --- Datos sintéticos ---
+
+def _format_percent(value):
+    return f'{value:.2f}%'.replace('.', ',')
+
+
+def _edge_points(start, end, count, rng, jitter):
+    """Puntos intermedios de una arista, desplazados al azar en sentido perpendicular (sin los extremos)."""
+    t = np.linspace(0, 1, count + 2)[1:-1, None]
+    points = start + (end - start) * t
+    normal = np.array([-(end - start)[1], (end - start)[0]])
+    return points + normal * rng.uniform(-jitter, jitter, size=(count, 1))
+
+
+def synthetic_departments(n_departments, vertices, seed=0):
+    """
+    Genera polígonos de departamentos que cubren AREA_BOUNDS en una grilla. Cada arista se
+    subdivide con puntos desplazados al azar y se comparte entre los departamentos vecinos
+    (como en los límites reales), de modo que la simplificación preserva la topología.
+
+    Args:
+        n_departments (int): Cantidad de departamentos.
+        vertices (int): Vértices aproximados por polígono.
+        seed (int): Semilla del generador aleatorio.
+
+    Returns:
+        list: Un anillo exterior (lista de [lon, lat], cerrado) por departamento.
+    """
+    columns = math.ceil(math.sqrt(n_departments))
+    rows = math.ceil(n_departments / columns)
+    west, south, east, north = AREA_BOUNDS
+    xs = np.linspace(west, east, columns + 1)
+    ys = np.linspace(south, north, rows + 1)
+    per_edge = max(0, vertices // 4 - 1)
+    edges = {}
+
+    def edge(a, b):
+        # Cada arista se genera una sola vez (con su propia semilla) y se recorre en el sentido pedido.
+        key = (min(a, b), max(a, b))
+        if key not in edges:
+            rng = np.random.default_rng([seed, *key[0], *key[1]])
+            start, end = np.array([xs[key[0][0]], ys[key[0][1]]]), np.array([xs[key[1][0]], ys[key[1][1]]])
+            edges[key] = _edge_points(start, end, per_edge, rng, jitter=0.15)
+        points = edges[key]
+        return points if key == (a, b) else points[::-1]
+
+    rings = []
+    for index in range(n_departments):
+        i, j = index % columns, index // columns
+        corners = [(i, j), (i + 1, j), (i + 1, j + 1), (i, j + 1)]
+        ring = []
+        for a, b in zip(corners, corners[1:] + corners[:1]):
+            ring.append([xs[a[0]], ys[a[1]]])
+            ring.extend(edge(a, b).tolist())
+        ring.append(ring[0])
+        rings.append([[round(x, 6), round(y, 6)] for x, y in ring])
+    return rings
+
+
+def write_synthetic_inputs(data_dir, n_localidades, n_departamentos, n_candidatos, vertices, seed=0):
+    """
+    Escribe en `data_dir` los tres CSV del informe y un GeoJSON por departamento, con el mismo
+    formato que los archivos del repositorio.
+
+    Args:
+        data_dir (str): Directorio de destino.
+        n_localidades (int): Cantidad de localidades.
+        n_departamentos (int): Cantidad de departamentos.
+        n_candidatos (int): Cantidad de candidatos a Gobernador.
+        vertices (int): Vértices aproximados por polígono de departamento.
+        seed (int): Semilla del generador aleatorio.
+
+    Returns:
+        dict: Rutas de los archivos y la lista de capas (archivo GeoJSON, departamento).
+    """
+    rng = np.random.default_rng(seed)
+    candidatos = (CANDIDATOS_GOBERNADOR + [f'Candidato {i}' for i in range(len(CANDIDATOS_GOBERNADOR), n_candidatos)])
+    candidatos = candidatos[:n_candidatos]
+    departamentos = [f'Departamento {i}' for i in range(n_departamentos)]
+    maps_dir = os.path.join(data_dir, 'mapas')
+    os.makedirs(maps_dir, exist_ok=True)
+
+    # Localidades: votos por candidato; algunas celdas con '-' como en el CSV real.
+    votes = rng.integers(0, 3000, size=(n_localidades, n_candidatos))
+    localidad_depto = rng.integers(0, n_departamentos, size=n_localidades)
+    localidades_path = os.path.join(data_dir, 'localidades.csv')
+    with open(localidades_path, 'w', encoding='utf-8') as f:
+        f.write(','.join(['Localidad'] + candidatos + ['Departamento']) + '\n')
+        for i in range(n_localidades):
+            cells = ['-' if v == 0 else str(v) for v in votes[i]]
+            f.write(','.join([f'Localidad {i}'] + cells + [departamentos[localidad_depto[i]]]) + '\n')
+
+    # Departamentos (Gobernador): los totales de sus localidades, un departamento por columna.
+    totals = np.zeros((n_departamentos, n_candidatos), dtype=np.int64)
+    np.add.at(totals, localidad_depto, votes)
+    departamentos_path = os.path.join(data_dir, 'departamentos.csv')
+    with open(departamentos_path, 'w', encoding='utf-8') as f:
+        f.write(','.join(['Candidato'] + [name.lower() for name in departamentos]) + '\n')
+        for j, candidato in enumerate(candidatos):
+            f.write(','.join([candidato] + [str(v) for v in totals[:, j]]) + '\n')
+
+    # Presidente: una fila por departamento con votos, blancos/anulados y porcentajes.
+    presidente_path = os.path.join(data_dir, 'presidente.csv')
+    with open(presidente_path, 'w', encoding='utf-8') as f:
+        f.write('Departamento,' + ','.join(CANDIDATOS_PRESIDENTE) + ',Votos en Blanco,Votos Anulados,Votos Blancos,'
+                'Votos Anulados,Participación,Votos Totales Emitidos,Escrutado\n')
+        for name in departamentos:
+            row = rng.integers(100, 5000, size=len(CANDIDATOS_PRESIDENTE))
+            blancos, anulados = rng.integers(0, 300, size=2)
+            emitidos = int(row.sum() + blancos + anulados)
+            percents = [blancos / emitidos * 100, anulados / emitidos * 100, rng.uniform(60, 85), rng.uniform(50, 100)]
+            f.write(','.join([name] + [str(v) for v in row] + [str(blancos), str(anulados)]
+                             + [f'"{_format_percent(p)}"' for p in percents[:3]] + [str(emitidos)]
+                             + [f'"{_format_percent(percents[3])}"']) + '\n')
+
+    layers = []
+    for name, ring in zip(departamentos, synthetic_departments(n_departamentos, vertices, seed=seed)):
+        filename = f"{name.lower().replace(' ', '_')}.geojson"
+        collection = {'type': 'FeatureCollection', 'features': [
+            {'type': 'Feature', 'properties': {'nombre': name.lower()},
+             'geometry': {'type': 'MultiPolygon', 'coordinates': [[ring]]}}]}
+        with open(os.path.join(maps_dir, filename), 'w', encoding='utf-8') as f:
+            json.dump(collection, f)
+        layers.append((filename, name))
+    return {'departamentos': departamentos_path, 'localidades': localidades_path, 'presidente': presidente_path,
+            'maps_dir': maps_dir, 'layers': layers}
+
+
+# --- Medición de una etapa (en un proceso aparte) ---
+
+def _configure_main(inputs, output_dir):
+    """Importa main.py y apunta sus rutas de entrada y salida a los datos sintéticos."""
+    import main
+    main.csv_file_path = inputs['departamentos']
+    main.localidades_csv_file_path = inputs['localidades']
+    main.presidente_csv_file_path = inputs['presidente']
+    main.MAPS_DIR = inputs['maps_dir']
+    main.DEPARTMENT_GEOJSON_FILES = [tuple(layer) for layer in inputs['layers']]
+    main.OUTPUT_DIR = output_dir
+    main.output_html_path = os.path.join(output_dir, 'informe_elecciones_nqn.html')
+    main.mapa_output_path = os.path.join(output_dir, 'mapa_departamentos_nqn.html')
+    os.makedirs(output_dir, exist_ok=True)
+    return main
+
+
+def measure_stage(stage, inputs, output_dir, jobs):
+    """
+    Ejecuta una etapa del informe sobre los datos sintéticos e informa tiempo, memoria máxima
+    y tamaños de salida en una línea 'RESULT <json>'.
+    """
+    import contextlib
+    import io
+    import shutil
+
+    from datasets import DATASET_CACHE_DIRNAME, load_dataset
+
+    main = _configure_main(inputs, output_dir)
+    # Las versiones tipadas de los CSV se quitan para que cada medición parta del mismo estado
+    # (salvo en las etapas que, como en un uso normal, las encuentran ya generadas).
+    typed_dir = os.path.join(os.path.dirname(inputs['localidades']), DATASET_CACHE_DIRNAME)
+    if stage == 'datasets':
+        shutil.rmtree(typed_dir, ignore_errors=True)
+    else:
+        for path in (inputs['departamentos'], inputs['localidades'], inputs['presidente']):
+            load_dataset(path)
+
+    def run():
+        if stage == 'datasets':
+            for path in (inputs['departamentos'], inputs['localidades'], inputs['presidente']):
+                load_dataset(path)
+        elif stage == 'validacion':
+            main.check_report_data(inputs['departamentos'], inputs['localidades'], inputs['presidente'])
+        elif stage == 'cubo':
+            main.load_report_cube(inputs['departamentos'], inputs['localidades'], inputs['presidente'])
+        elif stage == 'departamentos':
+            main.build_departamentos_section(cube)
+        elif stage == 'localidades':
+            main.build_localidades_section(cube)
+        elif stage == 'presidente':
+            main.build_presidente_section(cube)
+        elif stage == 'mapa':
+            main.build_department_map(cube, main.mapa_output_path)
+        elif stage == 'informe':
+            main.generate_election_report(use_cache=False, jobs=jobs)
+        elif stage == 'informe_cache':
+            main.generate_election_report(use_cache=True, jobs=jobs)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        if stage in ('departamentos', 'localidades', 'presidente', 'mapa'):
+            # Las secciones y el mapa se miden a partir del cubo ya armado (ver la etapa 'cubo').
+            cube = main.load_report_cube(inputs['departamentos'], inputs['localidades'], inputs['presidente'])
+            # main importa Plotly y Folium recién al usarlos: se importan antes para no medir la importación.
+            import folium  # noqa: F401
+            import plotly.express  # noqa: F401
+        if stage == 'informe_cache':
+            # Primera ejecución (no medida) para llenar la caché.
+            main.generate_election_report(use_cache=True, jobs=jobs)
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+
+    sizes = {}
+    for name in ('informe_elecciones_nqn.html', 'mapa_departamentos_nqn.html'):
+        path = os.path.join(output_dir, name)
+        if os.path.exists(path):
+            sizes[name] = os.path.getsize(path)
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print('RESULT ' + json.dumps({'seconds': round(elapsed, 4), 'peak_rss_mb': round(peak_mb, 1), 'sizes': sizes}))
+
+
+# --- Ejecución de la suite ---
+
+def _versions():
+    import folium
+    import pandas as pd
+    import plotly
+    versions = {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+                'plotly': plotly.__version__, 'folium': folium.__version__}
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return versions, commit
+
+
+def run(localidades, departamentos, candidatos, vertices, stages, jobs, output):
+    """
+    Genera datos sintéticos para cada escala, mide cada etapa en un proceso nuevo (para que la
+    memoria máxima de una no se arrastre a la siguiente) y guarda los resultados en JSON.
+    """
+    versions, commit = _versions()
+    results = {'commit': commit, 'versions': versions, 'jobs': jobs, 'runs': []}
+    print(f"{'localidades':>11} {'etapa':>14} {'tiempo (s)':>11} {'RSS máx. (MB)':>14} {'informe (KB)':>13} {'mapa (KB)':>10}")
+    for n in localidades:
+        scale = {'localidades': n, 'departamentos': departamentos, 'candidatos': candidatos, 'vertices': vertices}
+        with tempfile.TemporaryDirectory() as tmp:
+            inputs = write_synthetic_inputs(tmp, n, departamentos, candidatos, vertices)
+            inputs_path = os.path.join(tmp, 'inputs.json')
+            with open(inputs_path, 'w', encoding='utf-8') as f:
+                json.dump(inputs, f)
+            for stage in stages:
+                output_dir = os.path.join(tmp, f'output_{stage}')
+                completed = subprocess.run([sys.executable, os.path.abspath(__file__), '--measure', stage,
+                                            '--inputs', inputs_path, '--output-dir', output_dir, '--jobs', str(jobs)],
+                                           capture_output=True, text=True)
+                lines = [line for line in completed.stdout.splitlines() if line.startswith('RESULT ')]
+                if completed.returncode != 0 or not lines:
+                    print(f"Error al medir la etapa '{stage}' con {n} localidades:\n{completed.stderr[-2000:]}")
+                    continue
+                measurement = json.loads(lines[-1][len('RESULT '):])
+                results['runs'].append({'scale': scale, 'stage': stage, **measurement})
+                sizes = measurement['sizes']
+                print(f"{n:>11} {stage:>14} {measurement['seconds']:>11.3f} {measurement['peak_rss_mb']:>14.1f} "
+                      f"{sizes.get('informe_elecciones_nqn.html', 0) / 1024:>13.1f} "
+                      f"{sizes.get('mapa_departamentos_nqn.html', 0) / 1024:>10.1f}")
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=1)
+        print(f"Resultados guardados en: {output}")
+    return results
+
+
+def compare(current, baseline_path, threshold=REGRESSION_THRESHOLD):
+    """
+    Compara los resultados con los de una ejecución anterior (mismas escalas y etapas) e
+    informa las variaciones de tiempo, memoria y tamaños que superan `threshold`.
+
+    Returns:
+        int: Cantidad de regresiones encontradas.
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    def key(run_):
+        return json.dumps(run_['scale'], sort_keys=True), run_['stage']
+
+    previous = {key(run_): run_ for run_ in baseline['runs']}
+    regressions = 0
+    print(f"\nComparación con {baseline_path} (commit {baseline.get('commit')}):")
+    for run_ in current['runs']:
+        old = previous.get(key(run_))
+        if old is None:
+            continue
+        metrics = [('tiempo', old['seconds'], run_['seconds']), ('RSS', old['peak_rss_mb'], run_['peak_rss_mb'])]
+        metrics += [(name, old['sizes'].get(name), size) for name, size in run_['sizes'].items()]
+        for name, before, after in metrics:
+            if not before:
+                continue
+            change = (after - before) / before
+            if abs(change) >= threshold:
+                label = 'REGRESIÓN' if change > 0 else 'mejora'
+                regressions += change > 0
+                print(f"  {label}: {run_['scale']['localidades']} localidades, {run_['stage']}, {name}: "
+                      f"{before} -> {after} ({change:+.0%})")
+    print(f"  {regressions} regresión(es) por encima de {threshold:.0%}.")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark del informe completo y de cada etapa con datos sintéticos.')
+    parser.add_argument('--localidades', type=int, nargs='+', default=[100, 1000, 10000],
+                        help='Cantidades de localidades a medir.')
+    parser.add_argument('--departamentos', type=int, default=16, help='Cantidad de departamentos.')
+    parser.add_argument('--candidatos', type=int, default=6, help='Cantidad de candidatos a Gobernador.')
+    parser.add_argument('--vertices', type=int, default=2000, help='Vértices aproximados por polígono de departamento.')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES, help='Etapas a medir.')
+    parser.add_argument('--jobs', '-j', type=int, default=1, help='Procesos para el informe completo.')
+    parser.add_argument('--output', '-o', metavar='JSON', help='Archivo donde guardar los resultados.')
+    parser.add_argument('--compare', metavar='JSON', help='Resultados anteriores con los que comparar.')
+    parser.add_argument('--measure', choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument('--inputs', help=argparse.SUPPRESS)
+    parser.add_argument('--output-dir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        with open(args.inputs, 'r', encoding='utf-8') as f:
+            measure_stage(args.measure, json.load(f), args.output_dir, args.jobs)
+    else:
+        current = run(args.localidades, args.departamentos, args.candidatos, args.vertices, args.stages,
+                      max(1, args.jobs), args.output)
+        if args.compare and compare(current, args.compare):
+            sys.exit(1)
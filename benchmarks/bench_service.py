@@ -0,0 +1,167 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.parse
+
+# Permite importar los módulos del proyecto al ejecutar el script desde cualquier directorio.
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN_PATH = os.path.join(BASE_DIR, 'main.py')
+
+DEFAULT_PORT = 8765
+DEFAULT_CONNECTIONS = 16
+DEFAULT_SECONDS = 5.0
+# Tiempo máximo de espera a que el servicio cargue los datos y acepte conexiones, en segundos.
+STARTUP_TIMEOUT = 30
+
+
+async def fetch(reader, writer, path, etag=None):
+    """Envía un GET por una conexión abierta y devuelve (estado, cabeceras, cuerpo)."""
+    request = f'GET {path} HTTP/1.1\r\nHost: bench\r\n'
+    if etag:
+        request += f'If-None-Match: {etag}\r\n'
+    writer.write((request + '\r\n').encode('latin-1'))
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        if name:
+            headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get('content-length', 0)))
+    return int(lines[0].split()[1]), headers, body
+
+
+async def wait_for_service(host, port, timeout=STARTUP_TIMEOUT):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise RuntimeError(f'el servicio no respondió en {timeout} s')
+            await asyncio.sleep(0.1)
+            continue
+        writer.close()
+        return
+
+
+async def discover_paths(host, port):
+    """Rutas a consultar: los totales por cargo y departamento, cada localidad y cada gráfico."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        _, _, body = await fetch(reader, writer, '/localidades')
+        localities = json.loads(body)['localidades']
+        _, _, body = await fetch(reader, writer, '/figures')
+        figure_ids = json.loads(body)['figuras']
+        departamentos = sorted({locality['departamento'] for locality in localities if locality['departamento']})
+        paths = []
+        for cargo in ('gobernador', 'presidente'):
+            paths.append(f'/totals?cargo={cargo}')
+            paths += ['/totals?' + urllib.parse.urlencode({'cargo': cargo, 'departamento': departamento})
+                      for departamento in departamentos]
+        paths += ['/localidad/' + urllib.parse.quote(locality['nombre']) for locality in localities]
+        paths += [f'/figure/{graph_id}' for graph_id in figure_ids]
+        return paths
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, paths, connections, seconds, revalidate):
+    """
+    Consulta las rutas en rueda desde `connections` conexiones persistentes durante `seconds`.
+
+    Returns:
+        dict: Peticiones, peticiones por segundo, latencias y códigos de estado.
+    """
+    # Primera pasada (no medida): llena la caché del servicio y guarda los ETag.
+    etags = {}
+    reader, writer = await asyncio.open_connection(host, port)
+    for path in paths:
+        status, headers, _ = await fetch(reader, writer, path)
+        etags[path] = headers.get('etag')
+    writer.close()
+
+    latencies = []
+    statuses = {}
+    deadline = time.perf_counter() + seconds
+
+    async def worker(offset):
+        reader, writer = await asyncio.open_connection(host, port)
+        index = offset
+        try:
+            while time.perf_counter() < deadline:
+                path = paths[index % len(paths)]
+                index += 1
+                start = time.perf_counter()
+                status, _, _ = await fetch(reader, writer, path, etags[path] if revalidate else None)
+                latencies.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i * 7) for i in range(connections)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else 0.0
+
+    return {'requests': len(latencies), 'rps': len(latencies) / elapsed, 'p50_ms': percentile(0.5),
+            'p99_ms': percentile(0.99), 'statuses': statuses}
+
+
+def start_service(port):
+    """Inicia `main.py serve` en un proceso aparte, fijado a un solo núcleo si el sistema lo permite."""
+    command = [sys.executable, MAIN_PATH, 'serve', '--port', str(port)]
+    process = subprocess.Popen(command, cwd=BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if hasattr(os, 'sched_setaffinity'):
+        try:
+            os.sched_setaffinity(process.pid, {min(os.sched_getaffinity(0))})
+        except OSError:
+            pass
+    return process
+
+
+async def bench(args):
+    await wait_for_service(args.host, args.port)
+    paths = await discover_paths(args.host, args.port)
+    results = {}
+    for mode, revalidate in (('200', False), ('304', True)):
+        results[mode] = await run_load(args.host, args.port, paths, args.connections, args.seconds, revalidate)
+    return paths, results
+
+
+# --- Ejecución del script ---
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Mide cuántas consultas por segundo atiende el servicio de resultados (main.py serve) '
+                    'en un solo núcleo, con la caché llena y con revalidación por ETag (304).')
+    parser.add_argument('--host', default='127.0.0.1', help='Dirección del servicio.')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Puerto del servicio.')
+    parser.add_argument('--connections', type=int, default=DEFAULT_CONNECTIONS, help='Conexiones simultáneas.')
+    parser.add_argument('--seconds', type=float, default=DEFAULT_SECONDS, help='Duración de cada medición.')
+    parser.add_argument('--external', action='store_true',
+                        help='Usa un servicio ya iniciado en lugar de iniciar uno propio.')
+    parser.add_argument('--min-rps', type=float, default=0,
+                        help='Falla (código 1) si alguna medición atiende menos consultas por segundo.')
+    args = parser.parse_args()
+
+    service = None if args.external else start_service(args.port)
+    try:
+        bench_paths, bench_results = asyncio.run(bench(args))
+    finally:
+        if service is not None:
+            service.terminate()
+            service.wait()
+    print(f"{len(bench_paths)} rutas distintas, {args.connections} conexiones, {args.seconds:.0f} s por medición.")
+    print(f"{'respuesta':<10} {'consultas':>10} {'por segundo':>12} {'p50 (ms)':>9} {'p99 (ms)':>9}  estados")
+    for mode, result in bench_results.items():
+        print(f"{mode:<10} {result['requests']:>10} {result['rps']:>12.0f} {result['p50_ms']:>9.2f} "
+              f"{result['p99_ms']:>9.2f}  {result['statuses']}")
+    if any(result['rps'] < args.min_rps for result in bench_results.values()):
+        raise SystemExit(1)
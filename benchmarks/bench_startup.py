@@ -0,0 +1,131 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Permite importar los módulos del proyecto al ejecutar el script desde cualquier directorio.
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN_PATH = os.path.join(BASE_DIR, 'main.py')
+
+# Comandos livianos que no deben cargar las librerías pesadas: argumentos de main.py (None = solo importarlo).
+LIGHT_COMMANDS = {
+    'import main': None,
+    'main.py --help': ['--help'],
+    'main.py validate': ['validate'],
+}
+# Módulos que los comandos livianos no deben importar.
+HEAVY_MODULES = ['numpy', 'pandas', 'plotly', 'folium', 'branca']
+# Tiempo máximo de arranque en frío (ms), incluido el inicio del intérprete.
+DEFAULT_BUDGET_MS = 300
+DEFAULT_REPEAT = 5
+
+# Código que se ejecuta en un proceso aparte para inspeccionar un comando: registra con un
+# audit hook las escrituras y cambios en el sistema de archivos y, al terminar, informa qué
+# módulos pesados quedaron importados en una línea 'PROBE <json>' por stderr.
+PROBE_CODE = r'''
+import json, os, runpy, sys
+
+base_dir, main_path, heavy, argv = sys.argv[1], sys.argv[2], json.loads(sys.argv[3]), json.loads(sys.argv[4])
+writes = []
+WRITE_FLAGS = os.O_WRONLY | os.O_RDWR | os.O_CREAT | os.O_APPEND | os.O_TRUNC
+
+def hook(event, args):
+    if event == 'open':
+        path, mode, flags = args
+        if (mode and any(c in mode for c in 'wax+')) or (mode is None and isinstance(flags, int) and flags & WRITE_FLAGS):
+            writes.append(f'open {path}')
+    elif event in ('os.mkdir', 'os.rename', 'os.remove', 'os.rmdir', 'shutil.rmtree', 'shutil.copyfile'):
+        writes.append(f'{event} {args[0]}')
+
+sys.path.insert(0, base_dir)
+sys.addaudithook(hook)
+code = 0
+try:
+    if argv is None:
+        import main
+    else:
+        sys.argv = [main_path] + argv
+        runpy.run_path(main_path, run_name='__main__')
+except SystemExit as e:
+    code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+loaded = sorted(name for name in heavy if name in sys.modules)
+sys.stdout.flush()
+print('PROBE ' + json.dumps({'code': code, 'heavy': loaded, 'writes': writes}), file=sys.stderr)
+'''
+
+
+def command_line(argv):
+    """Línea de comandos real (sin inspección) de un comando liviano."""
+    if argv is None:
+        return [sys.executable, '-c', 'import main']
+    return [sys.executable, MAIN_PATH] + argv
+
+
+def time_command(argv, repeat):
+    """Devuelve el mejor tiempo de reloj (ms) de `repeat` ejecuciones en frío del comando."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command_line(argv), cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, check=False)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def probe_command(argv):
+    """Ejecuta el comando con el audit hook y devuelve {'code', 'heavy', 'writes'}."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    result = subprocess.run([sys.executable, '-c', PROBE_CODE, BASE_DIR, MAIN_PATH, json.dumps(HEAVY_MODULES),
+                             json.dumps(argv)], cwd=BASE_DIR, env=env, capture_output=True, text=True, check=False)
+    for line in result.stderr.splitlines():
+        if line.startswith('PROBE '):
+            return json.loads(line[len('PROBE '):])
+    raise RuntimeError(f'el comando no terminó normalmente:\n{result.stderr}')
+
+
+def check_startup(budget_ms, repeat):
+    """
+    Mide y verifica cada comando liviano.
+
+    Returns:
+        list: Un dict por comando con 'command', 'ms', 'code', 'heavy', 'writes' y 'problems'.
+    """
+    results = []
+    for name, argv in LIGHT_COMMANDS.items():
+        probe = probe_command(argv)
+        ms = time_command(argv, repeat)
+        problems = []
+        if ms > budget_ms:
+            problems.append(f'tarda {ms:.0f} ms (presupuesto: {budget_ms} ms)')
+        if probe['heavy']:
+            problems.append(f"importa {', '.join(probe['heavy'])}")
+        if probe['writes']:
+            problems.append(f"modifica el sistema de archivos: {'; '.join(probe['writes'][:3])}")
+        if probe['code'] != 0:
+            problems.append(f"termina con código {probe['code']}")
+        results.append({'command': name, 'ms': ms, **probe, 'problems': problems})
+    return results
+
+
+# --- Ejecución del script ---
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Verifica que los comandos livianos de main.py arranquen rápido, sin importar '
+                    'pandas, Plotly, Folium ni branca y sin escribir en disco.')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_MS,
+                        help=f'Tiempo máximo de arranque en ms (por defecto {DEFAULT_BUDGET_MS}).')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help=f'Ejecuciones por comando; se toma la más rápida (por defecto {DEFAULT_REPEAT}).')
+    args = parser.parse_args()
+
+    startup_results = check_startup(args.budget, max(1, args.repeat))
+    print(f"{'comando':<20} {'tiempo (ms)':>12}  resultado")
+    for result in startup_results:
+        status = '; '.join(result['problems']) or 'OK'
+        print(f"{result['command']:<20} {result['ms']:>12.1f}  {status}")
+    if any(result['problems'] for result in startup_results):
+        raise SystemExit(1)
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+
+# Subdirectorio (dentro del directorio de salida) donde se guardan el manifiesto y los artefactos cacheados.
+BUILD_CACHE_DIRNAME = '.build_cache'
+# Se incrementa cuando cambia el formato del manifiesto o de los artefactos.
+BUILD_CACHE_VERSION = 1
+
+
+def _sha256_file(path, chunk_size=1 << 20):
+    """Calcula el hash SHA-256 del contenido de un archivo, leyéndolo por bloques."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildCache:
+    """
+    Caché de compilación incremental. Cada artefacto derivado (especificaciones de
+    gráficos, fragmentos HTML, el mapa) se guarda junto con una clave calculada a
+    partir del contenido de sus entradas; mientras las entradas no cambien, el
+    artefacto se reutiliza en lugar de volver a generarse.
+
+    Para no releer archivos grandes en cada ejecución, el hash de contenido de cada
+    archivo se reutiliza mientras su tamaño y fecha de modificación no cambien.
+    """
+
+    def __init__(self, cache_dir, code_paths=(), extra=None, enabled=True):
+        """
+        Args:
+            cache_dir (str): Directorio donde se guardan el manifiesto y los artefactos.
+            code_paths (iterable): Archivos de código cuyo cambio debe invalidar todos los artefactos.
+            extra (dict): Datos adicionales que forman parte de todas las claves (p. ej. versiones de librerías).
+            enabled (bool): Si es False, todos los artefactos se regeneran y no se escribe nada en disco.
+        """
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self.manifest_path = os.path.join(cache_dir, 'manifest.json')
+        self.hits = []
+        self.misses = []
+        self._manifest = {'version': BUILD_CACHE_VERSION, 'files': {}, 'artifacts': {}}
+        if enabled and os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+                if manifest.get('version') == BUILD_CACHE_VERSION:
+                    self._manifest = manifest
+            except (OSError, ValueError) as e:
+                print(f"Advertencia: No se pudo leer el manifiesto de la caché ({e}). Se regenerará todo.")
+        self._base_key = self.key_for(code_paths, extra=extra, include_base=False)
+
+    # --- Huellas de archivos ---
+
+    def fingerprint(self, path):
+        """
+        Devuelve la huella (hash SHA-256 del contenido) de un archivo, o 'missing' si no existe.
+
+        Args:
+            path (str): Ruta al archivo.
+
+        Returns:
+            str: La huella del archivo.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return 'missing'
+        entry = self._manifest['files'].get(path)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['sha256']
+        sha256 = _sha256_file(path)
+        self._manifest['files'][path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256}
+        return sha256
+
+    def key_for(self, paths, extra=None, include_base=True):
+        """
+        Calcula la clave de un artefacto a partir de las huellas de sus archivos de entrada.
+
+        Args:
+            paths (iterable): Archivos de entrada del artefacto.
+            extra: Parámetros adicionales serializables a JSON que afectan al resultado.
+            include_base (bool): Si incluye la clave común (código y versiones de librerías).
+
+        Returns:
+            str: La clave hexadecimal.
+        """
+        digest = hashlib.sha256()
+        if include_base:
+            digest.update(self._base_key.encode('utf-8'))
+        for path in paths:
+            digest.update(f'|{os.path.basename(path)}:{self.fingerprint(path)}'.encode('utf-8'))
+        if extra is not None:
+            digest.update(json.dumps(extra, sort_keys=True, default=str).encode('utf-8'))
+        return digest.hexdigest()
+
+    # --- Artefactos ---
+
+    def _artifact_path(self, name):
+        return os.path.join(self.cache_dir, f'{name}.json')
+
+    def get(self, name, key):
+        """
+        Devuelve el valor cacheado de un artefacto si su clave coincide y sus archivos de salida
+        siguen intactos; en caso contrario devuelve None.
+
+        Args:
+            name (str): Nombre del artefacto.
+            key (str): Clave calculada con key_for.
+
+        Returns:
+            El valor guardado con put, o None.
+        """
+        if not self.enabled:
+            return None
+        entry = self._manifest['artifacts'].get(name)
+        if not entry or entry['key'] != key:
+            return None
+        for path, fingerprint in entry.get('outputs', {}).items():
+            if self.fingerprint(path) != fingerprint:
+                return None
+        try:
+            with open(self._artifact_path(name), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, name, key, value, outputs=()):
+        """
+        Guarda el valor de un artefacto junto con su clave y las huellas de sus archivos de salida.
+
+        Args:
+            name (str): Nombre del artefacto.
+            key (str): Clave calculada con key_for.
+            value: Valor serializable a JSON.
+            outputs (iterable): Archivos escritos al generar el artefacto (p. ej. el HTML del mapa).
+        """
+        if not self.enabled:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f'{self._artifact_path(name)}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(value, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, self._artifact_path(name))
+        self._manifest['artifacts'][name] = {
+            'key': key,
+            'outputs': {path: self.fingerprint(path) for path in outputs},
+        }
+
+    def lookup(self, name, inputs, extra=None):
+        """
+        Calcula la clave de un artefacto y devuelve su valor cacheado, si existe.
+
+        Args:
+            name (str): Nombre del artefacto.
+            inputs (iterable): Archivos de entrada del artefacto.
+            extra: Parámetros adicionales que afectan al resultado.
+
+        Returns:
+            tuple: (clave, valor cacheado o None). Con la clave se puede llamar luego a put.
+        """
+        key = self.key_for(inputs, extra=extra)
+        value = self.get(name, key)
+        if value is not None:
+            self.hits.append(name)
+        else:
+            self.misses.append(name)
+        return key, value
+
+    def memo(self, name, inputs, builder, extra=None, outputs=()):
+        """
+        Devuelve el artefacto cacheado si sus entradas no cambiaron; si no, lo genera con `builder` y lo guarda.
+
+        Args:
+            name (str): Nombre del artefacto.
+            inputs (iterable): Archivos de entrada del artefacto.
+            builder (callable): Función sin argumentos que genera el valor (serializable a JSON).
+            extra: Parámetros adicionales que afectan al resultado.
+            outputs (iterable): Archivos que `builder` escribe como efecto secundario.
+
+        Returns:
+            El valor del artefacto.
+        """
+        key, value = self.lookup(name, inputs, extra=extra)
+        if value is not None:
+            return value
+        value = builder()
+        self.put(name, key, value, outputs=outputs)
+        return value
+
+    def save(self):
+        """Escribe el manifiesto en disco de forma atómica."""
+        if not self.enabled:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f'{self.manifest_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.manifest_path)
@@ -0,0 +1,404 @@
+import gzip
+import hashlib
+import os
+import re
+import shutil
+import urllib.parse
+import urllib.request
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se generan las versiones .gz.
+    brotli = None
+
+# Directorio (en la raíz del proyecto) con las copias locales de las librerías y fuentes externas.
+# Replica la estructura de las URL: 'vendor/<host>/<ruta>' (ver vendor_path).
+VENDOR_DIRNAME = 'vendor'
+# Subdirectorio (dentro del directorio de salida) donde se copian los recursos usados por el informe.
+BUNDLE_VENDOR_DIRNAME = 'vendor'
+
+# Recursos que Folium incluye por defecto pero que el mapa no usa (marcadores e íconos),
+# y que en el modo empaquetado se quitan en lugar de copiarse.
+UNUSED_MAP_ASSETS = (
+    'code.jquery.com/jquery-',
+    'cdn.jsdelivr.net/npm/bootstrap@',
+    'netdna.bootstrapcdn.com/bootstrap/',
+    'cdn.jsdelivr.net/npm/@fortawesome/',
+    'cdnjs.cloudflare.com/ajax/libs/Leaflet.awesome-markers/',
+    'cdn.jsdelivr.net/gh/python-visualization/folium/folium/templates/leaflet.awesome.rotate',
+)
+# Prefijo de las URL de Plotly: se reemplazan por la versión que trae el paquete de Python
+# (o por el paquete parcial 'basic' si está en el directorio de copias locales).
+PLOTLY_CDN_PREFIX = 'https://cdn.plot.ly/plotly-'
+# Formatos que ya están comprimidos y no ganan nada con gzip/brotli.
+PRECOMPRESSED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp', '.avif', '.gif', '.woff', '.woff2', '.gz', '.br', '.zip'}
+# Los archivos más chicos que esto no se comprimen (la cabecera anula la ganancia).
+MIN_COMPRESS_BYTES = 256
+# Agente de usuario para descargar las fuentes de Google Fonts en formato woff2.
+FETCH_USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+
+_SCRIPT_SRC_PATTERN = re.compile(r'<script\b[^>]*\bsrc="(https?://[^"]+)"[^>]*>\s*</script>\s*', re.I)
+_STYLESHEET_PATTERN = re.compile(r'<link\b[^>]*\bhref="(https?://[^"]+)"[^>]*>\s*', re.I)
+_CSS_URL_PATTERN = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+
+
+# --- Copias locales ---
+
+def plotly_version():
+    """Versión de plotly.js incluida en el paquete de Python instalado."""
+    from plotly.offline import get_plotlyjs_version
+    return get_plotlyjs_version()
+
+
+def vendor_path(url, vendor_dir):
+    """
+    Ruta de la copia local de una URL: '<vendor_dir>/<host>/<ruta>'. Si la URL tiene parámetros
+    (p. ej. la hoja de estilos de Google Fonts), se agrega su hash al nombre del archivo.
+
+    Args:
+        url (str): URL del recurso.
+        vendor_dir (str): Directorio de las copias locales.
+
+    Returns:
+        str: La ruta local.
+    """
+    parts = urllib.parse.urlsplit(url)
+    path = parts.path.lstrip('/') or 'index'
+    if parts.query:
+        stem, ext = os.path.splitext(path)
+        path = f'{stem}.{hashlib.sha256(parts.query.encode("utf-8")).hexdigest()[:8]}{ext or ".css"}'
+    return os.path.join(vendor_dir, parts.netloc, *path.split('/'))
+
+
+def _plotly_source(vendor_dir):
+    """Devuelve (ruta, nombre) del plotly.js a usar: el paquete parcial 'basic' si existe, o el completo."""
+    version = plotly_version()
+    basic = vendor_path(f'{PLOTLY_CDN_PREFIX}basic-{version}.min.js', vendor_dir)
+    if os.path.exists(basic):
+        return basic, f'plotly-basic-{version}.min.js'
+    import plotly
+    return os.path.join(os.path.dirname(plotly.__file__), 'package_data', 'plotly.min.js'), f'plotly-{version}.min.js'
+
+
+def _file_digest(path):
+    """Hash del contenido de un archivo (una copia está al día solo si su contenido es el mismo)."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+
+class _Localizer:
+    """Copia los recursos externos de un HTML al directorio de salida y reescribe sus referencias."""
+
+    def __init__(self, output_dir, vendor_dir):
+        self.output_dir = output_dir
+        self.vendor_dir = vendor_dir
+        self.target_dir = os.path.join(output_dir, BUNDLE_VENDOR_DIRNAME)
+        self.missing = []
+
+    def _copy(self, source, relative):
+        """Copia `source` a '<salida>/vendor/<relative>' si cambió y devuelve su URL relativa al HTML."""
+        target = os.path.join(self.target_dir, *relative.split('/'))
+        if not os.path.exists(target) or _file_digest(target) != _file_digest(source):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(source, target)
+        return f'{BUNDLE_VENDOR_DIRNAME}/{relative}'
+
+    def _relative(self, url):
+        return os.path.relpath(vendor_path(url, self.vendor_dir), self.vendor_dir).replace(os.sep, '/')
+
+    def script(self, url):
+        """URL local de un script, o None si no hay copia."""
+        if url.startswith(PLOTLY_CDN_PREFIX):
+            source, name = _plotly_source(self.vendor_dir)
+            return self._copy(source, name)
+        source = vendor_path(url, self.vendor_dir)
+        if not os.path.exists(source):
+            self.missing.append(url)
+            return None
+        return self._copy(source, self._relative(url))
+
+    def stylesheet(self, url):
+        """URL local de una hoja de estilos (con sus fuentes e imágenes), o None si no hay copia."""
+        source = vendor_path(url, self.vendor_dir)
+        if not os.path.exists(source):
+            self.missing.append(url)
+            return None
+        relative = self._relative(url)
+        with open(source, 'r', encoding='utf-8') as f:
+            css = f.read()
+
+        def localize(match):
+            reference = match.group(2)
+            if reference.startswith('data:'):
+                return match.group(0)
+            absolute = urllib.parse.urljoin(url, reference)
+            dependency = vendor_path(absolute, self.vendor_dir)
+            if not os.path.exists(dependency):
+                self.missing.append(absolute)
+                return f'url({absolute})'
+            copied = self._copy(dependency, self._relative(absolute))
+            # La referencia queda relativa a la hoja de estilos copiada.
+            depth = relative.count('/')
+            return f"url({'../' * depth}{copied[len(BUNDLE_VENDOR_DIRNAME) + 1:]})"
+
+        css = minify_css(_CSS_URL_PATTERN.sub(localize, css))
+        target = os.path.join(self.target_dir, *relative.split('/'))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'w', encoding='utf-8') as f:
+            f.write(css)
+        return f'{BUNDLE_VENDOR_DIRNAME}/{relative}'
+
+
+def localize_html(html, output_dir, vendor_dir):
+    """
+    Reemplaza los scripts y hojas de estilos externos de un HTML por copias locales dentro de
+    '<output_dir>/vendor'. Plotly se toma del paquete de Python; las librerías que el mapa no
+    usa se quitan; la fuente de Google Fonts se usa si está en las copias locales y, si no,
+    se quita (el CSS ya tiene 'sans-serif' como alternativa). Los demás recursos sin copia
+    local se dejan con su URL original y se informan con una advertencia.
+
+    Args:
+        html (str): El documento HTML.
+        output_dir (str): Directorio donde se guarda el HTML.
+        vendor_dir (str): Directorio de las copias locales (ver vendor_path).
+
+    Returns:
+        str: El HTML con las referencias reescritas.
+    """
+    localizer = _Localizer(output_dir, vendor_dir)
+
+    def replace_script(match):
+        url = match.group(1)
+        if any(prefix in url for prefix in UNUSED_MAP_ASSETS):
+            return ''
+        local = localizer.script(url)
+        return match.group(0).replace(url, local) if local else match.group(0)
+
+    def replace_stylesheet(match):
+        url = match.group(1)
+        tag = match.group(0)
+        if 'stylesheet' not in tag:
+            return tag
+        if any(prefix in url for prefix in UNUSED_MAP_ASSETS):
+            return ''
+        local = localizer.stylesheet(url)
+        if local is None and 'fonts.googleapis.com' in url:
+            localizer.missing.remove(url)
+            return ''
+        return tag.replace(url, local) if local else tag
+
+    html = _SCRIPT_SRC_PATTERN.sub(replace_script, html)
+    html = _STYLESHEET_PATTERN.sub(replace_stylesheet, html)
+    for url in dict.fromkeys(localizer.missing):
+        print(f"Advertencia: No hay copia local de {url} (se deja la URL original; ver 'python bundle.py --fetch').")
+    return html
+
+
+# --- Minificación ---
+
+def minify_css(css):
+    """Quita comentarios y espacios innecesarios de una hoja de estilos."""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    return css.replace(';}', '}').strip()
+
+
+def minify_js(js):
+    """
+    Minificación conservadora de JavaScript: quita la indentación, las líneas vacías y las
+    líneas que son solo un comentario. Conserva los saltos de línea, así que no depende de
+    los punto y coma ni cambia el significado del código.
+    """
+    lines = (line.strip() for line in js.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//'))
+
+
+def minify_html(html):
+    """
+    Minifica un documento HTML: colapsa los espacios entre etiquetas, quita los comentarios
+    y minifica los bloques <style> y <script> (los de datos JSON se dejan tal cual).
+
+    Args:
+        html (str): El documento HTML.
+
+    Returns:
+        str: El HTML minificado.
+    """
+    parts = re.split(r'(<script\b[^>]*>.*?</script>|<style\b[^>]*>.*?</style>|<pre\b[^>]*>.*?</pre>|'
+                     r'<textarea\b[^>]*>.*?</textarea>)', html, flags=re.S | re.I)
+    result = []
+    for i, part in enumerate(parts):
+        if i % 2 == 0:
+            part = re.sub(r'<!--(?!\[if).*?-->', '', part, flags=re.S)
+            result.append(re.sub(r'\s+', ' ', part))
+            continue
+        open_end = part.index('>') + 1
+        close_start = part.rindex('<')
+        opening, body, closing = part[:open_end], part[open_end:close_start], part[close_start:]
+        lowered = opening.lower()
+        if lowered.startswith('<style'):
+            body = minify_css(body)
+        elif lowered.startswith('<script') and 'application/json' not in lowered:
+            body = minify_js(body)
+        result.append(opening + body + closing)
+    return ''.join(result).strip()
+
+
+def bundle_html(html, output_dir, vendor_dir):
+    """Prepara un HTML para el modo empaquetado: recursos locales (localize_html) y minificación."""
+    return minify_html(localize_html(html, output_dir, vendor_dir))
+
+
+# --- Compresión previa ---
+
+def _write_if_changed(path, data):
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    with open(path, 'wb') as f:
+        f.write(data)
+    return True
+
+
+def _compressed_matches(path, data):
+    """Indica si la versión comprimida `path` ('.gz' o '.br') contiene exactamente `data`."""
+    try:
+        with open(path, 'rb') as f:
+            compressed = f.read()
+        if path.endswith('.gz'):
+            return gzip.decompress(compressed) == data
+        return brotli is not None and brotli.decompress(compressed) == data
+    except Exception:
+        # Un archivo ilegible o corrupto se trata como desactualizado.
+        return False
+
+
+def precompress_tree(output_dir, compress=True):
+    """
+    Escribe versiones comprimidas ('.gz' y, si está instalado el módulo brotli, '.br') junto a
+    cada archivo del directorio de salida, para que un servidor estático pueda servirlas sin
+    comprimir en cada petición. Se omiten los directorios ocultos (cachés), los formatos ya
+    comprimidos y los archivos muy chicos; se eliminan las versiones comprimidas cuyo archivo
+    original ya no existe. La compresión es determinística (sin fecha en la cabecera gzip).
+
+    Con `compress` en False (informes no empaquetados) no se escribe nada: solo se eliminan las
+    versiones comprimidas huérfanas o que ya no corresponden a su original, para que un servidor
+    que prefiere los archivos precomprimidos no siga enviando un informe anterior.
+
+    Args:
+        output_dir (str): Directorio de salida.
+        compress (bool): Si es False, solo se eliminan las versiones comprimidas desactualizadas.
+
+    Returns:
+        dict: {'files': archivos procesados, 'written': versiones comprimidas reescritas,
+        'removed': versiones comprimidas eliminadas, 'bytes': tamaño original total,
+        'gzip_bytes' y 'brotli_bytes': tamaños comprimidos}.
+    """
+    stats = {'files': 0, 'written': 0, 'removed': 0, 'bytes': 0, 'gzip_bytes': 0, 'brotli_bytes': 0}
+    for dirpath, dirnames, filenames in os.walk(output_dir):
+        dirnames[:] = sorted(name for name in dirnames if not name.startswith('.'))
+        present = set(filenames)
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            stem, ext = os.path.splitext(filename)
+            if ext in ('.gz', '.br'):
+                if stem not in present:
+                    os.remove(path)
+                    stats['removed'] += 1
+                continue
+            if not compress:
+                siblings = [path + suffix for suffix in ('.gz', '.br') if filename + suffix in present]
+                if siblings:
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                    for sibling in siblings:
+                        if not _compressed_matches(sibling, data):
+                            os.remove(sibling)
+                            stats['removed'] += 1
+                continue
+            if ext.lower() in PRECOMPRESSED_EXTENSIONS or os.path.getsize(path) < MIN_COMPRESS_BYTES:
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+            stats['files'] += 1
+            stats['bytes'] += len(data)
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            stats['gzip_bytes'] += len(compressed)
+            stats['written'] += _write_if_changed(path + '.gz', compressed)
+            if brotli is not None:
+                compressed = brotli.compress(data, quality=11)
+                stats['brotli_bytes'] += len(compressed)
+                stats['written'] += _write_if_changed(path + '.br', compressed)
+    return stats
+
+
+# --- Descarga de las copias locales ---
+
+def _download(url, path):
+    request = urllib.request.Request(url, headers={'User-Agent': FETCH_USER_AGENT})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        data = response.read()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return data
+
+
+def fetch_vendor_assets(html_paths, vendor_dir):
+    """
+    Descarga (con conexión a internet) las librerías, hojas de estilos y fuentes que usan los
+    HTML indicados, más el paquete parcial 'basic' de plotly.js (trazas de barras, líneas y
+    tortas), y las guarda en `vendor_dir` para poder generar el modo empaquetado sin conexión.
+
+    Args:
+        html_paths (list): HTML generados sin empaquetar (con las URL originales).
+        vendor_dir (str): Directorio de las copias locales.
+    """
+    urls = [f'{PLOTLY_CDN_PREFIX}basic-{plotly_version()}.min.js']
+    for html_path in html_paths:
+        with open(html_path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        urls += [url for url in _SCRIPT_SRC_PATTERN.findall(html) + _STYLESHEET_PATTERN.findall(html)
+                 if not url.startswith(PLOTLY_CDN_PREFIX) and not any(prefix in url for prefix in UNUSED_MAP_ASSETS)]
+    pending = list(dict.fromkeys(urls))
+    while pending:
+        url = pending.pop(0)
+        path = vendor_path(url, vendor_dir)
+        if os.path.exists(path):
+            continue
+        try:
+            data = _download(url, path)
+        except OSError as e:
+            print(f"Error al descargar {url}: {e}")
+            continue
+        print(f"Descargado: {url}")
+        if path.endswith('.css'):
+            # Las hojas de estilos referencian fuentes e imágenes que también hacen falta.
+            for _, reference in _CSS_URL_PATTERN.findall(data.decode('utf-8', 'replace')):
+                if not reference.startswith('data:'):
+                    pending.append(urllib.parse.urljoin(url, reference))
+
+
+# --- Ejecución del script ---
+if __name__ == '__main__':
+    import argparse
+    import glob
+
+    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description='Prepara las copias locales usadas por el modo empaquetado (--bundle).')
+    parser.add_argument('--fetch', nargs='*', metavar='HTML',
+                        help='Descarga los recursos externos de los HTML indicados (por defecto, los de output/).')
+    args = parser.parse_args()
+    vendor = os.path.join(BASE_DIR, VENDOR_DIRNAME)
+    if args.fetch is not None:
+        fetch_vendor_assets(args.fetch or sorted(glob.glob(os.path.join(BASE_DIR, 'output', '*.html'))), vendor)
+    else:
+        parser.print_help()
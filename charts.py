@@ -0,0 +1,102 @@
+import functools
+import json
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+# Paleta usada por todos los gráficos del informe (la misma que color_discrete_sequence en px.bar).
+CHART_COLORS = px.colors.qualitative.D3
+
+
+@functools.lru_cache(maxsize=1)
+def default_template():
+    """
+    Devuelve la plantilla por defecto de Plotly serializada a JSON (la misma que usan las figuras de px).
+    Todas las figuras generadas aquí comparten el mismo objeto, por lo que el payload la guarda una única vez.
+
+    Returns:
+        dict: La plantilla, compartida entre llamadas.
+    """
+    return json.loads(go.Figure().to_json())['layout'].get('template', {})
+
+
+# --- Gráficos por localidad ---
+
+def _bar_trace(candidate, votes, color):
+    """Traza de barras liviana (dict con el esquema de graph_objects.Bar) para un candidato."""
+    return {
+        'type': 'bar',
+        'name': candidate,
+        'x': [candidate],
+        'y': [votes],
+        'text': [votes],
+        'marker': {'color': color, 'opacity': 0.7},
+        'textposition': 'outside',
+        'textangle': 0,
+        'textfont': {'color': 'black', 'size': 12},
+        'hovertemplate': '%{x}<br>Cantidad de Votos=%{y}<extra></extra>',
+    }
+
+
+def build_locality_figures(df_localidades, candidate_cols, locality_col='Localidad'):
+    """
+    Genera las especificaciones de los gráficos por localidad en un solo paso.
+
+    La tabla se reorganiza una única vez en una matriz de votos (localidades × candidatos)
+    y cada gráfico se arma directamente con trazas de barras livianas a partir de sus filas,
+    sin filtrar el DataFrame por localidad ni pasar por plotly.express. El costo por
+    localidad es constante, por lo que escala a miles de unidades (localidades, circuitos o mesas).
+
+    El layout común (PLOTLY_LAYOUT_CONFIG) no se repite en cada figura: lo aporta
+    PlotlyPayloadBuilder (ver plotly_payload.py) al armar el payload del informe.
+
+    Args:
+        df_localidades (pd.DataFrame): Tabla con una fila por localidad y una columna de votos por candidato.
+            Las filas repetidas de una misma localidad se suman.
+        candidate_cols (list): Columnas de votos, en el orden en que se muestran los candidatos.
+        locality_col (str): Nombre de la columna con el nombre de la localidad.
+
+    Returns:
+        list: Lista de tuplas (nombre de la localidad, especificación de la figura o None si no hay votos válidos),
+        en el orden de aparición de las localidades.
+    """
+    grouped = df_localidades.groupby(locality_col, sort=False)[candidate_cols].sum()
+    return locality_figures_from_matrix(grouped.index.tolist(), grouped.to_numpy(dtype=np.int64), candidate_cols)
+
+
+def locality_figures_from_matrix(names, votes, candidate_cols):
+    """
+    Igual que build_locality_figures, pero a partir de una matriz de votos ya agregada
+    (una fila por localidad), p. ej. una tabla del cubo de resultados (ver cube.py).
+
+    Args:
+        names (list): Nombres de las localidades, uno por fila de `votes`.
+        votes (np.ndarray): Matriz de enteros de forma (localidades, candidatos).
+        candidate_cols (list): Nombres de los candidatos, uno por columna de `votes`.
+
+    Returns:
+        list: Lista de tuplas (nombre de la localidad, especificación de la figura o None).
+    """
+    votes = np.asarray(votes, dtype=np.int64)
+    totals = votes.sum(axis=1)
+    colors = [CHART_COLORS[i % len(CHART_COLORS)] for i in range(len(candidate_cols))]
+    template = default_template()
+
+    figures = []
+    for name, row, total in zip(names, votes.tolist(), totals.tolist()):
+        if total <= 0:
+            figures.append((name, None))
+            continue
+        figures.append((name, {
+            'data': [_bar_trace(candidate, value, color) for candidate, value, color in zip(candidate_cols, row, colors)],
+            'layout': {
+                'template': template,
+                'title': {'text': f'Resultados Electorales en {name}'},
+                'barmode': 'relative',
+                'xaxis': {'title': {'text': ''}, 'categoryorder': 'array', 'categoryarray': list(candidate_cols)},
+                'yaxis': {'title': {'text': 'Cantidad de Votos'}},
+                'legend': {'title': {'text': ''}, 'tracegroupgap': 0},
+            },
+        }))
+    return figures
@@ -0,0 +1,291 @@
+from collections import namedtuple
+
+import numpy as np
+
+from datasets import KEY_COLUMNS, load_dataset
+from ingest import CARGO_GOBERNADOR, CARGO_PRESIDENTE, normalize_name
+
+# Niveles territoriales, de menor a mayor: cada localidad pertenece a un departamento y todos a la zona.
+LEVELS = ('localidad', 'departamento', 'zona')
+# Nombre de la única unidad del nivel 'zona'.
+ZONE_NAME = 'Zona Norte'
+
+# Vista de un cargo en un nivel: nombres de las unidades y de los candidatos (en el orden de la fuente),
+# matriz de votos (unidades × candidatos) y columnas adicionales por unidad (p. ej. 'Escrutado (%)').
+CubeTable = namedtuple('CubeTable', ['units', 'candidates', 'votes', 'extras'])
+
+
+class ResultsCube:
+    """
+    Cubo de resultados en memoria: los votos de todos los cargos se guardan en un arreglo de
+    NumPy por nivel territorial, indexado por cargo × candidato × unidad, junto con los
+    totales por unidad y las sumas hacia el nivel superior (localidad → departamento → zona).
+    Todo se calcula una sola vez al armar el cubo; cada consulta posterior es un índice sobre
+    esos arreglos, sin recorrer tablas de pandas.
+
+    Cada fuente (un CSV de un cargo en un nivel) conserva el orden de sus unidades y
+    candidatos y los nombres tal como aparecen en ella, así que los gráficos armados desde el
+    cubo son los mismos que los armados desde cada CSV. Las unidades se identifican por su
+    nombre normalizado (sin mayúsculas ni acentos): 'ñorquin' y 'Ñorquín' son la misma.
+    """
+
+    def __init__(self, cargos=(CARGO_GOBERNADOR, CARGO_PRESIDENTE)):
+        """
+        Args:
+            cargos (iterable): Cargos del cubo (primer eje de los arreglos de votos).
+        """
+        self.cargos = list(cargos)
+        self._cargo_index = {cargo: i for i, cargo in enumerate(self.cargos)}
+        self.candidates = {cargo: [] for cargo in self.cargos}
+        self._candidate_index = {cargo: {} for cargo in self.cargos}
+        self.units = {level: [] for level in LEVELS}
+        self._unit_index = {level: {} for level in LEVELS}
+        # Índice de la unidad superior de cada unidad (-1 si no se conoce).
+        self._parents = {level: {} for level in LEVELS[:-1]}
+        self._sources = {}  # (cargo, nivel) -> (unidades, candidatos, etiquetas, matriz, columnas adicionales)
+        self._views = {}  # (cargo, nivel, suma) -> (unidades, candidatos, etiquetas) de cada vista disponible
+        self._present = {}  # (cargo, nivel, suma) -> máscara de las unidades del nivel presentes en la vista
+        self.votes = {}  # nivel -> arreglo (cargos, candidatos, unidades) con los votos de las fuentes
+        self.rollups = {}  # nivel -> arreglo (cargos, candidatos, unidades) con la suma del nivel inferior
+        self.totals = {}  # (nivel, suma) -> arreglo (cargos, unidades) con el total de votos por unidad
+
+    # --- Carga ---
+
+    def _unit(self, level, name):
+        key = normalize_name(name)
+        index = self._unit_index[level].get(key)
+        if index is None:
+            index = self._unit_index[level][key] = len(self.units[level])
+            self.units[level].append(str(name).strip())
+        return index
+
+    def _candidate(self, cargo, name):
+        index = self._candidate_index[cargo].get(name)
+        if index is None:
+            index = self._candidate_index[cargo][name] = len(self.candidates[cargo])
+            self.candidates[cargo].append(name)
+        return index
+
+    def add_source(self, cargo, level, unit_names, candidate_names, votes, parents=None, extras=None):
+        """
+        Agrega los votos de un cargo en un nivel. Las filas repetidas de una misma unidad se suman.
+
+        Args:
+            cargo (str): Cargo (uno de `cargos`).
+            level (str): Nivel territorial (uno de LEVELS).
+            unit_names (list): Nombre de la unidad de cada fila de `votes`.
+            candidate_names (list): Nombre del candidato de cada columna de `votes`.
+            votes (np.ndarray): Matriz de votos de forma (filas, candidatos).
+            parents (list): Nombre de la unidad superior de cada fila (p. ej. el departamento de cada localidad).
+            extras (dict): Columnas adicionales (nombre -> valores por fila); se conserva el primer valor de cada unidad.
+
+        Raises:
+            ValueError: Si el cargo o el nivel no existen, o la fuente ya fue agregada.
+        """
+        if cargo not in self._cargo_index or level not in LEVELS:
+            raise ValueError(f"cargo o nivel desconocido: {cargo} / {level}")
+        if (cargo, level) in self._sources:
+            raise ValueError(f"ya se cargaron los votos de {cargo} por {level}")
+        row_units = np.array([self._unit(level, name) for name in unit_names], dtype=np.int64)
+        unit_order, first_row, codes = np.unique(row_units, return_index=True, return_inverse=True)
+        # np.unique ordena; se recupera el orden de aparición de la fuente.
+        appearance = np.argsort(first_row, kind='stable')
+        rank = np.empty_like(appearance)
+        rank[appearance] = np.arange(len(appearance))
+        unit_order, first_row, codes = unit_order[appearance], first_row[appearance], rank[codes.ravel()]
+
+        matrix = np.zeros((len(unit_order), len(candidate_names)), dtype=np.int64)
+        np.add.at(matrix, codes, np.asarray(votes, dtype=np.int64).reshape(len(row_units), len(candidate_names)))
+        candidate_order = np.array([self._candidate(cargo, name) for name in candidate_names], dtype=np.int64)
+        labels = [str(unit_names[i]).strip() for i in first_row]
+        if parents is not None and level != LEVELS[-1]:
+            parent_level = LEVELS[LEVELS.index(level) + 1]
+            for unit, row in zip(unit_order.tolist(), first_row.tolist()):
+                self._parents[level][unit] = self._unit(parent_level, parents[row])
+        extras = {name: np.asarray(values)[first_row] for name, values in (extras or {}).items()}
+        self._sources[(cargo, level)] = (unit_order, candidate_order, labels, matrix, extras)
+
+    def finalize(self):
+        """
+        Arma los arreglos densos de votos, las sumas hacia los niveles superiores y los totales.
+        Debe llamarse después de agregar todas las fuentes.
+
+        Returns:
+            ResultsCube: El mismo cubo, para encadenar llamadas.
+        """
+        self._unit(LEVELS[-1], ZONE_NAME)
+        n_candidates = max([len(names) for names in self.candidates.values()] + [0])
+        shape = (len(self.cargos), n_candidates)
+        for level in LEVELS:
+            self.votes[level] = np.zeros(shape + (len(self.units[level]),), dtype=np.int64)
+            self.rollups[level] = np.zeros_like(self.votes[level])
+        for (cargo, level), (unit_order, candidate_order, labels, matrix, _) in self._sources.items():
+            self.votes[level][self._cargo_index[cargo]][np.ix_(candidate_order, unit_order)] = matrix.T
+            self._set_view((cargo, level, False), unit_order, candidate_order, labels)
+
+        # Suma cada nivel hacia el superior, a partir de la fuente del nivel (o de su propia suma si no hay fuente).
+        for child, level in zip(LEVELS, LEVELS[1:]):
+            if level == LEVELS[-1]:
+                parent_of = np.zeros(len(self.units[child]), dtype=np.int64)
+            else:
+                parent_of = np.array([self._parents[child].get(unit, -1) for unit in range(len(self.units[child]))],
+                                     dtype=np.int64)
+            for cargo in self.cargos:
+                view = self._views.get((cargo, child, False)) or self._views.get((cargo, child, True))
+                if view is None:
+                    continue
+                unit_order, candidate_order, _ = view
+                source = self.votes if (cargo, child, False) in self._views else self.rollups
+                ci = self._cargo_index[cargo]
+                known = unit_order[parent_of[unit_order] >= 0]
+                np.add.at(self.rollups[level][ci].T, parent_of[known], source[child][ci].T[known])
+                parent_order = np.array(list(dict.fromkeys(parent_of[known].tolist())), dtype=np.int64)
+                self._set_view((cargo, level, True), parent_order, candidate_order,
+                               [self.units[level][unit] for unit in parent_order])
+
+        for level in LEVELS:
+            self.totals[(level, False)] = self.votes[level].sum(axis=1)
+            self.totals[(level, True)] = self.rollups[level].sum(axis=1)
+        return self
+
+    def _set_view(self, key, unit_order, candidate_order, labels):
+        self._views[key] = (unit_order, candidate_order, labels)
+        present = np.zeros(len(self.units[key[1]]), dtype=bool)
+        present[unit_order] = True
+        self._present[key] = present
+
+    # --- Consultas ---
+
+    def has(self, cargo, level, rollup=False):
+        """Devuelve True si hay votos de `cargo` en `level` (de una fuente o, con `rollup`, sumados)."""
+        return (cargo, level, rollup) in self._views
+
+    def _view(self, cargo, level, rollup):
+        # Sin fuente propia, el nivel se sirve desde la suma del nivel inferior.
+        key = (cargo, level, rollup)
+        if key not in self._views and not rollup:
+            key = (cargo, level, True)
+        if key not in self._views:
+            raise KeyError(f"no hay votos de {cargo} por {level}")
+        return key[2], self._views[key]
+
+    def table(self, cargo, level, rollup=False):
+        """
+        Devuelve la vista de un cargo en un nivel, en el orden de su fuente.
+
+        Args:
+            cargo (str): Cargo.
+            level (str): Nivel territorial.
+            rollup (bool): Si es True, usa la suma del nivel inferior aunque el nivel tenga fuente propia.
+
+        Returns:
+            CubeTable: Unidades, candidatos, matriz de votos (unidades × candidatos) y columnas adicionales.
+
+        Raises:
+            KeyError: Si no hay votos de ese cargo en ese nivel.
+        """
+        summed, (unit_order, candidate_order, labels) = self._view(cargo, level, rollup)
+        source = self.rollups if summed else self.votes
+        votes = source[level][self._cargo_index[cargo]][np.ix_(candidate_order, unit_order)].T
+        extras = {} if summed else self._sources[(cargo, level)][4]
+        return CubeTable(labels, [self.candidates[cargo][i] for i in candidate_order], votes, extras)
+
+    def unit_votes(self, cargo, level, name, rollup=False):
+        """
+        Devuelve los votos por candidato de una unidad.
+
+        Returns:
+            dict or None: {candidato: votos} en el orden de la fuente, o None si la unidad no tiene votos del cargo.
+        """
+        summed, (_, candidate_order, _) = self._view(cargo, level, rollup)
+        unit = self._unit_index[level].get(normalize_name(name))
+        if unit is None or not self._present[(cargo, level, summed)][unit]:
+            return None
+        source = self.rollups if summed else self.votes
+        column = source[level][self._cargo_index[cargo], :, unit]
+        return {self.candidates[cargo][i]: int(column[i]) for i in candidate_order.tolist()}
+
+    def unit_total(self, cargo, level, name, rollup=False):
+        """Devuelve el total de votos de una unidad (0 si no tiene votos del cargo)."""
+        summed, _ = self._view(cargo, level, rollup)
+        unit = self._unit_index[level].get(normalize_name(name))
+        return 0 if unit is None else int(self.totals[(level, summed)][self._cargo_index[cargo], unit])
+
+    def unit_label(self, level, name, cargo=None):
+        """
+        Devuelve el nombre de una unidad tal como aparece en la fuente de `cargo` (por defecto,
+        en la primera fuente que la nombró), o None si la unidad no existe.
+        """
+        unit = self._unit_index[level].get(normalize_name(name))
+        if unit is None:
+            return None
+        if (cargo, level, False) in self._views:
+            unit_order, _, labels = self._views[(cargo, level, False)]
+            position = np.flatnonzero(unit_order == unit)
+            if len(position):
+                return labels[position[0]]
+        return self.units[level][unit]
+
+    def parent(self, level, name):
+        """Devuelve el nombre de la unidad superior de una unidad, o None si no se conoce."""
+        if level == LEVELS[-1]:
+            return None
+        if level == LEVELS[-2]:
+            return ZONE_NAME
+        unit = self._unit_index[level].get(normalize_name(name))
+        parent = self._parents[level].get(unit, -1)
+        return self.units[LEVELS[LEVELS.index(level) + 1]][parent] if parent >= 0 else None
+
+
+# --- Armado desde los CSV del informe ---
+
+def build_results_cube(departamentos=None, localidades=None, presidente=None, presidente_candidates=None):
+    """
+    Arma el cubo a partir de las tablas tipadas de los CSV del informe (ver datasets.py).
+
+    Args:
+        departamentos (pd.DataFrame): Gobernador, candidato × departamento (formato de 'departamentos.csv').
+        localidades (pd.DataFrame): Gobernador por localidad, con la columna 'Departamento'.
+        presidente (pd.DataFrame): Presidente por departamento, con votos en blanco, participación, etc.
+        presidente_candidates (list): Columnas de candidatos de `presidente`, en el orden de los gráficos.
+            Las demás columnas numéricas se guardan como columnas adicionales. Por defecto, todas
+            las columnas de conteos que no empiezan con 'Votos '.
+
+    Returns:
+        ResultsCube: El cubo ya armado.
+    """
+    cube = ResultsCube()
+    if departamentos is not None:
+        units = [name for name in departamentos.columns if name != 'Candidato']
+        cube.add_source(CARGO_GOBERNADOR, 'departamento', units,
+                        [str(name) for name in departamentos['Candidato'].tolist()],
+                        departamentos[units].to_numpy(dtype=np.int64).T)
+    if localidades is not None:
+        candidates = [name for name in localidades.columns if name not in KEY_COLUMNS]
+        parents = localidades['Departamento'].tolist() if 'Departamento' in localidades.columns else None
+        cube.add_source(CARGO_GOBERNADOR, 'localidad', localidades['Localidad'].tolist(), candidates,
+                        localidades[candidates].to_numpy(dtype=np.int64), parents=parents)
+    if presidente is not None:
+        numeric = [name for name in presidente.columns if name not in KEY_COLUMNS]
+        if presidente_candidates is None:
+            candidates = [name for name in numeric if not name.startswith('Votos ') and presidente[name].dtype.kind == 'i']
+        else:
+            candidates = [name for name in presidente_candidates if name in presidente.columns]
+        cube.add_source(CARGO_PRESIDENTE, 'departamento', presidente['Departamento'].tolist(), candidates,
+                        presidente[candidates].to_numpy(dtype=np.int64),
+                        extras={name: presidente[name].to_numpy() for name in numeric if name not in candidates})
+    return cube.finalize()
+
+
+def load_results_cube(departamentos_path=None, localidades_path=None, presidente_path=None, presidente_candidates=None):
+    """
+    Carga los CSV indicados (los que no se indican o no se pueden leer se omiten) y arma el cubo.
+
+    Returns:
+        ResultsCube: El cubo ya armado.
+    """
+    def load(path):
+        return load_dataset(path) if path is not None else None
+
+    return build_results_cube(load(departamentos_path), load(localidades_path), load(presidente_path),
+                              presidente_candidates=presidente_candidates)
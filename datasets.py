@@ -0,0 +1,285 @@
+import csv
+import hashlib
+import json
+import os
+import re
+import shutil
+
+from instrumentation import span
+
+# numpy y pandas se importan en las funciones que los usan: validar los CSV (ver validation.py)
+# solo necesita las reglas de formato de este módulo y no debe pagar el costo de importarlos.
+
+# Subdirectorio, junto a cada CSV, donde se guarda su versión tipada y columnar.
+DATASET_CACHE_DIRNAME = '.datasets'
+# Se incrementa cuando cambian las reglas de conversión o el formato guardado.
+DATASET_SCHEMA_VERSION = 1
+# Subdirectorio (dentro del directorio de salida) donde se escriben los CSV recortados a una región.
+REGION_DIRNAME = '.region'
+
+# Columnas de texto que identifican filas (se guardan como categóricas).
+KEY_COLUMNS = ['Candidato', 'Departamento', 'Localidad']
+# Sufijo que reciben las columnas de porcentajes (p. ej. 'Escrutado' -> 'Escrutado (%)').
+PERCENT_SUFFIX = ' (%)'
+
+# Valores que representan cero votos (celdas vacías o con guion).
+_ZERO_VALUES = {'', '-'}
+# Enteros, con o sin '.' como separador de miles (formato '1.574').
+_INT_PATTERN = re.compile(r'^\d+$|^\d{1,3}(\.\d{3})+$')
+# Porcentajes con ',' decimal (formato '9,40%').
+_PERCENT_PATTERN = re.compile(r'^\d+(,\d+)?%$')
+
+
+# --- Conversión de columnas ---
+
+def _parse_int_column(values):
+    """Convierte una columna de conteos ('1.574', '-', '') a int32. Devuelve None si no son conteos."""
+    import numpy as np
+    stripped = [value.strip() for value in values]
+    if not all(value in _ZERO_VALUES or _INT_PATTERN.match(value) for value in stripped):
+        return None
+    parsed = np.array([int(value.replace('.', '')) if value not in _ZERO_VALUES else 0 for value in stripped],
+                      dtype=np.int64)
+    if parsed.size and parsed.max() > np.iinfo(np.int32).max:
+        raise ValueError('conteo fuera del rango de int32')
+    return parsed.astype(np.int32)
+
+
+def _parse_percent_column(values):
+    """Convierte una columna de porcentajes ('9,40%') a float64 (9.4). Devuelve None si no son porcentajes."""
+    import numpy as np
+    stripped = [value.strip() for value in values]
+    if not stripped or not all(_PERCENT_PATTERN.match(value) for value in stripped):
+        return None
+    return np.array([float(value[:-1].replace(',', '.')) for value in stripped], dtype=np.float64)
+
+
+def _unique_names(names):
+    """Quita espacios y vuelve únicos los nombres de columna repetidos agregando ' (2)', ' (3)', etc."""
+    seen = {}
+    unique = []
+    for name in names:
+        name = name.strip()
+        count = seen.get(name, 0) + 1
+        seen[name] = count
+        unique.append(name if count == 1 else f'{name} ({count})')
+    return unique
+
+
+def parse_election_csv(path):
+    """
+    Lee un CSV electoral del proyecto (departamentos, localidades o presidente) y lo
+    normaliza a un esquema estricto:
+
+    - Las columnas de KEY_COLUMNS se convierten a categóricas (en orden de aparición).
+    - Los conteos pasan a int32: '-' y las celdas vacías valen 0 y '1.574' vale 1574.
+    - Los porcentajes ('9,40%') pasan a float64 (9.4) y su columna recibe el sufijo ' (%)'.
+    - Los nombres de columna repetidos (p. ej. 'Votos Anulados') se vuelven únicos.
+
+    Args:
+        path (str): Ruta al CSV.
+
+    Returns:
+        pd.DataFrame: La tabla tipada.
+
+    Raises:
+        ValueError: Si una columna no es clave, conteo ni porcentaje.
+    """
+    import pandas as pd
+
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        rows = [row for row in reader if any(cell.strip() for cell in row)]
+    if any(len(row) != len(header) for row in rows):
+        raise ValueError(f'filas con una cantidad de columnas distinta a la del encabezado en {path}')
+    raw_columns = list(zip(*rows)) if rows else [()] * len(header)
+
+    columns = {}
+    names = []
+    for raw_name, values in zip(header, raw_columns):
+        name = raw_name.strip()
+        if name in KEY_COLUMNS:
+            stripped = [value.strip() for value in values]
+            column = pd.Categorical(stripped, categories=list(dict.fromkeys(stripped)))
+        else:
+            column = _parse_int_column(values)
+            if column is None:
+                column = _parse_percent_column(values)
+                if column is None:
+                    raise ValueError(f"la columna '{name}' de {path} no contiene conteos ni porcentajes")
+                if not name.endswith(PERCENT_SUFFIX):
+                    name += PERCENT_SUFFIX
+        names.append(name)
+        columns[len(names) - 1] = column
+    names = _unique_names(names)
+    return pd.DataFrame({name: columns[i] for i, name in enumerate(names)})
+
+
+# --- Almacenamiento columnar ---
+
+def _source_key(path):
+    """Clave de la versión tipada: hash del contenido del CSV y versión del esquema."""
+    digest = hashlib.sha256(f'v{DATASET_SCHEMA_VERSION}|'.encode('utf-8'))
+    with open(path, 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def save_columnar(df, dataset_dir):
+    """
+    Guarda una tabla tipada como un archivo .npy por columna más 'schema.json'.
+    Las categóricas se guardan como códigos enteros y sus categorías van en el esquema.
+    El directorio se escribe aparte y se renombra al final, de modo que nunca queda a medio escribir.
+
+    Args:
+        df (pd.DataFrame): Tabla devuelta por parse_election_csv.
+        dataset_dir (str): Directorio de destino.
+    """
+    import numpy as np
+    import pandas as pd
+
+    tmp_dir = f'{dataset_dir}.tmp{os.getpid()}'
+    os.makedirs(tmp_dir, exist_ok=True)
+    schema = {'version': DATASET_SCHEMA_VERSION, 'rows': len(df), 'columns': []}
+    for i, name in enumerate(df.columns):
+        column = df[name]
+        filename = f'{i:03d}.npy'
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            np.save(os.path.join(tmp_dir, filename), column.cat.codes.to_numpy())
+            schema['columns'].append({'name': name, 'dtype': 'category', 'file': filename,
+                                      'categories': column.cat.categories.tolist()})
+        else:
+            np.save(os.path.join(tmp_dir, filename), column.to_numpy())
+            schema['columns'].append({'name': name, 'dtype': str(column.dtype), 'file': filename})
+    with open(os.path.join(tmp_dir, 'schema.json'), 'w', encoding='utf-8') as f:
+        json.dump(schema, f, ensure_ascii=False, indent=1)
+    try:
+        os.replace(tmp_dir, dataset_dir)
+    except OSError:
+        # Otro proceso ya guardó la misma versión.
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def load_columnar(dataset_dir):
+    """
+    Carga una tabla guardada con save_columnar. Las columnas numéricas se abren con
+    memmap, sin copiar ni volver a interpretar el texto del CSV.
+
+    Args:
+        dataset_dir (str): Directorio de la tabla.
+
+    Returns:
+        pd.DataFrame: La tabla tipada.
+    """
+    import numpy as np
+    import pandas as pd
+
+    with open(os.path.join(dataset_dir, 'schema.json'), 'r', encoding='utf-8') as f:
+        schema = json.load(f)
+    if schema.get('version') != DATASET_SCHEMA_VERSION:
+        raise ValueError(f'versión de esquema no soportada en {dataset_dir}')
+    data = {}
+    for column in schema['columns']:
+        values = np.load(os.path.join(dataset_dir, column['file']), mmap_mode='r')
+        if column['dtype'] == 'category':
+            data[column['name']] = pd.Categorical.from_codes(np.asarray(values), categories=column['categories'])
+        else:
+            data[column['name']] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def typed_dataset_path(path):
+    """Devuelve el directorio de la versión tipada del CSV (junto al CSV, en DATASET_CACHE_DIRNAME)."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(os.path.dirname(path), DATASET_CACHE_DIRNAME, f'{stem}.{_source_key(path)}')
+
+
+def load_dataset(path):
+    """
+    Carga un CSV electoral ya tipado. La primera vez lo convierte con parse_election_csv y
+    guarda la versión columnar; mientras el CSV no cambie, las siguientes lecturas (de este
+    u otros procesos) usan directamente esa versión.
+
+    Args:
+        path (str): Ruta al CSV.
+
+    Returns:
+        pd.DataFrame or None: La tabla tipada o None si ocurre un error.
+    """
+    with span('datos:cargar', archivo=os.path.basename(path)) as load_span:
+        try:
+            dataset_dir = typed_dataset_path(path)
+            if os.path.exists(os.path.join(dataset_dir, 'schema.json')):
+                load_span.set(tipado=True)
+                return load_columnar(dataset_dir)
+            load_span.set(tipado=False, bytes=os.path.getsize(path))
+            df = parse_election_csv(path)
+            cache_dir = os.path.dirname(dataset_dir)
+            os.makedirs(cache_dir, exist_ok=True)
+            # Elimina versiones anteriores del mismo CSV.
+            stem = os.path.basename(dataset_dir).rsplit('.', 1)[0]
+            for old in os.listdir(cache_dir):
+                if old.rsplit('.', 1)[0] == stem and os.path.join(cache_dir, old) != dataset_dir:
+                    shutil.rmtree(os.path.join(cache_dir, old), ignore_errors=True)
+            save_columnar(df, dataset_dir)
+            return df
+        except FileNotFoundError:
+            print(f"Error: Archivo no encontrado en: {path}")
+            return None
+        except ValueError as e:
+            print(f"Error al interpretar el CSV {path}: {e}")
+            return None
+        except Exception as e:
+            print(f"Ocurrió un error inesperado al cargar {path}: {e}")
+            return None
+
+
+# --- Recorte por región ---
+
+def write_region_csv(path, departments, output_path):
+    """
+    Escribe una copia de un CSV electoral con solo los departamentos indicados, sin
+    reinterpretar las celdas (el formato numérico original se conserva). En los CSV con
+    columna 'Departamento' se filtran las filas; en el de departamentos (un departamento
+    por columna) se filtran las columnas.
+
+    Args:
+        path (str): Ruta al CSV original.
+        departments (list): Nombres de los departamentos de la región (sin distinguir
+            mayúsculas ni acentos).
+        output_path (str): Ruta del CSV recortado.
+
+    Returns:
+        str: `output_path`.
+    """
+    from ingest import normalize_name
+
+    wanted = {normalize_name(name) for name in departments}
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        rows = list(csv.reader(f))
+    header = rows[0] if rows else []
+    if 'Departamento' in header:
+        column = header.index('Departamento')
+        rows = [header] + [row for row in rows[1:] if len(row) > column and normalize_name(row[column]) in wanted]
+    else:
+        keep = [0] + [i for i, name in enumerate(header) if i > 0 and normalize_name(name) in wanted]
+        rows = [[row[i] for i in keep if i < len(row)] for row in rows]
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8', newline='') as f:
+        csv.writer(f, lineterminator='\n').writerows(rows)
+    return output_path
+
+
+# --- Ejecución del script ---
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Convierte los CSV electorales a su versión tipada y muestra el esquema.')
+    parser.add_argument('csv', nargs='+', help='CSV a convertir.')
+    args = parser.parse_args()
+    for csv_path in args.csv:
+        dataset = load_dataset(csv_path)
+        if dataset is not None:
+            print(f'{csv_path} -> {typed_dataset_path(csv_path)}')
+            print(dataset.dtypes.to_string())
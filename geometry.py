@@ -0,0 +1,648 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# --- Configuración de la simplificación de geometrías ---
+# Tolerancia de Douglas-Peucker en grados (0.0005° ≈ 50 m en la latitud de Neuquén).
+DEFAULT_SIMPLIFY_TOLERANCE = 0.0005
+# Cantidad de decimales conservados al cuantizar coordenadas (5 decimales ≈ 1 m).
+DEFAULT_COORD_PRECISION = 5
+# Subdirectorio, junto a los GeoJSON originales, donde se guardan las versiones simplificadas.
+SIMPLIFIED_CACHE_DIRNAME = '.simplificado'
+
+# Registro en memoria de las capas ya leídas, indexado por las rutas (simplificadas) de origen.
+_FEATURE_REGISTRY = {}
+
+
+# --- Lectura y normalización ---
+
+def _iter_polygons(geometry):
+    """Devuelve la lista de polígonos (lista de anillos) de una geometría Polygon o MultiPolygon."""
+    if geometry is None:
+        return []
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry['type'] == 'MultiPolygon':
+        return geometry['coordinates']
+    return []
+
+
+def _quantize_ring(ring, precision):
+    """
+    Descarta la coordenada Z, redondea a `precision` decimales y elimina
+    vértices consecutivos repetidos que aparecen tras el redondeo.
+    """
+    quantized = []
+    for coord in ring:
+        point = (round(coord[0], precision), round(coord[1], precision))
+        if not quantized or quantized[-1] != point:
+            quantized.append(point)
+    # Asegura que el anillo quede cerrado.
+    if quantized and quantized[0] != quantized[-1]:
+        quantized.append(quantized[0])
+    return quantized
+
+
+def load_geojson(path):
+    """
+    Lee un archivo GeoJSON y lo devuelve como diccionario.
+
+    Args:
+        path (str): Ruta al archivo GeoJSON.
+
+    Returns:
+        dict: La FeatureCollection leída.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# --- Simplificación preservando la topología ---
+
+def _douglas_peucker(points, tolerance):
+    """
+    Simplifica una polilínea abierta con Douglas-Peucker, conservando siempre los extremos.
+
+    Args:
+        points (list): Lista de tuplas (lon, lat).
+        tolerance (float): Distancia máxima permitida, en grados.
+
+    Returns:
+        list: Los puntos conservados, en el mismo orden.
+    """
+    n = len(points)
+    if n <= 2 or tolerance <= 0:
+        return list(points)
+    coords = np.asarray(points, dtype=float)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = coords[start + 1:end]
+        a, b = coords[start], coords[end]
+        dx, dy = b - a
+        length = np.hypot(dx, dy)
+        if length == 0:
+            distances = np.hypot(segment[:, 0] - a[0], segment[:, 1] - a[1])
+        else:
+            distances = np.abs(dy * (segment[:, 0] - a[0]) - dx * (segment[:, 1] - a[1])) / length
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance:
+            split = start + 1 + index
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return [points[i] for i in np.flatnonzero(keep)]
+
+
+def _simplify_arc(arc, tolerance):
+    """
+    Simplifica un arco en orientación canónica, de modo que un límite compartido
+    por dos departamentos (recorrido en sentidos opuestos) produzca exactamente
+    los mismos vértices en ambos.
+    """
+    if arc[0] > arc[-1] or (arc[0] == arc[-1] and arc[1] > arc[-2]):
+        return _douglas_peucker(arc[::-1], tolerance)[::-1]
+    return _douglas_peucker(arc, tolerance)
+
+
+def _split_ring_into_arcs(ring, owners):
+    """
+    Divide un anillo cerrado en arcos cuyos extremos son los vértices de unión,
+    es decir, los puntos donde cambia el conjunto de anillos que comparten el límite.
+
+    Args:
+        ring (list): Anillo cerrado de tuplas (lon, lat).
+        owners (dict): Mapa de punto a conjunto de anillos que lo contienen.
+
+    Returns:
+        list: Lista de arcos; cada arco comparte su último punto con el primero del siguiente.
+    """
+    points = ring[:-1]
+    n = len(points)
+    keys = [frozenset(owners[p]) for p in points]
+    junctions = [i for i in range(n)
+                 if len(keys[i]) > 1 and (keys[i - 1] != keys[i] or keys[(i + 1) % n] != keys[i])]
+    if not junctions:
+        # Anillo sin límites compartidos: se ancla en el primer vértice y en el más lejano
+        # para que la simplificación no lo colapse.
+        coords = np.asarray(points, dtype=float)
+        farthest = int(np.argmax(np.hypot(coords[:, 0] - coords[0, 0], coords[:, 1] - coords[0, 1])))
+        junctions = sorted({0, farthest})
+    arcs = []
+    for j, start in enumerate(junctions):
+        end = junctions[(j + 1) % len(junctions)]
+        if end > start:
+            arcs.append(points[start:end + 1])
+        else:
+            arcs.append(points[start:] + points[:end + 1])
+    return arcs
+
+
+def _collect_rings(collections, precision):
+    """Cuantiza todos los anillos de todas las capas y registra qué anillos contienen cada punto."""
+    rings = []
+    owners = {}
+    for collection in collections:
+        for feature in collection.get('features', []):
+            for polygon in _iter_polygons(feature.get('geometry')):
+                for ring in polygon:
+                    quantized = _quantize_ring(ring, precision)
+                    ring_id = len(rings)
+                    rings.append(quantized)
+                    for point in quantized[:-1]:
+                        owners.setdefault(point, set()).add(ring_id)
+    return rings, owners
+
+
+def _ring_arcs(collections, precision):
+    """Devuelve, para cada anillo de las capas, su lista de arcos (o None si es degenerado)."""
+    rings, owners = _collect_rings(collections, precision)
+    return [_split_ring_into_arcs(ring, owners) if len(ring) >= 4 else None for ring in rings], rings
+
+
+def simplify_collections(collections, tolerance=DEFAULT_SIMPLIFY_TOLERANCE, precision=DEFAULT_COORD_PRECISION):
+    """
+    Simplifica varias FeatureCollection a la vez: descarta Z, cuantiza coordenadas y
+    aplica Douglas-Peucker por arcos, de modo que los límites compartidos entre
+    departamentos se simplifican de forma idéntica y no aparecen huecos ni solapamientos.
+
+    Args:
+        collections (list): Lista de FeatureCollection (dicts GeoJSON).
+        tolerance (float): Tolerancia de simplificación en grados. 0 desactiva la simplificación.
+        precision (int): Cantidad de decimales conservados en las coordenadas.
+
+    Returns:
+        list: Nuevas FeatureCollection simplificadas, en el mismo orden.
+    """
+    ring_arcs, rings = _ring_arcs(collections, precision)
+    simplified_arcs = {}
+    ring_index = 0
+    result = []
+    for collection in collections:
+        features = []
+        for feature in collection.get('features', []):
+            polygons = []
+            for polygon in _iter_polygons(feature.get('geometry')):
+                new_polygon = []
+                for _ in polygon:
+                    arcs = ring_arcs[ring_index]
+                    original = rings[ring_index]
+                    ring_index += 1
+                    if arcs is None:
+                        continue
+                    ring = []
+                    for arc in arcs:
+                        key = tuple(arc)
+                        if key not in simplified_arcs:
+                            simplified_arcs[key] = _simplify_arc(arc, tolerance)
+                        ring.extend(simplified_arcs[key][:-1])
+                    ring.append(ring[0])
+                    # Si la simplificación degenera el anillo, se conserva la versión cuantizada.
+                    if len(ring) < 4:
+                        ring = original
+                    new_polygon.append([list(point) for point in ring])
+                if new_polygon:
+                    polygons.append(new_polygon)
+            features.append({
+                'type': 'Feature',
+                'properties': dict(feature.get('properties') or {}),
+                'geometry': {'type': 'MultiPolygon', 'coordinates': polygons},
+            })
+        result.append({'type': 'FeatureCollection', 'features': features})
+    return result
+
+
+# --- Salida TopoJSON ---
+
+def to_topojson(collections, names, tolerance=DEFAULT_SIMPLIFY_TOLERANCE, precision=DEFAULT_COORD_PRECISION,
+                quantization=100000):
+    """
+    Convierte varias capas en un único Topology TopoJSON, donde cada límite compartido
+    entre departamentos se almacena una sola vez como arco.
+
+    Args:
+        collections (list): Lista de FeatureCollection (dicts GeoJSON).
+        names (list): Nombre del objeto TopoJSON para cada capa.
+        tolerance (float): Tolerancia de simplificación en grados.
+        precision (int): Cantidad de decimales usados para detectar vértices compartidos.
+        quantization (int): Resolución de la grilla entera usada para codificar los arcos.
+
+    Returns:
+        dict: El objeto Topology, listo para serializar con json.dump.
+    """
+    ring_arcs, _ = _ring_arcs(collections, precision)
+    arc_index = {}
+    arcs = []
+
+    def arc_ref(arc):
+        simplified = tuple(_simplify_arc(arc, tolerance))
+        reverse = simplified[::-1]
+        if simplified in arc_index:
+            return arc_index[simplified]
+        if reverse in arc_index:
+            return ~arc_index[reverse]
+        arc_index[simplified] = len(arcs)
+        arcs.append(simplified)
+        return arc_index[simplified]
+
+    objects = {}
+    ring_index = 0
+    for collection, name in zip(collections, names):
+        geometries = []
+        for feature in collection.get('features', []):
+            polygons = []
+            for polygon in _iter_polygons(feature.get('geometry')):
+                rings = []
+                for _ in polygon:
+                    ring = ring_arcs[ring_index]
+                    ring_index += 1
+                    if ring is not None:
+                        rings.append([arc_ref(arc) for arc in ring])
+                if rings:
+                    polygons.append(rings)
+            geometries.append({'type': 'MultiPolygon', 'arcs': polygons,
+                               'properties': dict(feature.get('properties') or {})})
+        objects[name] = {'type': 'GeometryCollection', 'geometries': geometries}
+
+    all_points = np.asarray([point for arc in arcs for point in arc], dtype=float).reshape(-1, 2)
+    x0, y0 = all_points.min(axis=0) if len(all_points) else (0.0, 0.0)
+    x1, y1 = all_points.max(axis=0) if len(all_points) else (1.0, 1.0)
+    kx = (x1 - x0) / (quantization - 1) or 1.0
+    ky = (y1 - y0) / (quantization - 1) or 1.0
+
+    encoded_arcs = []
+    for arc in arcs:
+        # Codificación delta sobre la grilla cuantizada, como define la especificación TopoJSON.
+        grid = np.rint((np.asarray(arc, dtype=float) - (x0, y0)) / (kx, ky)).astype(np.int64)
+        deltas = np.vstack([grid[:1], np.diff(grid, axis=0)])
+        encoded_arcs.append(deltas.tolist())
+
+    return {
+        'type': 'Topology',
+        'transform': {'scale': [kx, ky], 'translate': [float(x0), float(y0)]},
+        'objects': objects,
+        'arcs': encoded_arcs,
+    }
+
+
+# --- Caché de geometrías simplificadas ---
+
+def _cache_key(paths, tolerance, precision, chunk_size=1 << 20):
+    """
+    Calcula la clave de caché a partir de los parámetros y del contenido de todos los archivos
+    fuente (no de su tamaño y fecha, que pueden repetirse tras un 'git checkout' o un 'cp -p').
+    """
+    digest = hashlib.sha256(f'{tolerance}|{precision}'.encode('utf-8'))
+    for path in paths:
+        digest.update(f'|{os.path.basename(path)}|'.encode('utf-8'))
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def _write_json(path, data):
+    """Escribe JSON compacto de forma atómica."""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def simplify_geojson_files(paths, tolerance=DEFAULT_SIMPLIFY_TOLERANCE, precision=DEFAULT_COORD_PRECISION,
+                           topojson=False):
+    """
+    Etapa de preprocesamiento de las capas de departamentos. Simplifica todos los
+    archivos juntos (para respetar los límites compartidos) y guarda el resultado
+    en un subdirectorio junto a cada archivo original. Mientras los archivos fuente
+    y los parámetros no cambien, las siguientes ejecuciones leen directamente la caché.
+
+    Args:
+        paths (list): Rutas a los archivos GeoJSON originales. Las inexistentes se ignoran.
+        tolerance (float): Tolerancia de simplificación en grados.
+        precision (int): Cantidad de decimales conservados en las coordenadas.
+        topojson (bool): Si es True, también escribe 'departamentos.<clave>.topojson' en la caché.
+
+    Returns:
+        dict: Mapa de ruta original a ruta del GeoJSON simplificado.
+    """
+    existing = [path for path in paths if os.path.exists(path)]
+    if not existing:
+        return {}
+    key = _cache_key(existing, tolerance, precision)
+
+    def cached_path(path, extension='geojson'):
+        cache_dir = os.path.join(os.path.dirname(path), SIMPLIFIED_CACHE_DIRNAME)
+        stem = os.path.splitext(os.path.basename(path))[0]
+        return os.path.join(cache_dir, f'{stem}.{key}.{extension}')
+
+    outputs = {path: cached_path(path) for path in existing}
+    topojson_path = cached_path(os.path.join(os.path.dirname(existing[0]), 'departamentos'), 'topojson')
+    missing = [path for path in existing if not os.path.exists(outputs[path])]
+    if not missing and (not topojson or os.path.exists(topojson_path)):
+        return outputs
+
+    collections = [load_geojson(path) for path in existing]
+    simplified = simplify_collections(collections, tolerance, precision)
+    for path, collection in zip(existing, simplified):
+        output_path = outputs[path]
+        cache_dir = os.path.dirname(output_path)
+        os.makedirs(cache_dir, exist_ok=True)
+        # Elimina versiones anteriores del mismo archivo generadas con otra clave.
+        stem = os.path.splitext(os.path.basename(path))[0]
+        for old in os.listdir(cache_dir):
+            if old.startswith(f'{stem}.') and old.endswith('.geojson') and os.path.join(cache_dir, old) != output_path:
+                os.remove(os.path.join(cache_dir, old))
+        _write_json(output_path, collection)
+
+    if topojson:
+        names = [os.path.splitext(os.path.basename(path))[0] for path in existing]
+        _write_json(topojson_path, to_topojson(collections, names, tolerance, precision))
+
+    return outputs
+
+
+# --- Registro de geometrías de departamentos ---
+
+def load_department_features(layers, tolerance=DEFAULT_SIMPLIFY_TOLERANCE, precision=DEFAULT_COORD_PRECISION,
+                             topojson=False):
+    """
+    Carga todas las capas de departamentos una sola vez y las reúne en una única
+    FeatureCollection en memoria. Cada feature recibe la propiedad 'departamento'
+    con el nombre indicado en `layers`. Las lecturas siguientes con las mismas
+    capas (y sin cambios en disco) se sirven desde el registro.
+
+    Args:
+        layers (list): Lista de tuplas (ruta al GeoJSON, nombre del departamento).
+        tolerance (float): Tolerancia de simplificación en grados.
+        precision (int): Cantidad de decimales conservados en las coordenadas.
+        topojson (bool): Si es True, también se genera la versión TopoJSON en la caché.
+
+    Returns:
+        dict: FeatureCollection con las features de todas las capas existentes. Las
+        propiedades de cada feature son una copia, por lo que pueden modificarse libremente.
+    """
+    paths = [path for path, _ in layers]
+    try:
+        sources = simplify_geojson_files(paths, tolerance=tolerance, precision=precision, topojson=topojson)
+    except Exception as e:
+        print(f"Advertencia: No se pudieron simplificar las capas GeoJSON, se usarán las originales. Error: {e}")
+        sources = {path: path for path in paths if os.path.exists(path)}
+
+    for path in paths:
+        if path not in sources:
+            print(f"Advertencia: Archivo GeoJSON no encontrado: {path}. No se añadirá al mapa.")
+
+    key = tuple((sources[path], name) for path, name in layers if path in sources)
+    if key not in _FEATURE_REGISTRY:
+        features = []
+        for source, name in key:
+            try:
+                for feature in load_geojson(source).get('features', []):
+                    properties = dict(feature.get('properties') or {})
+                    properties['departamento'] = name
+                    features.append({'type': 'Feature', 'properties': properties,
+                                     'geometry': feature.get('geometry')})
+            except Exception as e:
+                print(f"Error al procesar {source}: {e}")
+        _FEATURE_REGISTRY[key] = features
+
+    return {
+        'type': 'FeatureCollection',
+        'features': [{'type': 'Feature', 'properties': dict(feature['properties']), 'geometry': feature['geometry']}
+                     for feature in _FEATURE_REGISTRY[key]],
+    }
+
+
+# --- Índice espacial y asignación de puntos a polígonos ---
+
+# Celdas de la grilla por arista (aprox.): con celdas chicas, cada punto se compara con pocas aristas.
+GRID_CELLS_PER_EDGE = 2
+GRID_MAX_CELLS = 1 << 20
+
+
+def _feature_edges(geometry):
+    """Devuelve las aristas (x1, y1, x2, y2) de todos los anillos de una geometría como un arreglo (n, 4)."""
+    edges = []
+    for polygon in _iter_polygons(geometry):
+        for ring in polygon:
+            coords = np.asarray([coord[:2] for coord in ring], dtype=float)
+            if len(coords) < 3:
+                continue
+            if not np.array_equal(coords[0], coords[-1]):
+                coords = np.vstack([coords, coords[:1]])
+            edges.append(np.hstack([coords[:-1], coords[1:]]))
+    return np.vstack(edges) if edges else np.empty((0, 4))
+
+
+def _segments_cross(px, py, qx, qy, edges):
+    """
+    Indica, para cada par, si el segmento p→q cruza la arista (x1, y1, x2, y2). Los casos
+    degenerados (un vértice justo sobre el segmento) se resuelven siempre hacia el mismo lado,
+    de modo que la paridad de los cruces es consistente.
+    """
+    ax, ay, bx, by = edges[:, 0], edges[:, 1], edges[:, 2], edges[:, 3]
+    side_p = (bx - ax) * (py - ay) - (by - ay) * (px - ax) > 0
+    side_q = (bx - ax) * (qy - ay) - (by - ay) * (qx - ax) > 0
+    side_a = (qx - px) * (ay - py) - (qy - py) * (ax - px) > 0
+    side_b = (qx - px) * (by - py) - (qy - py) * (bx - px) > 0
+    return (side_p != side_q) & (side_a != side_b)
+
+
+class PolygonIndex:
+    """
+    Índice de grilla sobre una capa de polígonos que no se superponen (departamentos o
+    cualquier capa más fina), para asignar muchos puntos a su polígono en una sola llamada.
+
+    Para cada celda de la grilla se guardan las aristas que la atraviesan y el polígono que
+    contiene su centro. Un punto está dentro del mismo polígono que el centro de su celda,
+    salvo que el segmento punto→centro cruce un número impar de aristas de ese polígono;
+    así cada punto se compara solo con las pocas aristas de su celda, sin recorrer todos los polígonos.
+    """
+
+    def __init__(self, collection, name_property):
+        """
+        Args:
+            collection (dict): FeatureCollection con polígonos o multipolígonos.
+            name_property (str): Propiedad de cada feature con el nombre del polígono.
+                Las features con el mismo nombre se tratan como un único polígono.
+        """
+        self.names = []
+        name_ids = {}
+        edge_blocks = []
+        owner_blocks = []
+        for feature in collection.get('features', []):
+            name = (feature.get('properties') or {}).get(name_property)
+            edges = _feature_edges(feature.get('geometry'))
+            if name is None or not len(edges):
+                continue
+            if name not in name_ids:
+                name_ids[name] = len(self.names)
+                self.names.append(name)
+            edge_blocks.append(edges)
+            owner_blocks.append(np.full(len(edges), name_ids[name]))
+        self.edges = np.vstack(edge_blocks) if edge_blocks else np.empty((0, 4))
+        self.edge_owner = np.concatenate(owner_blocks) if owner_blocks else np.empty(0, dtype=int)
+        self._build_grid()
+
+    @classmethod
+    def from_layers(cls, layers, name_property='departamento'):
+        """
+        Construye el índice a partir de archivos GeoJSON (sin simplificar), uno por polígono.
+
+        Args:
+            layers (list): Lista de tuplas (ruta al GeoJSON, nombre del polígono). Los archivos inexistentes se ignoran.
+            name_property (str): Propiedad en la que se guarda el nombre.
+
+        Returns:
+            PolygonIndex: El índice.
+        """
+        features = []
+        for path, name in layers:
+            if not os.path.exists(path):
+                print(f"Advertencia: Archivo GeoJSON no encontrado: {path}. No se añadirá al índice.")
+                continue
+            for feature in load_geojson(path).get('features', []):
+                features.append({'type': 'Feature', 'properties': {name_property: name},
+                                 'geometry': feature.get('geometry')})
+        return cls({'type': 'FeatureCollection', 'features': features}, name_property)
+
+    def _build_grid(self):
+        """Arma la grilla: aristas por celda (formato CSR) y polígono que contiene el centro de cada celda."""
+        edges = self.edges
+        if not len(edges):
+            self.bounds = (0.0, 0.0, 1.0, 1.0)
+            self.shape = (1, 1)
+            self.cell_edges_start = np.zeros(2, dtype=np.int64)
+            self.cell_edges = np.empty(0, dtype=np.int64)
+            self.center_owner = np.full(1, -1)
+            return
+        xs, ys = edges[:, [0, 2]], edges[:, [1, 3]]
+        x0, y0, x1, y1 = xs.min(), ys.min(), xs.max(), ys.max()
+        width, height = max(x1 - x0, 1e-12), max(y1 - y0, 1e-12)
+        n_cells = int(np.clip(len(edges) * GRID_CELLS_PER_EDGE, 1, GRID_MAX_CELLS))
+        nx = max(1, int(round(np.sqrt(n_cells * width / height))))
+        ny = max(1, int(round(n_cells / nx)))
+        self.bounds = (x0, y0, x1, y1)
+        self.shape = (ny, nx)
+        self._cell_size = (width / nx, height / ny)
+
+        # Celdas que cubre la caja de cada arista (cobertura conservadora).
+        ix0, iy0 = self._cell_coords(xs.min(axis=1), ys.min(axis=1))
+        ix1, iy1 = self._cell_coords(xs.max(axis=1), ys.max(axis=1))
+        span_x = ix1 - ix0 + 1
+        counts = span_x * (iy1 - iy0 + 1)
+        edge_ids = np.repeat(np.arange(len(edges)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cells = (iy0[edge_ids] + offsets // span_x[edge_ids]) * nx + ix0[edge_ids] + offsets % span_x[edge_ids]
+        order = np.argsort(cells, kind='stable')
+        self.cell_edges = edge_ids[order]
+        self.cell_edges_start = np.concatenate([[0], np.cumsum(np.bincount(cells, minlength=nx * ny))])
+
+        # Polígono que contiene el centro de cada celda: una línea de barrido por fila de la grilla.
+        center_x = x0 + (np.arange(nx) + 0.5) * self._cell_size[0]
+        center_owner = np.full((ny, nx), -1)
+        for row in range(ny):
+            yc = y0 + (row + 0.5) * self._cell_size[1]
+            crossing = (edges[:, 1] > yc) != (edges[:, 3] > yc)
+            if not crossing.any():
+                continue
+            e = edges[crossing]
+            x_cross = e[:, 0] + (yc - e[:, 1]) * (e[:, 2] - e[:, 0]) / (e[:, 3] - e[:, 1])
+            owners = self.edge_owner[crossing]
+            for polygon in np.unique(owners):
+                parity = np.searchsorted(np.sort(x_cross[owners == polygon]), center_x, side='right') % 2
+                center_owner[row, parity == 1] = polygon
+        self.center_owner = center_owner.ravel()
+
+    def _cell_coords(self, x, y):
+        """Columna y fila de la grilla de cada punto (los puntos fuera de la caja se ajustan al borde)."""
+        ny, nx = self.shape
+        ix = np.clip(((x - self.bounds[0]) / self._cell_size[0]).astype(np.int64), 0, nx - 1)
+        iy = np.clip(((y - self.bounds[1]) / self._cell_size[1]).astype(np.int64), 0, ny - 1)
+        return ix, iy
+
+    def locate(self, lon, lat):
+        """
+        Asigna cada punto al polígono que lo contiene.
+
+        Args:
+            lon (array-like): Longitudes.
+            lat (array-like): Latitudes.
+
+        Returns:
+            np.ndarray: Índice del polígono de cada punto en `self.names`, o -1 si está fuera de todos.
+        """
+        lon = np.asarray(lon, dtype=float)
+        lat = np.asarray(lat, dtype=float)
+        result = np.full(len(lon), -1)
+        if not len(self.edges) or not len(lon):
+            return result
+        x0, y0, x1, y1 = self.bounds
+        valid = np.isfinite(lon) & np.isfinite(lat) & (lon >= x0) & (lon <= x1) & (lat >= y0) & (lat <= y1)
+        points = np.flatnonzero(valid)
+        ix, iy = self._cell_coords(lon[points], lat[points])
+        cells = iy * self.shape[1] + ix
+        owner = self.center_owner[cells]
+
+        # Pares (punto, arista de su celda) y cruces del segmento punto→centro de la celda.
+        starts = self.cell_edges_start[cells]
+        counts = self.cell_edges_start[cells + 1] - starts
+        pair_point = np.repeat(np.arange(len(points)), counts)
+        pair_edge = self.cell_edges[np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())]
+        cx = x0 + (ix + 0.5) * self._cell_size[0]
+        cy = y0 + (iy + 0.5) * self._cell_size[1]
+        crosses = _segments_cross(lon[points][pair_point], lat[points][pair_point],
+                                  cx[pair_point], cy[pair_point], self.edges[pair_edge])
+
+        # Paridad de cruces por (punto, polígono): impar significa que el punto y el centro
+        # están de distinto lado del borde de ese polígono.
+        n_polygons = len(self.names)
+        keys, crossings = np.unique(pair_point[crosses] * n_polygons + self.edge_owner[pair_edge[crosses]],
+                                    return_counts=True)
+        odd = keys[crossings % 2 == 1]
+        odd_point, odd_polygon = odd // n_polygons, odd % n_polygons
+        located = owner.copy()
+        leaves_owner = odd_polygon == owner[odd_point]
+        located[odd_point[leaves_owner]] = -1
+        located[odd_point[~leaves_owner]] = odd_polygon[~leaves_owner]
+        result[points] = located
+        return result
+
+
+def assign_departments(df, index, lon_col='Longitud', lat_col='Latitud', label_col='Departamento'):
+    """
+    Asigna cada fila (localidad, mesa) a su departamento según sus coordenadas y, en la misma
+    pasada, compara el resultado con la columna de departamento cargada a mano.
+
+    Args:
+        df (pd.DataFrame): Tabla con columnas de longitud y latitud.
+        index (PolygonIndex): Índice de la capa de departamentos.
+        lon_col (str): Columna de longitud.
+        lat_col (str): Columna de latitud.
+        label_col (str): Columna con el departamento cargado a mano (se ignora si no existe).
+
+    Returns:
+        pd.DataFrame: Copia de `df` con 'Departamento (geometría)' y, si existe `label_col`,
+        'Departamento coincide' (False cuando la etiqueta no coincide con la geometría o el
+        punto queda fuera de todos los polígonos).
+    """
+    import pandas as pd
+    from ingest import normalize_name
+
+    result = df.copy()
+    located = index.locate(df[lon_col].to_numpy(dtype=float), df[lat_col].to_numpy(dtype=float))
+    result['Departamento (geometría)'] = np.asarray(index.names + [None], dtype=object)[located]
+    if label_col in df.columns:
+        # Las etiquetas se normalizan una vez por valor distinto y se comparan como índices de polígono.
+        polygon_ids = {normalize_name(name): i for i, name in enumerate(index.names)}
+        codes, labels = pd.factorize(df[label_col])
+        label_ids = np.asarray([polygon_ids.get(normalize_name(label), -2) for label in labels] + [-2])
+        result['Departamento coincide'] = label_ids[codes] == located
+    return result
@@ -0,0 +1,280 @@
+import os
+import unicodedata
+
+import pandas as pd
+
+# Columnas del CSV de resultados por mesa (formato largo: una fila por mesa, cargo y candidato).
+MESA_COLUMNS = {
+    'cargo': 'Cargo',
+    'departamento': 'Departamento',
+    'localidad': 'Localidad',
+    'candidato': 'Candidato',
+    'votos': 'Votos',
+}
+# Columnas opcionales con las coordenadas de cada mesa. Si el CSV las tiene, el departamento de
+# cada mesa se asigna por geometría (ver geometry.assign_departments) y se compara con el cargado a mano.
+MESA_COORD_COLUMNS = {
+    'longitud': 'Longitud',
+    'latitud': 'Latitud',
+}
+# Subdirectorio (dentro del directorio de salida) donde se escriben las tablas agregadas.
+INGEST_DIRNAME = '.ingesta'
+# Filas leídas por bloque. La memoria usada depende de este valor y no del tamaño del archivo.
+DEFAULT_CHUNK_SIZE = 200_000
+
+CARGO_GOBERNADOR = 'Gobernador'
+CARGO_PRESIDENTE = 'Presidente'
+
+# Departamentos de cada zona, con el nombre con el que se muestran en el informe.
+ZONAS = {
+    'Zona Norte': ['Minas', 'Chos Malal', 'Pehuenches', 'Ñorquín', 'Loncopué'],
+}
+DEFAULT_ZONA = 'Zona Norte'
+
+# Filas del escrutinio que no corresponden a un candidato (se suman al total emitido, pero no se grafican).
+NON_CANDIDATE_ROWS = ['Votos en Blanco', 'Votos Nulos', 'Votos Anulados', 'Votos Recurridos', 'Votos Impugnados']
+
+
+def normalize_name(name):
+    """
+    Normaliza un nombre (departamento, localidad o candidato) para poder compararlo
+    sin distinguir mayúsculas, acentos ni espacios repetidos.
+
+    Args:
+        name (str): El nombre a normalizar.
+
+    Returns:
+        str: El nombre normalizado.
+    """
+    decomposed = unicodedata.normalize('NFKD', str(name))
+    without_accents = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(without_accents.lower().split())
+
+
+# --- Lectura por bloques ---
+
+def iter_mesa_chunks(path, chunksize=DEFAULT_CHUNK_SIZE, columns=None, **kwargs):
+    """
+    Lee el CSV de mesas por bloques, cargando solo las columnas necesarias (y las coordenadas
+    de MESA_COORD_COLUMNS, si el archivo las tiene).
+
+    Args:
+        path (str): Ruta al CSV de resultados por mesa.
+        chunksize (int): Cantidad de filas por bloque.
+        columns (dict): Nombres de las columnas en el archivo (ver MESA_COLUMNS).
+        **kwargs: Argumentos adicionales para pd.read_csv (ej. sep, encoding).
+
+    Yields:
+        pd.DataFrame: Bloques con las columnas renombradas a las claves de MESA_COLUMNS
+        (y de MESA_COORD_COLUMNS), los votos convertidos a entero y las coordenadas a número.
+    """
+    columns = dict(columns or MESA_COLUMNS)
+    header = pd.read_csv(path, nrows=0, **kwargs).columns
+    columns.update({key: source for key, source in MESA_COORD_COLUMNS.items() if source in header})
+    rename = {source: key for key, source in columns.items()}
+    dtypes = {source: str for source in columns.values()}
+    reader = pd.read_csv(path, usecols=list(columns.values()), dtype=dtypes, chunksize=chunksize, **kwargs)
+    for chunk in reader:
+        chunk = chunk.rename(columns=rename)
+        # Los votos pueden venir vacíos, con guiones o con separador de miles.
+        votos = chunk['votos'].str.replace('.', '', regex=False).str.strip()
+        chunk['votos'] = pd.to_numeric(votos, errors='coerce').fillna(0).astype('int64')
+        for key in MESA_COORD_COLUMNS:
+            if key in chunk:
+                chunk[key] = pd.to_numeric(chunk[key].str.replace(',', '.', regex=False), errors='coerce')
+        yield chunk
+
+
+# --- Agregación incremental ---
+
+class MesaAggregator:
+    """
+    Acumula los votos de las mesas por cargo, departamento, localidad y candidato a medida
+    que se leen los bloques del CSV. Solo se guarda un total por combinación, por lo que la
+    memoria depende de la cantidad de localidades y candidatos y no de la cantidad de mesas.
+
+    A partir de los totales arma las mismas tablas que consumen las secciones del informe
+    (localidades, departamentos y presidente), respetando la jerarquía
+    localidad → departamento → zona.
+
+    Con un índice de departamentos (geometry.PolygonIndex), las mesas con coordenadas se asignan
+    al departamento que las contiene y, en la misma pasada, se cuentan las que tienen cargado
+    a mano otro departamento. Las mesas sin coordenadas o fuera de todos los polígonos conservan
+    el departamento del CSV.
+    """
+
+    def __init__(self, zona=DEFAULT_ZONA, zonas=None, index=None):
+        """
+        Args:
+            zona (str): Zona que cubre el informe. Los departamentos fuera de ella se ignoran.
+            zonas (dict): Departamentos de cada zona (ver ZONAS).
+            index (geometry.PolygonIndex): Índice opcional de los departamentos.
+        """
+        zonas = zonas or ZONAS
+        self.zona = zona
+        # Nombre normalizado del departamento -> nombre con el que se muestra.
+        self._departamentos = {normalize_name(name): name for name in zonas[zona]}
+        self._non_candidates = {normalize_name(name) for name in NON_CANDIDATE_ROWS}
+        # (cargo, departamento, localidad, candidato) -> votos, en orden de aparición.
+        self._totals = {}
+        self.index = index
+        self.rows = 0
+        self.skipped_rows = 0
+        self.located_rows = 0
+        self.mislabeled_rows = 0
+
+    def add_chunk(self, chunk):
+        """
+        Suma un bloque de mesas a los totales.
+
+        Args:
+            chunk (pd.DataFrame): Bloque devuelto por iter_mesa_chunks.
+        """
+        self.rows += len(chunk)
+        if self.index is not None and 'longitud' in chunk and 'latitud' in chunk:
+            chunk = self._locate(chunk)
+        # Primero se agrupa el bloque en pandas; los nombres se normalizan y se acumulan solo
+        # sobre los subtotales, que son pocos comparados con la cantidad de mesas.
+        partial = chunk.groupby(['cargo', 'departamento', 'localidad', 'candidato'],
+                                sort=False, dropna=False)['votos'].agg(['sum', 'size'])
+        totals = self._totals
+        for (cargo, depto, localidad, candidato), votes, rows in zip(partial.index, partial['sum'].tolist(),
+                                                                      partial['size'].tolist()):
+            departamento = self._departamentos.get(normalize_name(depto))
+            if departamento is None:
+                self.skipped_rows += rows
+                continue
+            key = (normalize_name(cargo), departamento, str(localidad).strip(), str(candidato).strip())
+            totals[key] = totals.get(key, 0) + votes
+
+    def _locate(self, chunk):
+        """Reemplaza el departamento de las mesas con coordenadas por el que indica la geometría."""
+        from geometry import assign_departments
+
+        located = assign_departments(chunk, self.index, lon_col='longitud', lat_col='latitud',
+                                     label_col='departamento')
+        inside = located['Departamento (geometría)'].notna()
+        self.located_rows += int(inside.sum())
+        self.mislabeled_rows += int((inside & ~located['Departamento coincide']).sum())
+        chunk = chunk.copy()
+        chunk['departamento'] = located['Departamento (geometría)'].where(inside, chunk['departamento'])
+        return chunk
+
+    def _frame(self, cargo):
+        """Totales de un cargo como DataFrame largo (departamento, localidad, candidato, votos)."""
+        cargo = normalize_name(cargo)
+        rows = [(depto, localidad, candidato, votes)
+                for (key_cargo, depto, localidad, candidato), votes in self._totals.items() if key_cargo == cargo]
+        return pd.DataFrame(rows, columns=['departamento', 'localidad', 'candidato', 'votos'])
+
+    def _candidate_rows(self, df):
+        """Filtra las filas que no corresponden a candidatos (votos en blanco, nulos, etc.)."""
+        return df[~df['candidato'].map(normalize_name).isin(self._non_candidates)]
+
+    def localidades_frame(self, cargo=CARGO_GOBERNADOR):
+        """
+        Tabla por localidad con el formato de 'Datos_Norte_NQN - localidades.csv'.
+
+        Returns:
+            pd.DataFrame: Columnas Localidad, un candidato por columna y Departamento.
+        """
+        df = self._candidate_rows(self._frame(cargo))
+        wide = df.pivot_table(index=['localidad', 'departamento'], columns='candidato', values='votos',
+                              aggfunc='sum', fill_value=0, sort=False)
+        wide = wide[list(dict.fromkeys(df['candidato']))].reset_index()
+        wide = wide.rename(columns={'localidad': 'Localidad', 'departamento': 'Departamento'})
+        wide.columns.name = None
+        return wide[['Localidad'] + [col for col in wide.columns if col not in ('Localidad', 'Departamento')] + ['Departamento']]
+
+    def departamentos_frame(self, cargo=CARGO_GOBERNADOR):
+        """
+        Tabla candidato × departamento con el formato de 'Datos_Norte_NQN - departamentos.csv'.
+
+        Returns:
+            pd.DataFrame: Columna Candidato y una columna por departamento (en minúsculas).
+        """
+        df = self._candidate_rows(self._frame(cargo))
+        wide = df.pivot_table(index='candidato', columns='departamento', values='votos',
+                              aggfunc='sum', fill_value=0, sort=False)
+        wide = wide[list(dict.fromkeys(df['departamento']))]
+        wide.columns = [name.lower() for name in wide.columns]
+        return wide.rename_axis('Candidato').reset_index()
+
+    def presidente_frame(self, cargo=CARGO_PRESIDENTE):
+        """
+        Tabla por departamento con el formato de 'Datos_Norte_NQN - Copia de presidente.csv'.
+
+        Returns:
+            pd.DataFrame: Columna Departamento, una columna por candidato (y por votos en blanco,
+            nulos, etc.) y el total de votos emitidos.
+        """
+        df = self._frame(cargo)
+        wide = df.pivot_table(index='departamento', columns='candidato', values='votos',
+                              aggfunc='sum', fill_value=0, sort=False)
+        wide = wide[list(dict.fromkeys(df['candidato']))]
+        wide['Votos Totales Emitidos'] = wide.sum(axis=1)
+        wide.columns.name = None
+        return wide.rename_axis('Departamento').reset_index()
+
+
+def ingest_mesas(path, chunksize=DEFAULT_CHUNK_SIZE, zona=DEFAULT_ZONA, columns=None, department_layers=None,
+                 **kwargs):
+    """
+    Lee el CSV de resultados por mesa por bloques y acumula los votos en la jerarquía
+    localidad → departamento → zona.
+
+    Args:
+        path (str): Ruta al CSV de resultados por mesa.
+        chunksize (int): Cantidad de filas por bloque.
+        zona (str): Zona que cubre el informe.
+        columns (dict): Nombres de las columnas en el archivo (ver MESA_COLUMNS).
+        department_layers (list): Capas de departamentos como tuplas (ruta al GeoJSON, nombre).
+            Si se indican y el CSV tiene coordenadas (MESA_COORD_COLUMNS), cada mesa se asigna
+            al departamento que la contiene (ver MesaAggregator).
+        **kwargs: Argumentos adicionales para pd.read_csv.
+
+    Returns:
+        MesaAggregator: Los totales acumulados.
+    """
+    index = None
+    if department_layers:
+        header = pd.read_csv(path, nrows=0, **kwargs).columns
+        if all(source in header for source in MESA_COORD_COLUMNS.values()):
+            from geometry import PolygonIndex
+            index = PolygonIndex.from_layers(department_layers)
+    aggregator = MesaAggregator(zona=zona, index=index)
+    for chunk in iter_mesa_chunks(path, chunksize=chunksize, columns=columns, **kwargs):
+        aggregator.add_chunk(chunk)
+    print(f"Ingesta de mesas: {aggregator.rows} filas leídas de {path} "
+          f"({aggregator.skipped_rows} fuera de la {zona}).")
+    if index is not None:
+        print(f"Ingesta de mesas: {aggregator.located_rows} filas ubicadas por coordenadas; "
+              f"{aggregator.mislabeled_rows} con un departamento distinto al cargado en el CSV.")
+        if aggregator.mislabeled_rows:
+            print("Advertencia: se usó el departamento que indican las coordenadas.")
+    return aggregator
+
+
+def write_report_csvs(aggregator, output_dir):
+    """
+    Escribe las tablas agregadas como CSV con el mismo formato que los archivos de entrada
+    del informe, para que las secciones existentes (y la caché de compilación) las usen sin cambios.
+
+    Args:
+        aggregator (MesaAggregator): Los totales acumulados.
+        output_dir (str): Directorio donde se escriben los CSV.
+
+    Returns:
+        dict: {'departamentos', 'localidades', 'presidente'} -> ruta del CSV generado.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    frames = {
+        'departamentos': aggregator.departamentos_frame(),
+        'localidades': aggregator.localidades_frame(),
+        'presidente': aggregator.presidente_frame(),
+    }
+    paths = {}
+    for name, frame in frames.items():
+        paths[name] = os.path.join(output_dir, f'{name}.csv')
+        frame.to_csv(paths[name], index=False)
+    return paths
@@ -0,0 +1,262 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Cantidad de filas del resumen por consola (los spans más costosos, agrupados por nombre).
+SUMMARY_TOP = 15
+
+# Tracer activo del proceso. None significa que la instrumentación está desactivada.
+_tracer = None
+
+
+class _NullSpan:
+    """Span vacío que devuelve span() cuando la instrumentación está desactivada."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """
+    Un tramo con nombre del proceso de generación. Registra tiempo de reloj y de CPU y, si
+    el tracer sigue la memoria, el pico de memoria asignada durante el tramo (por encima de
+    la que ya estaba asignada al empezar).
+    """
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        """Agrega atributos al span (p. ej. `bytes` con el tamaño del resultado)."""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.tracer._enter(self)
+        self.start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.seconds = time.perf_counter() - self.start
+        self.cpu_seconds = time.process_time() - self.cpu_start
+        self.tracer._exit(self, failed=exc_info[0] is not None)
+        return False
+
+
+class Tracer:
+    """
+    Registro de spans de una ejecución. Los spans pueden anidarse; cada uno guarda su
+    profundidad y el nombre de su padre, y el resultado se exporta como JSON o en el formato
+    de eventos de Chrome (chrome://tracing, Perfetto).
+
+    Con `memory`, usa tracemalloc para registrar el pico de memoria de cada span. Es bastante
+    más lento que medir solo tiempos, por lo que conviene usarlo para buscar picos de memoria
+    y no para comparar tiempos.
+    """
+
+    def __init__(self, memory=False):
+        """
+        Args:
+            memory (bool): Si es True, registra el pico de memoria de cada span con tracemalloc.
+        """
+        self.memory = memory
+        self.records = []
+        self.origin = time.perf_counter()
+        self._stack = []
+        self._peaks = []  # Pico acumulado de cada span abierto (la pila de tracemalloc es única).
+
+    def span(self, name, **attrs):
+        return Span(self, name, attrs)
+
+    def _enter(self, span):
+        span.parent = self._stack[-1].name if self._stack else None
+        span.depth = len(self._stack)
+        self._stack.append(span)
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            span.memory_start = current
+            self._peaks.append(current)
+            tracemalloc.reset_peak()
+
+    def _exit(self, span, failed=False):
+        self._stack.pop()
+        record = {
+            'name': span.name,
+            'parent': span.parent,
+            'depth': span.depth,
+            'start': round(span.start - self.origin, 6),
+            'seconds': round(span.seconds, 6),
+            'cpu_seconds': round(span.cpu_seconds, 6),
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+        }
+        if self.memory:
+            peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+            record['peak_alloc_bytes'] = max(0, peak - span.memory_start)
+            # El pico del span cuenta también para el del span que lo contiene.
+            if self._peaks:
+                self._peaks[-1] = max(self._peaks[-1], peak)
+            tracemalloc.reset_peak()
+        if failed:
+            record['error'] = True
+        if span.attrs:
+            record['attrs'] = span.attrs
+        self.records.append(record)
+
+    # --- Exportación ---
+
+    def to_json(self):
+        """Devuelve los spans registrados, ordenados por inicio."""
+        return {'memory': self.memory, 'spans': sorted(self.records, key=lambda r: r['start'])}
+
+    def to_chrome_trace(self):
+        """Devuelve los spans en el formato de eventos de Chrome (eventos completos 'X', en microsegundos)."""
+        events = []
+        for record in self.records:
+            args = dict(record.get('attrs', {}))
+            args['cpu_ms'] = round(record['cpu_seconds'] * 1000, 3)
+            if 'peak_alloc_bytes' in record:
+                args['peak_alloc_bytes'] = record['peak_alloc_bytes']
+            events.append({'name': record['name'], 'ph': 'X', 'ts': round(record['start'] * 1e6, 1),
+                           'dur': round(record['seconds'] * 1e6, 1), 'pid': record['pid'],
+                           'tid': record['tid'], 'args': args})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write(self, prefix):
+        """
+        Guarda la traza en '<prefix>.json' y '<prefix>.chrome.json'.
+
+        Returns:
+            tuple: Rutas de los dos archivos.
+        """
+        directory = os.path.dirname(prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        paths = (f'{prefix}.json', f'{prefix}.chrome.json')
+        for path, data in zip(paths, (self.to_json(), self.to_chrome_trace())):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+        return paths
+
+    def summary(self, top=SUMMARY_TOP):
+        """
+        Resume los spans agrupados por nombre (cantidad, tiempo total y de CPU, pico de memoria
+        y bytes producidos), ordenados por tiempo total.
+
+        Returns:
+            str: La tabla del resumen.
+        """
+        groups = {}
+        for record in self.records:
+            group = groups.setdefault(record['name'], {'count': 0, 'seconds': 0.0, 'cpu_seconds': 0.0,
+                                                       'peak': None, 'bytes': None})
+            group['count'] += 1
+            group['seconds'] += record['seconds']
+            group['cpu_seconds'] += record['cpu_seconds']
+            if 'peak_alloc_bytes' in record:
+                group['peak'] = max(group['peak'] or 0, record['peak_alloc_bytes'])
+            size = record.get('attrs', {}).get('bytes')
+            if size is not None:
+                group['bytes'] = (group['bytes'] or 0) + size
+        rows = sorted(groups.items(), key=lambda item: item[1]['seconds'], reverse=True)[:top]
+
+        def megabytes(value):
+            return f'{value / 1e6:.2f}' if value is not None else '-'
+
+        lines = [f"{'span':<40} {'n':>6} {'total (s)':>10} {'CPU (s)':>9} {'pico (MB)':>10} {'bytes (MB)':>11}"]
+        for name, group in rows:
+            lines.append(f"{name[:40]:<40} {group['count']:>6} {group['seconds']:>10.3f} {group['cpu_seconds']:>9.3f} "
+                         f"{megabytes(group['peak']):>10} {megabytes(group['bytes']):>11}")
+        if len(groups) > top:
+            lines.append(f"... y {len(groups) - top} span(s) más en la traza.")
+        return '\n'.join(lines)
+
+
+def span(name, **attrs):
+    """
+    Abre un span con nombre si hay un tracer activo. Sin tracer devuelve un span vacío
+    compartido, así que el costo con la instrumentación desactivada es una llamada a función.
+
+    Args:
+        name (str): Nombre del span (p. ej. 'px.bar' o 'mapa:guardar').
+        **attrs: Atributos del span (p. ej. `figura` o `bytes`).
+
+    Returns:
+        Span or _NullSpan: Un context manager con método `set(**attrs)`.
+    """
+    if _tracer is None:
+        return _NULL_SPAN
+    return _tracer.span(name, **attrs)
+
+
+@contextmanager
+def tracing(memory=False):
+    """
+    Activa la instrumentación mientras dura el bloque.
+
+    Los spans se registran solo en el proceso actual: lo que se ejecuta en los procesos
+    de un pool (con --jobs) aparece como el tiempo de espera del span que reúne el resultado.
+
+    Args:
+        memory (bool): Si es True, registra también picos de memoria con tracemalloc.
+
+    Yields:
+        Tracer: El tracer con los spans registrados.
+    """
+    global _tracer
+    previous = _tracer
+    tracer = Tracer(memory=memory)
+    started_tracemalloc = memory and not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start()
+    _tracer = tracer
+    try:
+        yield tracer
+    finally:
+        _tracer = previous
+        if started_tracemalloc:
+            tracemalloc.stop()
+
+
+def traced(func, prefix, memory=False):
+    """
+    Envuelve `func` para que cada llamada se ejecute con la instrumentación activa, guarde
+    la traza con el prefijo `prefix` y muestre el resumen por consola.
+
+    Args:
+        func (callable): Función a instrumentar (p. ej. la que genera el informe).
+        prefix (str): Prefijo de los archivos de la traza (ver Tracer.write).
+        memory (bool): Si es True, registra también picos de memoria.
+
+    Returns:
+        callable: La función envuelta; devuelve lo mismo que `func`.
+    """
+    def wrapper(*args, **kwargs):
+        with tracing(memory=memory) as tracer:
+            try:
+                return func(*args, **kwargs)
+            finally:
+                print(tracer.summary())
+                try:
+                    json_path, chrome_path = tracer.write(prefix)
+                except OSError as e:
+                    print(f"Advertencia: No se pudo guardar la traza en {prefix}: {e}")
+                else:
+                    print(f"Traza guardada en: {json_path} (formato de Chrome: {chrome_path})")
+    return wrapper
@@ -0,0 +1,268 @@
+import asyncio
+import glob
+import mimetypes
+import os
+import re
+import urllib.parse
+
+from plotly_payload import dumps_for_script
+from static_assets import IMMUTABLE_CACHE_CONTROL, is_hashed_asset
+
+# Ruta del flujo de eventos (Server-Sent Events) al que se suscribe el informe.
+LIVE_EVENTS_PATH = '/events'
+# Intervalo de sondeo de los archivos vigilados, en segundos.
+POLL_INTERVAL = 0.2
+# Cada cuánto se envía un comentario para mantener abierta la conexión de eventos, en segundos.
+KEEPALIVE_INTERVAL = 15
+# Tamaño de los bloques con que se envían los archivos, en bytes.
+SEND_CHUNK_SIZE = 64 * 1024
+
+# Archivos temporales de una escritura en curso (ver report_writer.open_report y static_assets.py).
+_TEMPORARY_NAME_PATTERN = re.compile(r'\.tmp\d+$')
+
+
+def _snapshot(patterns):
+    """Devuelve {ruta: (tamaño, fecha de modificación)} de los archivos que coinciden con los patrones."""
+    snapshot = {}
+    for pattern in patterns:
+        for path in glob.glob(pattern):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+
+def _sse_message(event, data):
+    """Arma un mensaje de Server-Sent Events (los datos van en una sola línea de JSON)."""
+    return f'event: {event}\ndata: {data}\n\n'.encode('utf-8')
+
+
+class LiveReport:
+    """
+    Servidor del modo en vivo. Vigila los CSV de entrada y, cuando uno cambia, vuelve a
+    generar el informe (la caché de compilación recalcula solo las secciones afectadas).
+    Luego envía a los navegadores conectados únicamente los gráficos cuyos datos cambiaron,
+    que el informe aplica con Plotly.react sin recargar la página, y los fragmentos HTML que
+    dependen de los datos (tablas, resumen, mapa) que cambiaron, que reemplaza en su lugar.
+
+    Sirve el informe y sus archivos (mapa, imágenes) con un servidor HTTP mínimo de asyncio; los
+    que llevan el hash de su contenido en el nombre (ver static_assets.py) se sirven con caché permanente.
+    Solo se sirven archivos del directorio raíz (el de salida del informe): nada fuera de él, ni los
+    directorios ocultos (cachés de compilación) ni los archivos temporales de una escritura en curso.
+    """
+
+    def __init__(self, build, watch_patterns, root_dir, report_path):
+        """
+        Args:
+            build (callable): Función sin argumentos que genera el informe y devuelve
+                {'figures', 'shared', 'fragments', 'content'} (ver generate_election_report).
+            watch_patterns (list): Patrones glob de los archivos de entrada a vigilar.
+            root_dir (str): Directorio raíz desde el que se sirven los archivos (el directorio de salida).
+            report_path (str): Ruta del informe HTML generado (dentro de `root_dir`).
+        """
+        self.build = build
+        self.watch_patterns = watch_patterns
+        self.root_dir = os.path.realpath(root_dir)
+        self.report_path = report_path
+        self.report_url = '/' + os.path.relpath(report_path, root_dir).replace(os.sep, '/')
+        self._clients = set()
+        self._figures = {}
+        self._shared = None
+        self._fragments = {}
+        self._content = None
+        self._frames = {}
+
+    # --- Generación y difusión de cambios ---
+
+    def _frame_snapshot(self):
+        """Huellas de los demás HTML del directorio del informe (p. ej. el mapa en el iframe)."""
+        pattern = os.path.join(glob.escape(os.path.dirname(self.report_path)), '*.html')
+        return {path: mark for path, mark in _snapshot([pattern]).items() if path != self.report_path}
+
+    def rebuild(self):
+        """
+        Genera el informe y calcula los mensajes a enviar a los navegadores.
+
+        Returns:
+            list: Mensajes SSE ya codificados (vacía si no cambió nada visible).
+        """
+        result = self.build()
+        figures = {graph_id: dumps_for_script(figure) for graph_id, figure in result['figures'].items()}
+        shared = dumps_for_script(result['shared'])
+        fragments = {fragment_id: dumps_for_script(html) for fragment_id, html in result['fragments'].items()}
+        frames = self._frame_snapshot()
+        messages = []
+        if self._content is not None:
+            if (result['content'] != self._content or figures.keys() != self._figures.keys()
+                    or fragments.keys() != self._fragments.keys()):
+                # Cambió la estructura de la página: los clientes deben recargarla.
+                messages.append(_sse_message('reload', '{}'))
+            else:
+                changed = [graph_id for graph_id, data in figures.items() if self._figures[graph_id] != data]
+                changed_fragments = [fragment_id for fragment_id, data in fragments.items()
+                                     if self._fragments[fragment_id] != data]
+                if changed or changed_fragments or shared != self._shared:
+                    parts = [f'"{graph_id}":{figures[graph_id]}' for graph_id in changed]
+                    payload = '{"figures":{' + ','.join(parts) + '}'
+                    if changed_fragments:
+                        parts = [f'"{fragment_id}":{fragments[fragment_id]}' for fragment_id in changed_fragments]
+                        payload += ',"fragments":{' + ','.join(parts) + '}'
+                    if shared != self._shared:
+                        payload += f',"shared":{shared}'
+                    messages.append(_sse_message('figures', payload + '}'))
+                    print(f"Modo en vivo: {len(changed)} gráfico(s) y {len(changed_fragments)} fragmento(s) actualizado(s).")
+                if frames != self._frames:
+                    messages.append(_sse_message('frames', '{}'))
+        self._figures, self._shared, self._content, self._frames = figures, shared, result['content'], frames
+        self._fragments = fragments
+        return messages
+
+    def broadcast(self, messages):
+        """Encola los mensajes para todos los navegadores conectados."""
+        for queue in self._clients:
+            for message in messages:
+                queue.put_nowait(message)
+
+    async def watch(self, interval=POLL_INTERVAL):
+        """
+        Sondea los archivos vigilados y regenera el informe cuando cambian. Un cambio se procesa
+        recién cuando el archivo deja de modificarse entre dos sondeos, para no leerlo a medio escribir.
+        """
+        current = _snapshot(self.watch_patterns)
+        pending = None
+        while True:
+            await asyncio.sleep(interval)
+            snapshot = _snapshot(self.watch_patterns)
+            if snapshot == current:
+                pending = None
+                continue
+            if snapshot != pending:
+                pending = snapshot
+                continue
+            changed = sorted(path for path in snapshot.keys() | current.keys() if snapshot.get(path) != current.get(path))
+            current, pending = snapshot, None
+            print(f"Modo en vivo: cambios en {', '.join(os.path.basename(path) for path in changed)}.")
+            try:
+                messages = await asyncio.to_thread(self.rebuild)
+            except Exception as e:
+                print(f"Error al regenerar el informe en vivo: {e}")
+                continue
+            self.broadcast(messages)
+
+    # --- Servidor HTTP ---
+
+    async def handle(self, reader, writer):
+        """Atiende una conexión HTTP: el flujo de eventos o un archivo estático."""
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass  # Las cabeceras de la petición no se usan.
+            parts = request_line.decode('latin-1').split()
+            if len(parts) < 2:
+                return
+            method, target = parts[0], parts[1]
+            path = urllib.parse.unquote(urllib.parse.urlsplit(target).path)
+            if method not in ('GET', 'HEAD'):
+                await self._respond(writer, 405, b'Metodo no permitido', 'text/plain; charset=utf-8')
+            elif path == LIVE_EVENTS_PATH:
+                await self._stream_events(writer)
+            elif path == '/':
+                await self._respond(writer, 302, b'', 'text/plain', extra_headers={'Location': self.report_url})
+            else:
+                await self._serve_file(writer, path, head=(method == 'HEAD'))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, body, content_type, extra_headers=None, head=False):
+        reasons = {200: 'OK', 302: 'Found', 404: 'Not Found', 405: 'Method Not Allowed'}
+        headers = {'Content-Type': content_type, 'Content-Length': str(len(body)),
+                   'Cache-Control': 'no-cache', 'Connection': 'close'}
+        headers.update(extra_headers or {})
+        head_lines = [f'HTTP/1.1 {status} {reasons[status]}'] + [f'{name}: {value}' for name, value in headers.items()]
+        writer.write(('\r\n'.join(head_lines) + '\r\n\r\n').encode('latin-1'))
+        if not head:
+            writer.write(body)
+        await writer.drain()
+
+    def _resolve(self, path):
+        """
+        Devuelve la ruta del archivo pedido, o None si no se sirve: fuera del directorio raíz
+        (también a través de enlaces simbólicos), ocultos o dentro de un directorio oculto, o temporales.
+        """
+        full_path = os.path.realpath(os.path.join(self.root_dir, path.lstrip('/')))
+        if os.path.commonpath([full_path, self.root_dir]) != self.root_dir or not os.path.isfile(full_path):
+            return None
+        parts = os.path.relpath(full_path, self.root_dir).split(os.sep)
+        if any(part.startswith('.') for part in parts) or _TEMPORARY_NAME_PATTERN.search(parts[-1]):
+            return None
+        return full_path
+
+    async def _serve_file(self, writer, path, head=False):
+        full_path = self._resolve(path)
+        if full_path is None:
+            await self._respond(writer, 404, b'No encontrado', 'text/plain; charset=utf-8', head=head)
+            return
+        content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type == 'application/javascript':
+            content_type += '; charset=utf-8'
+        # El archivo se envía por bloques: la memoria usada no depende de su tamaño y el
+        # navegador recibe el comienzo del informe sin esperar a que se lea completo.
+        with open(full_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            headers = {'Content-Length': str(size)}
+            if is_hashed_asset(full_path):
+                # Los archivos con el hash del contenido en el nombre no cambian nunca.
+                headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+            await self._respond(writer, 200, b'', content_type, extra_headers=headers, head=True)
+            if not head:
+                for chunk in iter(lambda: f.read(SEND_CHUNK_SIZE), b''):
+                    writer.write(chunk)
+                    await writer.drain()
+
+    async def _stream_events(self, writer):
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n'
+                     b'Connection: keep-alive\r\n\r\nretry: 1000\n\n')
+        await writer.drain()
+        queue = asyncio.Queue()
+        self._clients.add(queue)
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    message = b': keepalive\n\n'
+                writer.write(message)
+                await writer.drain()
+        finally:
+            self._clients.discard(queue)
+
+    async def serve(self, host, port):
+        """Genera el informe, inicia el servidor y vigila los archivos hasta que se interrumpa."""
+        await asyncio.to_thread(self.rebuild)
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Modo en vivo: informe disponible en http://{host}:{port}{self.report_url}")
+        print(f"Vigilando: {', '.join(self.watch_patterns)} (Ctrl+C para salir)")
+        async with server:
+            await self.watch()
+
+
+def serve_live(build, watch_patterns, root_dir, report_path, host='127.0.0.1', port=8000):
+    """
+    Inicia el modo en vivo (ver LiveReport) y bloquea hasta que se interrumpa con Ctrl+C.
+
+    Args:
+        build (callable): Función sin argumentos que genera el informe.
+        watch_patterns (list): Patrones glob de los archivos de entrada a vigilar.
+        root_dir (str): Directorio raíz desde el que se sirven los archivos (el directorio de salida).
+        report_path (str): Ruta del informe HTML generado, dentro de `root_dir`.
+        host (str): Dirección en la que escucha el servidor.
+        port (int): Puerto del servidor.
+    """
+    try:
+        asyncio.run(LiveReport(build, watch_patterns, root_dir, report_path).serve(host, port))
+    except KeyboardInterrupt:
+        print("Modo en vivo detenido.")
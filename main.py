@@ -1,11 +1,18 @@
-import pandas as pd
-import plotly.express as px
-import plotly.io as pio
-import folium
-import branca.colormap as cm
+import argparse
+import glob
+import itertools
 import re
 import os
-import json
+import sys
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from build_cache import BUILD_CACHE_DIRNAME, BuildCache
+from bundle import VENDOR_DIRNAME, bundle_html, minify_css, minify_js, precompress_tree
+from instrumentation import span, traced
+from report_writer import ReportTemplate, open_report
+
+# pandas, Plotly, Folium, branca y los módulos que dependen de ellos se importan dentro de las
+# funciones que los usan, así los comandos livianos (p. ej. 'validate') arrancan sin cargarlos.
 
 # --- Configuración de Rutas y Directorios ---
 # Obtiene el directorio base donde se ejecuta el script.
@@ -14,12 +21,9 @@ DATA_DIR = BASE_DIR  # Asume que los CSV y GeoJSON están en el mismo directorio
 MAPS_DIR = os.path.join(BASE_DIR, 'mapas')
 IMAGES_DIR = os.path.join(BASE_DIR, 'image')
 OUTPUT_DIR = os.path.join(BASE_DIR, 'output') # Directorio para el HTML final y el mapa de Folium.
+VENDOR_DIR = os.path.join(BASE_DIR, VENDOR_DIRNAME) # Copias locales de librerías y fuentes (modo --bundle).
 
-# Asegúrate de que estos directorios existan.
-for directory in [DATA_DIR, MAPS_DIR, IMAGES_DIR, OUTPUT_DIR]:
-    if not os.path.exists(directory):
-        os.makedirs(directory)
-        print(f"Directorio '{directory}' creado.")
+# Importar este módulo no crea directorios: el de salida se crea al generar el informe o el mapa.
 
 # Rutas completas a los archivos CSV.
 csv_file_path = os.path.join(DATA_DIR, 'Datos_Norte_NQN - departamentos.csv')
@@ -49,6 +53,13 @@ CANDIDATE_IMAGES_PRESIDENTE = {
     'Myriam Bregman': 'miryam.png'
 }
 
+# Candidatos a Presidente que se grafican, en este orden (las demás columnas del CSV de presidente,
+# como los votos en blanco o el porcentaje escrutado, quedan como columnas adicionales del cubo).
+PRESIDENTE_CANDIDATES = ['Sergio Massa', 'Javier Milei', 'Patricia Bullrich', 'Juan Schiaretti', 'Myriam Bregman']
+# Columna del CSV de presidente con el porcentaje escrutado de cada departamento. Si alguno está
+# por debajo del 100 %, la pestaña de Presidente agrega la proyección del resultado final.
+PRESIDENTE_ESCRUTADO_COLUMN = 'Escrutado (%)'
+
 # --- Configuración común para los gráficos Plotly ---
 # Diccionario para configurar el diseño de todos los gráficos de Plotly,
 # asegurando consistencia y buena visualización.
@@ -62,39 +73,38 @@ PLOTLY_LAYOUT_CONFIG = dict(
     bargap=0.15 # Espacio entre barras para claridad
 )
 
-# --- Funciones Auxiliares ---
+# --- Configuración de la simplificación de las capas GeoJSON ---
+# Tolerancia de simplificación en grados (0 desactiva la simplificación) y decimales
+# conservados en las coordenadas. Las versiones simplificadas se guardan en 'mapas/.simplificado'.
+GEOMETRY_SIMPLIFY_TOLERANCE = 0.0005
+GEOMETRY_COORD_PRECISION = 5
+GEOMETRY_EMIT_TOPOJSON = False
 
-def load_csv(file_path, **kwargs):
-    """
-    Carga un archivo CSV de forma segura, manejando errores comunes.
+# Capas GeoJSON de los departamentos (archivo en MAPS_DIR, nombre del departamento).
+DEPARTMENT_GEOJSON_FILES = [
+    ("minasg.geojson", "Minas"),
+    ("chosmalal.geojson", "Chos Malal"),
+    ("pehuenches.geojson", "Pehuenches"),
+    ("ñorquin.geojson", "Ñorquin"),
+    ("loncopue.geojson", "Loncopue")
+]
 
-    Args:
-        file_path (str): La ruta al archivo CSV.
-        **kwargs: Argumentos adicionales para pd.read_csv (ej. decimal, thousands).
+# Candidatos a Gobernador para los que se genera el resumen de localidades ganadas y perdidas.
+SUMMARY_CANDIDATES_GOBERNADOR = ['Rolando Figueroa']
 
-    Returns:
-        pd.DataFrame or None: El DataFrame cargado o None si ocurre un error.
-    """
-    try:
-        df = pd.read_csv(file_path, **kwargs)
-        return df
-    except FileNotFoundError:
-        print(f"Error: Archivo no encontrado en: {file_path}")
-        return None
-    except pd.errors.EmptyDataError:
-        print(f"Error: El archivo CSV está vacío: {file_path}")
-        return None
-    except pd.errors.ParserError as e:
-        print(f"Error al analizar el CSV {file_path}: {e}")
-        return None
-    except Exception as e:
-        print(f"Ocurrió un error inesperado al cargar {file_path}: {e}")
-        return None
+# Cantidad mínima de localidades por grupo al repartir los gráficos por localidad entre procesos.
+MIN_LOCALITIES_PER_CHUNK = 250
+
+# --- Funciones Auxiliares ---
 
 def create_candidate_images_html(candidate_images_map, image_dir, output_dir_for_relative_path):
     """
     Genera el fragmento HTML para mostrar las imágenes de los candidatos.
 
+    Cada foto se reduce al tamaño en que se muestra y se guarda con un nombre que incluye
+    el hash de su contenido en 'assets/candidatos' (ver assets.py), así que el navegador
+    descarga imágenes de pocos KB y puede cachearlas sin volver a pedirlas.
+
     Args:
         candidate_images_map (dict): Un diccionario de nombre de candidato a nombre de archivo de imagen.
         image_dir (str): El directorio donde se encuentran las imágenes.
@@ -103,19 +113,28 @@ def create_candidate_images_html(candidate_images_map, image_dir, output_dir_for
     Returns:
         str: Un string HTML que contiene las imágenes de los candidatos.
     """
+    from assets import ASSETS_DIRNAME, PLACEHOLDER_IMAGE, build_image_variants, picture_html
+
+    assets_dir = os.path.join(output_dir_for_relative_path, ASSETS_DIRNAME, 'candidatos')
+    # Genera la ruta relativa para el HTML, usando barras inclinadas para compatibilidad con URL.
+    base_url = os.path.relpath(assets_dir, output_dir_for_relative_path).replace('\\', '/') + '/'
     images_html = '<div class="candidate-images-container">'
     for candidate, image_filename in candidate_images_map.items():
         image_path_full = os.path.join(image_dir, image_filename)
-        # Genera la ruta relativa para el HTML, usando barras inclinadas para compatibilidad con URL.
-        display_path = os.path.relpath(image_path_full, output_dir_for_relative_path).replace('\\', '/')
-
-        if not os.path.exists(image_path_full):
+        try:
+            with span('imagen', candidato=candidate):
+                image_html = picture_html(build_image_variants(image_path_full, assets_dir), candidate, base_url,
+                                          'candidate-image')
+        except FileNotFoundError:
             print(f"Advertencia: Imagen no encontrada para '{candidate}': {image_path_full}")
-            # Si la imagen no existe, usa un placeholder para evitar enlaces rotos.
-            display_path = 'https://via.placeholder.com/100?text=No+Image'
+            # Si la imagen no existe, usa un placeholder incrustado para evitar enlaces rotos.
+            image_html = f'<img src="{PLACEHOLDER_IMAGE}" alt="{candidate}" class="candidate-image">'
+        except (OSError, ValueError) as e:
+            print(f"Advertencia: No se pudo procesar la imagen de '{candidate}': {e}")
+            image_html = f'<img src="{PLACEHOLDER_IMAGE}" alt="{candidate}" class="candidate-image">'
         images_html += f'''
             <div class="candidate-image-item">
-                <img src="{display_path}" alt="{candidate}" class="candidate-image">
+                {image_html}
                 <p class="candidate-name">{candidate}</p>
             </div>
         '''
@@ -135,52 +154,106 @@ def clean_filename(name):
     """
     return re.sub(r"[^a-zA-Z0-9_]", "", name.replace(" ", "_"))
 
-# --- Procesamiento Principal ---
+def figure_data_html(graph_id, figure):
+    """
+    Genera la etiqueta <script type="application/json"> con los datos de un gráfico.
+    El navegador no interpreta estas etiquetas, por lo que cada gráfico se parsea
+    recién cuando se va a renderizar.
+
+    Args:
+        graph_id (str): ID del contenedor del gráfico.
+        figure (dict): Figura compacta del payload (ver plotly_payload.PlotlyPayloadBuilder).
 
-def generate_election_report():
+    Returns:
+        str: La etiqueta HTML, precedida por un salto de línea.
     """
-    Genera el informe HTML completo con los gráficos y mapas electorales.
+    from plotly_payload import dumps_for_script
+
+    with span('json:figura', figura=graph_id) as figure_span:
+        data = dumps_for_script(figure)
+        figure_span.set(bytes=len(data))
+    return f'\n<script type="application/json" id="plotly-data-{graph_id}">{data}</script>'
+
+def create_candidate_summary_html(results, candidate_cols, candidate):
     """
-    tab1_content = "" # Contenido HTML para la pestaña de Gobernador.
-    tab_presidente_content = "" # Contenido HTML para la pestaña de Presidente.
-    plotly_graph_data = {} # Diccionario para almacenar los JSON de los gráficos de Plotly.
+    Genera el resumen de un candidato: localidades donde ganó, donde empató en el primer
+    puesto y donde no fue el más votado.
 
-    # --- Procesamiento de datos de Departamentos (Gobernador Provincial) ---
-    df = load_csv(csv_file_path)
-    if df is not None:
-        try:
-            # Transforma el DataFrame a formato largo para Plotly.
-            df_long = df.melt(id_vars=['Candidato'], var_name='Departamento', value_name='Votos')
-            df_long['Departamento'] = df_long['Departamento'].str.capitalize()
-
-            # Calcula el total de votos por departamento.
-            df_total_votos_depto = df_long.groupby('Departamento')['Votos'].sum().reset_index()
-            df_total_votos_depto.rename(columns={'Votos': 'TotalVotosDepartamento'}, inplace=True)
-
-            # Prepara los datos para los popups del mapa de Folium.
-            departamento_data = {}
-            for depto in df_long['Departamento'].unique():
-                total_votos = df_total_votos_depto[df_total_votos_depto['Departamento'] == depto]['TotalVotosDepartamento'].iloc[0] if depto in df_total_votos_depto['Departamento'].values else 0
-                votos_candidatos = df_long[df_long['Departamento'] == depto].set_index('Candidato')['Votos'].to_dict()
-                departamento_data[depto] = {
-                    'TotalVotos': total_votos,
-                    'Candidatos': votos_candidatos
-                }
+    Args:
+        results (pd.DataFrame): Resultados por localidad (ver analytics.analyze_units).
+        candidate_cols (list): Columnas de votos disponibles.
+        candidate (str): Nombre del candidato a resumir.
 
-            def create_popup_content(depto_name):
-                """Crea el contenido HTML para el popup de un departamento en el mapa."""
-                data = departamento_data.get(depto_name)
-                if not data:
-                    return f"<h3>{depto_name}</h3><p>Datos no disponibles.</p>"
-                content = f"<h3>Departamento: {depto_name}</h3>"
-                content += f"<p><b>Votos Totales:</b> {data['TotalVotos']}</p>"
-                content += "<p><b>Votos por Candidato:</b></p><ul>"
-                for candidato, votos in data['Candidatos'].items():
-                    content += f"<li>{candidato}: {votos}</li>"
-                content += "</ul>"
-                return content
-
-            # --- Gráfico 1: Resultados Electorales por Departamento y Candidato (Gobernador Provincial) ---
+    Returns:
+        str: El fragmento HTML del resumen (los nombres se escapan).
+    """
+    from html import escape
+
+    from analytics import candidate_summary
+
+    if candidate not in candidate_cols:
+        return (f'<p style="color: #dc3545;">Advertencia: La columna "{escape(candidate)}" no se encontró en el archivo de '
+                'localidades para el resumen. Verifique el nombre de la columna.</p>')
+    summary = candidate_summary(results, candidate)
+    candidate = escape(candidate)
+
+    def unit_list(units):
+        return '<ul style="color: #343a40;">' + ''.join(f'<li>{escape(str(unit))}</li>' for unit in units) + '</ul>'
+
+    html = f'<hr><h2 style="color: #0056b3;">Resumen de Resultados para {candidate} por Localidad</h2>'
+    html += f'<h3 style="color: #0056b3;">Localidades donde {candidate} ganó:</h3>'
+    if summary['won']:
+        html += unit_list(summary['won'])
+    else:
+        html += '<p style="color: #343a40;">No ganó en ninguna localidad donde se disponga de datos de votación válida para todos los candidatos.</p>'
+    if summary['tied']:
+        html += f'<h3 style="color: #0056b3;">Localidades donde {candidate} empató en el primer puesto:</h3>'
+        html += unit_list(summary['tied'])
+    html += f'<h3 style="color: #0056b3;">Localidades donde {candidate} no fue el más votado:</h3>'
+    if summary['lost']:
+        html += unit_list(summary['lost'])
+    else:
+        html += '<p style="color: #343a40;">Ganó en todas las localidades donde tuvo votos y donde se pudo determinar un ganador.</p>'
+    if summary['no_votes']:
+        html += '<h3 style="color: #0056b3;">Localidades sin votos válidos:</h3>'
+        html += unit_list(summary['no_votes'])
+    return html
+
+# --- Procesamiento Principal ---
+
+def build_departamentos_section(cube):
+    """
+    Genera los gráficos de Gobernador por departamento y el total de la Zona Norte.
+
+    Args:
+        cube (cube.ResultsCube): Cubo de resultados (ver load_report_cube).
+
+    Returns:
+        dict: {'html': mensaje de error o '', 'figures': especificaciones de los gráficos,
+        'table_html': tabla de ganador y margen por departamento}.
+    """
+    import pandas as pd
+    import plotly.express as px
+    from analytics import analyze_matrix, results_table_html
+    from ingest import CARGO_GOBERNADOR
+    from plotly_payload import figure_to_spec
+
+    section = {'html': '', 'figures': {}, 'table_html': ''}
+    if not cube.has(CARGO_GOBERNADOR, 'departamento'):
+        return section
+    try:
+        # Votos por departamento y candidato, leídos del cubo en el orden del CSV.
+        table = cube.table(CARGO_GOBERNADOR, 'departamento')
+        departamentos = [str(depto).capitalize() for depto in table.units]
+        # Formato largo para Plotly: una fila por departamento y candidato.
+        df_long = pd.DataFrame({
+            'Candidato': table.candidates * len(departamentos),
+            'Departamento': [depto for depto in departamentos for _ in table.candidates],
+            'Votos': table.votes.ravel(),
+        })
+
+        # --- Gráfico 1: Resultados Electorales por Departamento y Candidato (Gobernador Provincial) ---
+        with span('px.bar', figura='graph_gobernador_depto_candidato'):
             fig_depto_candidato = px.bar(df_long,
                                          x='Departamento',
                                          y='Votos',
@@ -194,13 +267,14 @@ def generate_election_report():
                                          color_discrete_sequence=px.colors.qualitative.D3)
             fig_depto_candidato.update_traces(textposition='outside', textangle=0, textfont=dict(color='black', size=12))
             fig_depto_candidato.update_layout(**PLOTLY_LAYOUT_CONFIG)
-            # Guarda el gráfico como JSON para ser incrustado en el HTML.
-            plotly_graph_data['graph_gobernador_depto_candidato'] = pio.to_json(fig_depto_candidato)
+        # Guarda la especificación del gráfico para ser incrustada en el HTML.
+        section['figures']['graph_gobernador_depto_candidato'] = figure_to_spec(fig_depto_candidato)
 
-            # --- Gráfico 2: Resultados Electorales Totales en la Zona Norte (Gobernador Provincial) ---
-            df_total_votos = df.set_index('Candidato').sum(axis=1).reset_index(name='TotalVotos')
-            df_total_votos.rename(columns={'index': 'Candidato'}, inplace=True)
+        # --- Gráfico 2: Resultados Electorales Totales en la Zona Norte (Gobernador Provincial) ---
+        zona = cube.table(CARGO_GOBERNADOR, 'zona')
+        df_total_votos = pd.DataFrame({'Candidato': zona.candidates, 'TotalVotos': zona.votes[0]})
 
+        with span('px.bar', figura='graph_gobernador_total_zona_norte'):
             fig_total_zona_norte = px.bar(df_total_votos,
                                           x='Candidato',
                                           y='TotalVotos',
@@ -212,60 +286,148 @@ def generate_election_report():
                                           color_discrete_sequence=px.colors.qualitative.D3)
             fig_total_zona_norte.update_traces(textposition='outside', textangle=0, textfont=dict(color='black', size=12))
             fig_total_zona_norte.update_layout(**PLOTLY_LAYOUT_CONFIG)
-            # Guarda el gráfico como JSON para ser incrustado en el HTML.
-            plotly_graph_data['graph_gobernador_total_zona_norte'] = pio.to_json(fig_total_zona_norte)
-
-            # --- Generar el mapa con Folium ---
-            map_center = [-37.37, -70.56] # Coordenadas para centrar el mapa en la zona norte de Neuquén.
-            m = folium.Map(location=map_center, zoom_start=9)
-
-            geojson_files = [
-                ("minasg.geojson", "Minas"),
-                ("chosmalal.geojson", "Chos Malal"),
-                ("pehuenches.geojson", "Pehuenches"),
-                ("ñorquin.geojson", "Ñorquin"),
-                ("loncopue.geojson", "Loncopue")
-            ]
-
-            min_votos, max_votos = 0, 1 # Valores por defecto para la leyenda del mapa.
-            votos_existentes = [data['TotalVotos'] for data in departamento_data.values() if data['TotalVotos'] is not None]
-            if votos_existentes:
-                min_votos = min(votos_existentes)
-                # Asegura que max_votos sea mayor que min_votos para evitar errores en el colormap.
-                max_votos = max(votos_existentes) if max(votos_existentes) > min_votos else min_votos + 1
-
-            # Define un mapa de colores lineal para el mapa de coropletas.
-            colormap = cm.LinearColormap(colors=['#f0f0f0', '#e31a1c', '#800026'],
-                                         index=[min_votos, (min_votos + max_votos) / 2, max_votos],
-                                         caption='Votos Totales por Departamento')
-
-            def style_function(feature):
-                """Función de estilo para el GeoJSON, colorea según los votos totales."""
-                depto_name_raw = feature['properties'].get('nombre', '').strip()
-                depto_name = depto_name_raw.capitalize()
-                total_votos = departamento_data.get(depto_name, {}).get('TotalVotos', 0)
-                return {
-                    'fillColor': colormap(total_votos),
-                    'color': 'black',
-                    'weight': 1,
-                    'fillOpacity': 0.6
-                }
+        # Guarda la especificación del gráfico para ser incrustada en el HTML.
+        section['figures']['graph_gobernador_total_zona_norte'] = figure_to_spec(fig_total_zona_norte)
+
+        # --- Tabla de ganador y margen por departamento ---
+        section['table_html'] = ('<h2 style="color: #0056b3;">Ganador y Margen por Departamento (Gobernador Provincial)</h2>'
+                                 + results_table_html(analyze_matrix(departamentos, table.candidates, table.votes,
+                                                                     'Departamento'), 'Departamento'))
+
+    except Exception as e:
+        section['html'] = f"<p>Ocurrió un error al procesar los datos de departamentos: {e}</p>"
+        print(f"Error al procesar datos de departamentos: {e}")
+    return section
+
+def assign_deterministic_ids(root):
+    """
+    Reemplaza los IDs aleatorios que Folium/branca asignan a cada elemento por IDs
+    secuenciales, para que el mismo mapa produzca siempre el mismo HTML (necesario
+    para la caché incremental y para que la ejecución en paralelo sea reproducible).
+
+    Args:
+        root (branca.element.Element): Elemento raíz (normalmente `m.get_root()`).
+    """
+    counter = itertools.count()
+    pending = [root]
+    while pending:
+        element = pending.pop(0)
+        element._id = f'{next(counter):032x}'
+        children = getattr(element, '_children', None)
+        if children:
+            pending.extend(children.values())
+
+def build_department_map(cube, output_path, tiled=False, bundle=False, region=None):
+    """
+    Genera el mapa de coropletas de los departamentos con Folium y lo guarda como HTML.
+
+    Con `tiled`, las geometrías no se incrustan en el HTML: se cortan en una pirámide de
+    teselas z/x/y (ver tiles.py), simplificadas para cada zoom y con los votos incluidos,
+    que el mapa descarga a medida que se recorre. Las teselas se guardan en el directorio
+    MAP_TILES_DIRNAME junto al mapa, que en ese caso debe servirse por HTTP (p. ej. con --live).
+
+    El mapa tiene una vista de votos totales, una de ganador y una de porcentaje por candidato,
+    que se eligen en el control de capas. Las geometrías se incluyen una sola vez: cada feature
+    lleva el color de cada vista y el navegador solo cambia el relleno (ver map_views.py).
+
+    Args:
+        cube (cube.ResultsCube): Cubo de resultados con los votos de Gobernador por departamento.
+        output_path (str): Ruta del archivo HTML del mapa.
+        tiled (bool): Si es True, genera el mapa con teselas cargadas bajo demanda.
+        bundle (bool): Si es True, el HTML del mapa usa copias locales de Leaflet y se minifica (ver bundle.py).
+        region (list): Departamentos a mostrar. Por defecto se muestran todas las capas.
 
-            # Añade las capas GeoJSON al mapa.
-            for geojson_file, depto_name in geojson_files:
-                geojson_path = os.path.join(MAPS_DIR, geojson_file)
-                try:
-                    if os.path.exists(geojson_path):
-                        popup_content = create_popup_content(depto_name)
-                        folium.GeoJson(
-                            geojson_path,
-                            style_function=style_function,
-                            popup=folium.Popup(popup_content, max_width=300)
-                        ).add_to(m)
-                    else:
-                        print(f"Advertencia: Archivo GeoJSON no encontrado: {geojson_path}. No se añadirá al mapa.")
-                except Exception as e:
-                    print(f"Error al procesar {geojson_file}: {e}")
+    Returns:
+        str: El fragmento HTML con el título y el iframe del mapa, o un mensaje de error.
+    """
+    import folium
+    from geometry import load_department_features
+    from ingest import CARGO_GOBERNADOR, normalize_name
+    from map_views import MapViews, build_map_views
+    from tiles import MAP_TILES_DIRNAME, TiledGeoJson, build_tile_pyramid
+
+    try:
+        # El cubo cruza los nombres del CSV con los de las capas GeoJSON por su nombre normalizado.
+        def create_popup_content(depto_name, shares):
+            """Crea el contenido HTML para el popup de un departamento en el mapa."""
+            votos_candidatos = cube.unit_votes(CARGO_GOBERNADOR, 'departamento', depto_name)
+            if not votos_candidatos:
+                return f"<h3>{depto_name}</h3><p>Datos no disponibles.</p>"
+            content = f"<h3>Departamento: {depto_name}</h3>"
+            content += f"<p><b>Votos Totales:</b> {cube.unit_total(CARGO_GOBERNADOR, 'departamento', depto_name)}</p>"
+            content += "<p><b>Votos por Candidato:</b></p><ul>"
+            for (candidato, votos), porcentaje in zip(votos_candidatos.items(), shares):
+                content += f"<li>{candidato}: {votos} ({porcentaje:.1f}%)</li>"
+            content += "</ul>"
+            return content
+
+        # --- Generar el mapa con Folium ---
+        map_center = [-37.37, -70.56] # Coordenadas para centrar el mapa en la zona norte de Neuquén.
+        # Con prefer_canvas, Leaflet dibuja los polígonos en un solo canvas en lugar de un nodo SVG por feature.
+        m = folium.Map(location=map_center, zoom_start=9, prefer_canvas=True)
+
+        # Colores de todas las vistas (totales, ganador y porcentaje por candidato) en un solo paso.
+        table = cube.table(CARGO_GOBERNADOR, 'departamento')
+        map_views = build_map_views(table.candidates, table.votes)
+        fila_por_clave = {normalize_name(depto): i for i, depto in enumerate(table.units)}
+
+        # Carga todas las capas una sola vez (simplificadas y cacheadas) en una única FeatureCollection
+        # y les incorpora los totales, los colores de cada vista y el contenido del popup.
+        # Las teselas parten de la geometría completa y se simplifican por zoom.
+        with span('mapa:geometrias'):
+            departamentos_geojson = load_department_features(
+                department_geojson_layers(),
+                tolerance=0 if tiled else GEOMETRY_SIMPLIFY_TOLERANCE,
+                precision=GEOMETRY_COORD_PRECISION,
+                topojson=GEOMETRY_EMIT_TOPOJSON and not tiled)
+        if region:
+            # Las capas se simplifican siempre todas juntas (y se comparten entre informes);
+            # la región solo elige qué departamentos se dibujan.
+            region_keys = {normalize_name(depto) for depto in region}
+            departamentos_geojson['features'] = [feature for feature in departamentos_geojson['features']
+                                                 if normalize_name(feature['properties']['departamento']) in region_keys]
+        for feature in departamentos_geojson['features']:
+            properties = feature['properties']
+            total_votos = cube.unit_total(CARGO_GOBERNADOR, 'departamento', properties['departamento'])
+            properties['TotalVotos'] = total_votos
+            fila = fila_por_clave.get(normalize_name(properties['departamento']))
+            properties['colors'] = map_views['missing'] if fila is None else map_views['colors'][fila]
+            # El relleno inicial es el de la primera vista (votos totales).
+            properties['fillColor'] = properties['colors'][map_views['views'][0]['key']]
+            shares = [] if fila is None else map_views['shares'][fila].tolist()
+            properties['popup'] = create_popup_content(properties['departamento'], shares)
+
+        def style_function(feature):
+            """Función de estilo para el GeoJSON, usa el color precalculado de cada departamento."""
+            return {
+                'fillColor': feature['properties']['fillColor'],
+                'color': 'black',
+                'weight': 1,
+                'fillOpacity': 0.6
+            }
+
+        if tiled:
+            # Corta los departamentos en teselas y añade la capa que las carga bajo demanda.
+            tiles_dir = os.path.join(os.path.dirname(output_path), MAP_TILES_DIRNAME)
+            with span('mapa:teselas') as tiles_span:
+                tile_index = build_tile_pyramid(departamentos_geojson, tiles_dir)
+                tiles_span.set(teselas=len(tile_index['tiles']))
+            tiled_layer = TiledGeoJson(tile_index, f'{MAP_TILES_DIRNAME}/{{z}}/{{x}}/{{y}}.geojson',
+                                       style={'color': 'black', 'weight': 1, 'fillOpacity': 0.6})
+            tiled_layer.add_to(m)
+            views_target = tiled_layer
+            if tile_index['bounds']:
+                m.fit_bounds(tiled_layer.bounds())
+        else:
+            # Añade todos los departamentos al mapa como una sola capa con popups por feature.
+            views_target = None
+            if departamentos_geojson['features']:
+                views_target = folium.GeoJson(
+                    departamentos_geojson,
+                    name='Departamentos',
+                    style_function=style_function,
+                    popup=folium.GeoJsonPopup(fields=['popup'], labels=False, max_width=300)
+                ).add_to(m)
 
             # Ajusta los límites del mapa para que se adapten a las capas GeoJSON añadidas.
             try:
@@ -273,140 +435,273 @@ def generate_election_report():
             except Exception as e:
                 print(f"Advertencia: No se pudieron ajustar los límites del mapa. Error: {e}")
 
-            # Añade la leyenda del mapa de colores.
-            colormap.add_to(m)
+        # Añade el selector de vistas y su leyenda.
+        if views_target is not None:
+            MapViews(views_target, map_views['views']).add_to(m)
+
+        # Guarda el mapa de Folium como un archivo HTML separado, con IDs reproducibles.
+        assign_deterministic_ids(m.get_root())
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with span('mapa:guardar') as save_span:
+            if bundle:
+                with open(output_path, 'w', encoding='utf-8') as f:
+                    f.write(bundle_html(m.get_root().render(), os.path.dirname(output_path), VENDOR_DIR))
+            else:
+                m.save(output_path)
+            save_span.set(bytes=os.path.getsize(output_path))
+        print(f"Mapa interactivo de departamentos guardado en: {output_path}")
+
+        # Añade el iframe del mapa al contenido de la pestaña.
+        map_html = '<h3 align="center" style="font-size:16px; color: #0056b3;"><b>Votos por Departamento en la Zona Norte Neuquino</b></h3>'
+        # Calcula la ruta relativa para el iframe del mapa en el HTML final.
+        map_display_path = os.path.relpath(output_path, OUTPUT_DIR).replace('\\', '/')
+        map_html += f'<div class="map-container"><iframe src="{map_display_path}" width="100%" height="400px" frameborder="0"></iframe></div>'
+        return map_html
+
+    except Exception as e:
+        print(f"Error al procesar datos de departamentos: {e}")
+        return f"<p>Ocurrió un error al procesar los datos de departamentos: {e}</p>"
+
+def build_locality_charts(names, votes, candidates):
+    """
+    Genera los gráficos de un grupo de localidades. Es una función de nivel de módulo
+    para poder ejecutarse en un proceso del pool.
+
+    Args:
+        names (list): Nombres de las localidades del grupo.
+        votes (np.ndarray): Votos del grupo (localidades × candidatos), tomados del cubo.
+        candidates (list): Nombres de los candidatos, uno por columna de `votes`.
+
+    Returns:
+        tuple: (fragmento HTML con los contenedores de los gráficos, especificaciones de los gráficos).
+    """
+    from charts import locality_figures_from_matrix
+    from plotly_payload import figure_to_spec
+
+    html = ''
+    figures = {}
+    # Arma todos los gráficos por localidad en un solo paso sobre la matriz de votos.
+    with span('graficos:localidades', localidades=len(names)):
+        locality_figures = locality_figures_from_matrix(names, votes, candidates)
+    for localidad_name, locality_spec in locality_figures:
+        # Solo genera el gráfico si hay votos válidos.
+        if locality_spec is not None:
+            # Genera un ID único y limpio para el div del gráfico.
+            graph_id = f'localidad_graph_{clean_filename(localidad_name)}'
+            figures[graph_id] = figure_to_spec(locality_spec)
+            html += f'<div class="plotly-graph-container" id="{graph_id}"></div>'
+        else:
+            html += f"<p>Advertencia: No hay datos de votos válidos para {localidad_name}.</p>"
+    return html, figures
+
+def split_units(n_units, n_chunks):
+    """
+    Divide las unidades de una tabla del cubo en grupos contiguos (respetando su orden).
+
+    Args:
+        n_units (int): Cantidad de unidades (localidades).
+        n_chunks (int): Cantidad máxima de grupos deseada.
+
+    Returns:
+        list: Lista de slices, uno por grupo.
+    """
+    n_chunks = max(1, min(n_chunks, n_units // MIN_LOCALITIES_PER_CHUNK))
+    # La unidad i va al grupo i * n_chunks // n_units; cada grupo empieza en ceil(k * n_units / n_chunks).
+    bounds = [-(-k * n_units // n_chunks) for k in range(n_chunks + 1)]
+    return [slice(bounds[k], bounds[k + 1]) for k in range(n_chunks)]
 
-            # Guarda el mapa de Folium como un archivo HTML separado.
-            m.save(mapa_output_path)
-            print(f"Mapa interactivo de departamentos guardado en: {mapa_output_path}")
+def build_localidades_section(cube, map_chunks=map, n_chunks=1):
+    """
+    Genera los gráficos por localidad y el resumen de resultados de Rolando Figueroa.
 
-            # Añade el iframe del mapa al contenido de la pestaña.
-            tab1_content += '<h3 align="center" style="font-size:16px; color: #0056b3;"><b>Votos por Departamento en la Zona Norte Neuquino</b></h3>'
-            # Calcula la ruta relativa para el iframe del mapa en el HTML final.
-            map_display_path = os.path.relpath(mapa_output_path, OUTPUT_DIR).replace('\\', '/')
-            tab1_content += f'<div class="map-container"><iframe src="{map_display_path}" width="100%" height="400px" frameborder="0"></iframe></div>'
+    Args:
+        cube (cube.ResultsCube): Cubo de resultados (ver load_report_cube).
+        map_chunks (callable): Función con la firma de `map` usada para procesar los grupos de
+            localidades (p. ej. `executor.map` de un pool de procesos).
+        n_chunks (int): Cantidad máxima de grupos en que se dividen las localidades.
 
-        except Exception as e:
-            tab1_content += f"<p>Ocurrió un error al procesar los datos de departamentos: {e}</p>"
-            print(f"Error al procesar datos de departamentos: {e}")
+    Returns:
+        dict: {'html_parts': fragmentos HTML de la sección, en orden (uno por grupo de localidades,
+        para escribirlos y liberarlos de a uno), 'figures': especificaciones de los gráficos,
+        'summary_html': resumen por candidato y tabla de ganador y margen por localidad}.
+    """
+    from analytics import analyze_matrix, results_table_html
+    from ingest import CARGO_GOBERNADOR
 
-    # Añade las imágenes de los candidatos a Gobernador al contenido de la pestaña.
-    tab1_content += create_candidate_images_html(CANDIDATE_IMAGES_GOBERNADOR, IMAGES_DIR, OUTPUT_DIR)
-    # Añade los contenedores (divs) donde Plotly renderizará los gráficos.
-    tab1_content += f'<div class="plotly-graph-container" id="graph_gobernador_depto_candidato"></div>'
-    tab1_content += f'<div class="plotly-graph-container" id="graph_gobernador_total_zona_norte"></div>'
+    section = {'html_parts': [], 'figures': {}, 'summary_html': ''}
+    if not cube.has(CARGO_GOBERNADOR, 'localidad'):
+        return section
+    # Una fila por localidad (las filas repetidas ya se sumaron al armar el cubo).
+    table = cube.table(CARGO_GOBERNADOR, 'localidad')
 
     # --- Generar gráficos por localidad ---
-    df_localidades = load_csv(localidades_csv_file_path)
-    if df_localidades is not None:
-        try:
-            # Convierte las columnas de votos a entero, manejando valores nulos o guiones.
-            voto_cols_localidades = [col for col in df_localidades.columns if col not in ['Localidad', 'Departamento']]
-            for col in voto_cols_localidades:
-                df_localidades[col] = df_localidades[col].replace('-', '0').astype(int)
-
-            all_localities_from_data = df_localidades['Localidad'].unique().tolist()
-
-            tab1_content += '<hr><h2 style="color: #0056b3;">Resultados Electorales por Localidad (Gobernador Provincial)</h2>'
-            for localidad_name in all_localities_from_data:
-                df_current_locality = df_localidades[df_localidades['Localidad'] == localidad_name].copy()
-                if not df_current_locality.empty:
-                    df_current_locality_long = df_current_locality.melt(id_vars=['Localidad', 'Departamento'],
-                                                                        var_name='Candidato',
-                                                                        value_name='Votos')
-                    # Solo genera el gráfico si hay votos válidos.
-                    if not df_current_locality_long.empty and df_current_locality_long['Votos'].sum() > 0:
-                        fig_locality = px.bar(df_current_locality_long,
-                                              x='Candidato',
-                                              y='Votos',
-                                              color='Candidato',
-                                              title=f'Resultados Electorales en {localidad_name}',
-                                              labels={'Votos': 'Cantidad de Votos', 'Candidato': ''},
-                                              text='Votos',
-                                              opacity=0.7,
-                                              color_discrete_sequence=px.colors.qualitative.D3)
-                        fig_locality.update_traces(textposition='outside', textangle=0,
-                                                   textfont=dict(color='black', size=12))
-                        fig_locality.update_layout(**PLOTLY_LAYOUT_CONFIG)
-
-                        # Genera un ID único y limpio para el div del gráfico.
-                        graph_id = f'localidad_graph_{clean_filename(localidad_name)}'
-                        plotly_graph_data[graph_id] = pio.to_json(fig_locality)
-                        tab1_content += f'<div class="plotly-graph-container" id="{graph_id}"></div>'
-                    else:
-                        tab1_content += f"<p>Advertencia: No hay datos de votos válidos para {localidad_name}.</p>"
-                else:
-                    print(f"Advertencia: Datos para la localidad '{localidad_name}' no encontrados en el archivo.")
-
-        except Exception as e:
-            tab1_content += f"<p>Ocurrió un error al procesar el archivo de localidades: {e}</p>"
-            print(f"Error al procesar datos de localidades: {e}")
-
-    # --- Resumen de resultados para Rolando Figueroa ---
-    if df_localidades is not None:
-        try:
-            voto_cols_summary = [col for col in df_localidades.columns if col not in ['Localidad', 'Departamento']]
-            # Verifica si la columna de Rolando Figueroa existe para el resumen.
-            if 'Rolando Figueroa' in voto_cols_summary:
-                # Encuentra al ganador por localidad.
-                df_localidades['Ganador_Localidad'] = df_localidades[voto_cols_summary].idxmax(axis=1)
-                df_localidades['Max_Votos_Localidad'] = df_localidades[voto_cols_summary].max(axis=1)
-
-                localidades_ganadas_rf = []
-                localidades_perdidas_rf = []
-
-                for index, row in df_localidades.iterrows():
-                    localidad = row['Localidad']
-                    votos_rf = row.get('Rolando Figueroa', 0)
-
-                    ganador_localidad = row['Ganador_Localidad']
-                    max_votos_localidad = row['Max_Votos_Localidad']
-
-                    # Se considera que ganó si sus votos son los máximos y hay al menos un voto.
-                    if votos_rf == max_votos_localidad and votos_rf > 0:
-                        localidades_ganadas_rf.append(localidad)
-                    else:
-                        localidades_perdidas_rf.append(localidad)
-
-                tab1_content += '<hr><h2 style="color: #0056b3;">Resumen de Resultados para Rolando Figueroa por Localidad</h2>'
-                tab1_content += '<h3 style="color: #0056b3;">Localidades donde Rolando Figueroa ganó:</h3>'
-                if localidades_ganadas_rf:
-                    tab1_content += '<ul style="color: #343a40;">'
-                    for loc in sorted(localidades_ganadas_rf):
-                        tab1_content += f'<li>{loc}</li>'
-                    tab1_content += '</ul>'
-                else:
-                    tab1_content += '<p style="color: #343a40;">No ganó en ninguna localidad donde se disponga de datos de votación válida para todos los candidatos.</p>'
-
-                tab1_content += '<h3 style="color: #0056b3;">Localidades donde Rolando Figueroa no fue el más votado:</h3>'
-                if localidades_perdidas_rf:
-                    tab1_content += '<ul style="color: #343a40;">'
-                    for loc in sorted(localidades_perdidas_rf):
-                        tab1_content += f'<li>{loc}</li>'
-                    tab1_content += '</ul>'
-                else:
-                    tab1_content += '<p style="color: #343a40;">Ganó en todas las localidades donde tuvo votos y donde se pudo determinar un ganador.</p>'
-            else:
-                tab1_content += '<p style="color: #dc3545;">Advertencia: La columna "Rolando Figueroa" no se encontró en el archivo de localidades para el resumen. Verifique el nombre de la columna.</p>'
+    try:
+        section['html_parts'].append('<hr><h2 style="color: #0056b3;">Resultados Electorales por Localidad (Gobernador Provincial)</h2>')
+        # Los grupos de localidades se procesan con `map_chunks` (en serie o en un pool de procesos)
+        # y se unen en el orden original, de modo que el resultado no depende del modo de ejecución.
+        chunks = split_units(len(table.units), n_chunks)
+        for chunk_html, chunk_figures in map_chunks(build_locality_charts,
+                                                    [table.units[chunk] for chunk in chunks],
+                                                    [table.votes[chunk] for chunk in chunks],
+                                                    [table.candidates] * len(chunks)):
+            section['html_parts'].append(chunk_html)
+            section['figures'].update(chunk_figures)
 
-        except Exception as e:
-            tab1_content += f"<p>Ocurrió un error al generar el resumen de Rolando Figueroa: {e}</p>"
-            print(f"Error al generar resumen de Rolando Figueroa: {e}")
+    except Exception as e:
+        section['html_parts'].append(f"<p>Ocurrió un error al procesar el archivo de localidades: {e}</p>")
+        print(f"Error al procesar datos de localidades: {e}")
 
-    # --- Procesamiento de datos de Presidente y generación de gráfico ---
-    # `decimal=','` y `thousands='.'` son cruciales para CSVs con formato numérico europeo.
-    df_presidente = load_csv(presidente_csv_file_path, decimal=',', thousands='.')
-    if df_presidente is not None:
-        try:
-            candidatos_presidente = ['Sergio Massa', 'Javier Milei', 'Patricia Bullrich', 'Juan Schiaretti', 'Myriam Bregman']
-            existing_president_cols = [col for col in candidatos_presidente if col in df_presidente.columns]
-            if not existing_president_cols:
-                tab_presidente_content = "<p>Advertencia: No se encontraron datos de candidatos presidenciales en el archivo.</p>"
-                print("Advertencia: Ninguna columna de candidato presidencial reconocida encontrada en el CSV de presidente.")
-            else:
-                df_presidente_long = df_presidente.melt(id_vars=['Departamento'], value_vars=existing_president_cols,
-                                                        var_name='Candidato', value_name='Votos')
+    # --- Resumen de resultados por candidato y tabla de ganadores por localidad ---
+    try:
+        # Ganador, segundo, margen, empates y puesto de cada candidato, en un solo paso sobre la matriz de votos.
+        results = analyze_matrix(table.units, table.candidates, table.votes, 'Localidad')
+        for candidate in SUMMARY_CANDIDATES_GOBERNADOR:
+            section['summary_html'] += create_candidate_summary_html(results, table.candidates, candidate)
+        section['summary_html'] += '<hr><h2 style="color: #0056b3;">Ganador y Margen por Localidad (Gobernador Provincial)</h2>'
+        section['summary_html'] += results_table_html(results, 'Localidad')
+
+    except Exception as e:
+        section['summary_html'] = f"<p>Ocurrió un error al generar el resumen por localidad: {e}</p>"
+        print(f"Error al generar el resumen por localidad: {e}")
+
+    return section
+
+def build_presidente_projection(table):
+    """
+    Proyecta el resultado final de Presidente cuando el escrutinio de algún departamento no
+    terminó (ver projection.project_results) y arma sus gráficos: votos finales proyectados en
+    la Zona Norte, con su intervalo de confianza, y probabilidad de ganar en cada departamento.
+
+    Args:
+        table (cube.CubeTable): Votos de Presidente por departamento, con la columna adicional
+            PRESIDENTE_ESCRUTADO_COLUMN.
 
+    Returns:
+        dict: {'html': contenedores de los gráficos, 'note_html': título y nota sobre la simulación
+        (cambia con los datos), 'figures': especificaciones de los gráficos}, o None si no hay
+        porcentaje escrutado o ya está todo escrutado.
+    """
+    import numpy as np
+    import pandas as pd
+    import plotly.express as px
+    from plotly_payload import figure_to_spec
+    from projection import project_results
+
+    escrutado = table.extras.get(PRESIDENTE_ESCRUTADO_COLUMN)
+    if escrutado is None:
+        return None
+    escrutado = np.asarray(escrutado, dtype=np.float64) / 100
+    if not (escrutado < 1).any():
+        return None
+
+    with span('proyeccion', unidades=len(table.units)):
+        projection = project_results(table.units, table.candidates, table.votes, escrutado)
+    figures = {}
+    confianza = round(projection.confidence * 100)
+
+    # --- Gráfico: votos finales proyectados en la Zona Norte ---
+    total_escrutado = projection.total_counted.sum() / projection.total_mean.sum() * 100
+    df_total = pd.DataFrame({
+        'Candidato': projection.candidates,
+        'Votos Proyectados': projection.total_mean.round(),
+        'Votos Escrutados': projection.total_counted,
+        'Mínimo': projection.total_low.round(),
+        'Máximo': projection.total_high.round(),
+        'Probabilidad de Ganar (%)': (projection.total_win_probability * 100).round(1),
+    })
+    df_total['Texto'] = [f'{votos / df_total["Votos Proyectados"].sum() * 100:.1f}% · P(ganar) {prob:g}%'
+                         for votos, prob in zip(df_total['Votos Proyectados'], df_total['Probabilidad de Ganar (%)'])]
+    with span('px.bar', figura='graph_presidente_proyeccion'):
+        fig_total = px.bar(df_total,
+                           x='Candidato',
+                           y='Votos Proyectados',
+                           color='Candidato',
+                           error_y=df_total['Máximo'] - df_total['Votos Proyectados'],
+                           error_y_minus=df_total['Votos Proyectados'] - df_total['Mínimo'],
+                           title=f'Proyección del Resultado Final en la Zona Norte (Presidente, '
+                                 f'{total_escrutado:.1f}% escrutado)',
+                           labels={'Votos Proyectados': 'Votos Finales Proyectados', 'Candidato': ''},
+                           hover_data={'Candidato': True, 'Votos Escrutados': True, 'Mínimo': True,
+                                       'Máximo': True, 'Probabilidad de Ganar (%)': True},
+                           text='Texto',
+                           opacity=0.7,
+                           color_discrete_sequence=px.colors.qualitative.D3)
+        fig_total.update_traces(textposition='outside', textangle=0, textfont=dict(color='black', size=12))
+        fig_total.update_layout(**PLOTLY_LAYOUT_CONFIG)
+    figures['graph_presidente_proyeccion'] = figure_to_spec(fig_total)
+
+    # --- Gráfico: probabilidad de ganar por departamento ---
+    df_prob = pd.DataFrame({
+        'Departamento': list(projection.units) * len(projection.candidates),
+        'Candidato': [candidato for candidato in projection.candidates for _ in projection.units],
+        'Probabilidad de Ganar (%)': (projection.win_probability.T.ravel() * 100).round(1),
+        'Escrutado (%)': np.tile(projection.scrutinized * 100, len(projection.candidates)).round(1),
+    })
+    with span('px.bar', figura='graph_presidente_prob_depto'):
+        fig_prob = px.bar(df_prob,
+                          x='Departamento',
+                          y='Probabilidad de Ganar (%)',
+                          color='Candidato',
+                          barmode='group',
+                          title='Probabilidad de Ganar por Departamento (Presidente, proyección)',
+                          labels={'Departamento': ''},
+                          hover_data={'Candidato': True, 'Departamento': True, 'Probabilidad de Ganar (%)': True,
+                                      'Escrutado (%)': True},
+                          opacity=0.7,
+                          color_discrete_sequence=px.colors.qualitative.D3)
+        fig_prob.update_layout(**PLOTLY_LAYOUT_CONFIG, xaxis_title_text='', yaxis_range=[0, 105])
+    figures['graph_presidente_prob_depto'] = figure_to_spec(fig_prob)
+
+    simulaciones = f'{projection.draws:,}'.replace(',', '.')
+    simulaciones_depto = f'{projection.unit_draws:,}'.replace(',', '.')
+    note_html = ('<h2 style="color: #0056b3;">Proyección del Resultado Final (Presidente)</h2>'
+                 f'<p>Proyección a partir del escrutinio parcial con {simulaciones_depto} simulaciones de las mesas '
+                 f'que faltan escrutar en cada departamento y {simulaciones} del total de la Zona Norte; '
+                 f'las barras de error son intervalos del {confianza}%.</p>')
+    html = ('<div class="plotly-graph-container" id="graph_presidente_proyeccion"></div>'
+            '<div class="plotly-graph-container" id="graph_presidente_prob_depto"></div>')
+    return {'html': html, 'note_html': note_html, 'figures': figures}
+
+def build_presidente_section(cube):
+    """
+    Genera el gráfico de resultados presidenciales por departamento y, si el escrutinio no
+    terminó, la proyección del resultado final (ver build_presidente_projection).
+
+    Args:
+        cube (cube.ResultsCube): Cubo de resultados (ver load_report_cube).
+
+    Returns:
+        dict: {'html': contenido HTML de la pestaña, 'figures': especificaciones de los gráficos,
+        'table_html': tabla de ganador y margen por departamento, 'projection_note_html' y
+        'projection_html': nota y gráficos de la proyección, 'show_images': True si deben añadirse
+        las imágenes de los candidatos}.
+    """
+    import pandas as pd
+    import plotly.express as px
+    from analytics import analyze_matrix, results_table_html
+    from ingest import CARGO_PRESIDENTE
+    from plotly_payload import figure_to_spec
+
+    section = {'html': '', 'figures': {}, 'table_html': '', 'projection_note_html': '', 'projection_html': '',
+               'show_images': False}
+    if not cube.has(CARGO_PRESIDENTE, 'departamento'):
+        section['html'] = "<p>No se pudo cargar el archivo de datos de Presidente.</p>"
+        return section
+    try:
+        # El cubo conserva solo las columnas de PRESIDENTE_CANDIDATES presentes en el CSV, en ese orden.
+        table = cube.table(CARGO_PRESIDENTE, 'departamento')
+        if not table.candidates:
+            section['html'] = "<p>Advertencia: No se encontraron datos de candidatos presidenciales en el archivo.</p>"
+            print("Advertencia: Ninguna columna de candidato presidencial reconocida encontrada en el CSV de presidente.")
+        else:
+            # Formato largo para Plotly: una fila por candidato y departamento.
+            df_presidente_long = pd.DataFrame({
+                'Departamento': table.units * len(table.candidates),
+                'Candidato': [candidato for candidato in table.candidates for _ in table.units],
+                'Votos': table.votes.T.ravel(),
+            })
+
+            with span('px.bar', figura='graph_presidente_depto'):
                 fig_presidente = px.bar(df_presidente_long,
                                         x='Departamento',
                                         y='Votos',
@@ -420,59 +715,222 @@ def generate_election_report():
                                         text_auto=True) # Muestra los valores de texto automáticamente.
                 fig_presidente.update_layout(**PLOTLY_LAYOUT_CONFIG, xaxis_title_text='')
 
-                # Guarda el gráfico como JSON para ser incrustado en el HTML.
-                plotly_graph_data['graph_presidente_depto'] = pio.to_json(fig_presidente)
-                # Añade el contenedor (div) para el gráfico de presidente.
-                tab_presidente_content = f'<div class="plotly-graph-container" id="graph_presidente_depto"></div>'
-                # Añade las imágenes de los candidatos a Presidente.
-                tab_presidente_content += create_candidate_images_html(CANDIDATE_IMAGES_PRESIDENTE, IMAGES_DIR, OUTPUT_DIR)
+            # Guarda la especificación del gráfico para ser incrustada en el HTML.
+            section['figures']['graph_presidente_depto'] = figure_to_spec(fig_presidente)
+            # Añade el contenedor (div) para el gráfico de presidente.
+            section['html'] = f'<div class="plotly-graph-container" id="graph_presidente_depto"></div>'
+            section['show_images'] = True
 
-        except Exception as e:
-            tab_presidente_content = f"<p>Ocurrió un error al procesar los datos de presidente: {e}</p>"
-            print(f"Error al procesar datos de presidente: {e}")
-    else:
-        tab_presidente_content = "<p>No se pudo cargar el archivo de datos de Presidente.</p>"
+            # Tabla de ganador y margen por departamento.
+            section['table_html'] = ('<h2 style="color: #0056b3;">Ganador y Margen por Departamento (Presidente)</h2>'
+                                     + results_table_html(analyze_matrix(table.units, table.candidates, table.votes,
+                                                                         'Departamento'), 'Departamento'))
 
-    # --- Estructura HTML Final con JavaScript Dinámico ---
-    full_html_content = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <title>Resultados Electorales</title>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap" rel="stylesheet">
-    <script src="https://cdn.plot.ly/plotly-2.30.0.min.js"></script>
-    <style>
-        body {{
+            # Proyección del resultado final, si quedan mesas por escrutar.
+            projection = build_presidente_projection(table)
+            if projection:
+                section['projection_note_html'] = projection['note_html']
+                section['projection_html'] = projection['html']
+                section['figures'].update(projection['figures'])
+
+    except Exception as e:
+        section['html'] = f"<p>Ocurrió un error al procesar los datos de presidente: {e}</p>"
+        section['table_html'] = section['projection_note_html'] = section['projection_html'] = ''
+        print(f"Error al procesar datos de presidente: {e}")
+    return section
+
+def load_report_cube(departamentos_path, localidades_path, presidente_path):
+    """
+    Carga los CSV del informe en el cubo de resultados que usan todas las secciones y el mapa.
+
+    Args:
+        departamentos_path (str): Ruta al CSV de departamentos (Gobernador).
+        localidades_path (str): Ruta al CSV de localidades (Gobernador).
+        presidente_path (str): Ruta al CSV de presidente.
+
+    Returns:
+        cube.ResultsCube: El cubo. Los CSV que no se pudieron cargar no aportan votos.
+    """
+    from cube import load_results_cube
+    with span('cubo'):
+        return load_results_cube(departamentos_path, localidades_path, presidente_path,
+                                 presidente_candidates=PRESIDENTE_CANDIDATES)
+
+def check_report_data(departamentos_path, localidades_path, presidente_path, cache=None):
+    """
+    Controla la consistencia entre los CSV del informe y los nombres de candidatos que usa el
+    informe (imágenes y candidatos a Presidente graficados). Ver validation.validate_consistency.
+
+    Args:
+        departamentos_path (str): CSV de Gobernador por departamento.
+        localidades_path (str): CSV de Gobernador por localidad.
+        presidente_path (str): CSV de Presidente por departamento.
+        cache (BuildCache): Caché de compilación opcional. El resultado se guarda con la clave del
+            contenido de los CSV (los nombres de referencia están en el código, que ya forma parte
+            de la clave base), así una recompilación sin cambios en los datos no vuelve a validar.
+
+    Returns:
+        list: Las discrepancias encontradas (validation.Discrepancy).
+    """
+    from ingest import CARGO_GOBERNADOR, CARGO_PRESIDENTE
+    from validation import Discrepancy, validate_consistency
+    references = [(CARGO_GOBERNADOR, 'CANDIDATE_IMAGES_GOBERNADOR', list(CANDIDATE_IMAGES_GOBERNADOR)),
+                  (CARGO_PRESIDENTE, 'CANDIDATE_IMAGES_PRESIDENTE', list(CANDIDATE_IMAGES_PRESIDENTE)),
+                  (CARGO_PRESIDENTE, 'PRESIDENTE_CANDIDATES', PRESIDENTE_CANDIDATES)]
+    paths = [departamentos_path, localidades_path, presidente_path]
+
+    def validate():
+        return validate_consistency(*paths, references)
+
+    with span('validacion') as validation_span:
+        if cache is None:
+            discrepancies = validate()
+        else:
+            # En la caché cada discrepancia se guarda como lista (JSON) y se reconstruye al leerla.
+            discrepancies = [Discrepancy(*item)
+                             for item in cache.memo('validacion', paths, lambda: [list(d) for d in validate()])]
+        validation_span.set(discrepancias=len(discrepancies))
+    return discrepancies
+
+def department_geojson_layers():
+    """Devuelve las capas de departamentos como tuplas (ruta al GeoJSON, nombre del departamento)."""
+    return [(os.path.join(MAPS_DIR, geojson_file), depto_name) for geojson_file, depto_name in DEPARTMENT_GEOJSON_FILES]
+
+def create_build_cache(enabled=True):
+    """
+    Crea la caché de compilación incremental. Su clave base incluye el código del proyecto
+    y las versiones de las librerías, de modo que cualquier cambio en ellos invalida todo.
+
+    Args:
+        enabled (bool): Si es False, se regeneran todos los artefactos.
+
+    Returns:
+        BuildCache: La caché lista para usar.
+    """
+    import folium
+    import pandas as pd
+    import plotly
+
+    code_paths = sorted(glob.glob(os.path.join(BASE_DIR, '*.py')))
+    versions = {'plotly': plotly.__version__, 'folium': folium.__version__, 'pandas': pd.__version__}
+    return BuildCache(os.path.join(OUTPUT_DIR, BUILD_CACHE_DIRNAME), code_paths=code_paths, extra=versions, enabled=enabled)
+
+def _completed_future(value):
+    """Devuelve un Future ya resuelto con `value`."""
+    future = Future()
+    future.set_result(value)
+    return future
+
+def _run_now(func, *args):
+    """Ejecuta `func` en el proceso actual y devuelve su resultado como un Future resuelto."""
+    future = Future()
+    try:
+        future.set_result(func(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+def schedule_artifact(cache, submit, name, inputs, func, args, extra=None):
+    """
+    Busca un artefacto en la caché y, si no está, programa su generación con `submit`.
+
+    Args:
+        cache (BuildCache): La caché de compilación.
+        submit (callable): `executor.submit` o `_run_now`.
+        name (str): Nombre del artefacto.
+        inputs (list): Archivos de entrada del artefacto.
+        func (callable): Función de nivel de módulo que genera el artefacto.
+        args (tuple): Argumentos de `func`.
+        extra: Parámetros adicionales que forman parte de la clave.
+
+    Returns:
+        tuple: (nombre, clave, Future, True si el valor vino de la caché).
+    """
+    # Sin pool, el span incluye la generación del artefacto (submit es _run_now).
+    with span(f'seccion:{name}') as section_span:
+        key, value = cache.lookup(name, inputs, extra=extra)
+        section_span.set(cache=value is not None)
+        if value is not None:
+            return name, key, _completed_future(value), True
+        return name, key, submit(func, *args), False
+
+def collect_artifact(cache, scheduled, outputs=()):
+    """
+    Espera el resultado de un artefacto programado con schedule_artifact y lo guarda en la caché.
+
+    Args:
+        cache (BuildCache): La caché de compilación.
+        scheduled (tuple): Valor devuelto por schedule_artifact.
+        outputs (iterable): Archivos escritos al generar el artefacto.
+
+    Returns:
+        El valor del artefacto.
+    """
+    name, key, future, cached = scheduled
+    with span(f'reunir:{name}'):
+        value = future.result()
+        if not cached:
+            cache.put(name, key, value, outputs=outputs)
+    return value
+
+def ingest_mesas_csv(cache, mesas_path):
+    """
+    Agrega el CSV de resultados por mesa y escribe las tablas de departamentos, localidades
+    y presidente en el directorio de salida. Si el CSV tiene coordenadas, cada mesa se asigna
+    al departamento que la contiene según los GeoJSON de los departamentos (ver ingest.py).
+    La ingesta se cachea según el contenido del CSV y de los GeoJSON.
+
+    Args:
+        cache (BuildCache): La caché de compilación.
+        mesas_path (str): Ruta al CSV de resultados por mesa.
+
+    Returns:
+        tuple: Rutas a los CSV de departamentos, localidades y presidente generados.
+    """
+    from ingest import INGEST_DIRNAME, ingest_mesas, write_report_csvs
+
+    ingest_dir = os.path.join(OUTPUT_DIR, INGEST_DIRNAME)
+    layers = department_geojson_layers()
+    key, paths = cache.lookup('ingesta', [mesas_path] + [path for path, _ in layers])
+    if paths is None:
+        with span('ingesta', bytes=os.path.getsize(mesas_path)):
+            paths = write_report_csvs(ingest_mesas(mesas_path, department_layers=layers), ingest_dir)
+        cache.put('ingesta', key, paths, outputs=paths.values())
+    return paths['departamentos'], paths['localidades'], paths['presidente']
+
+# --- Estructura HTML Final con JavaScript Dinámico ---
+# Hoja de estilos y código JavaScript del informe. Van incrustados en el HTML o, en el modo de
+# recursos separados (--split-assets), en archivos propios con el hash del contenido en el nombre.
+REPORT_STYLE = """
+        body {
             font-family: 'Inter', sans-serif;
             margin: 0;
             background-color: #f0f2f5;
             background-image: radial-gradient(circle at center, rgba(0,0,0,0.03) 0%, rgba(0,0,0,0) 70%);
             color: #343a40;
-        }}
-        h2 {{
+        }
+        h2 {
             text-align: center;
             color: #000000;
             padding: 20px 0;
             margin-bottom: 0;
-        }}
-        .main-content-wrapper {{
+        }
+        .main-content-wrapper {
             max-width: 1200px;
             margin: 20px auto;
             background-color: #ffffff;
             border-radius: 12px;
             box-shadow: 0 8px 16px rgba(0, 0, 0, 0.1);
             overflow: hidden;
-        }}
-        .tab-container {{
+        }
+        .tab-container {
             display: flex;
             border-bottom: 2px solid #dee2e6;
             background-color: #f8f9fa;
             padding: 0 20px;
             flex-wrap: wrap;
-        }}
-        .tab-container button {{
+        }
+        .tab-container button {
             background-color: transparent;
             border: none;
             outline: none;
@@ -486,28 +944,28 @@ def generate_election_report():
             margin-right: 5px;
             flex-grow: 1;
             min-width: fit-content;
-        }}
-        .tab-container button:hover {{
+        }
+        .tab-container button:hover {
             background-color: #e2e6ea;
             color: #0056b3;
-        }}
-        .tab-container button.active {{
+        }
+        .tab-container button.active {
             background-color: #ffffff;
             color: #007bff;
             border-bottom: 3px solid #007bff;
             border-top-left-radius: 8px;
             border-top-right-radius: 8px;
             margin-bottom: -2px;
-        }}
-        .tabcontent {{
+        }
+        .tabcontent {
             display: none;
             padding: 20px;
             border: none;
             border-top: none;
             width: 100%;
             box-sizing: border-box;
-        }}
-        .plotly-graph-container, .map-container {{
+        }
+        .plotly-graph-container, .map-container {
             width: 100%;
             margin: 30px auto;
             box-shadow: 0 6px 12px rgba(0,0,0,0.1);
@@ -519,32 +977,49 @@ def generate_election_report():
             box-sizing: border-box;
             color: #343a40;
             min-height: 500px; /* Altura predeterminada para gráficos Plotly */
-        }}
-        .map-container {{
+        }
+        .map-container {
             min-height: 400px; /* Altura específica para el mapa */
-        }}
-        .plotly-graph-container div {{ /* Estilo para el div interno que Plotly crea */
+        }
+        .plotly-graph-container div { /* Estilo para el div interno que Plotly crea */
             width: 100%;
             height: 100%;
-        }}
-        .plotly-graph-container .modebar-container {{
+        }
+        .plotly-graph-container .modebar-container {
             background-color: #f8f9fa;
             border-radius: 5px;
-        }}
-        .plotly-graph-container .modebar-btn {{
+        }
+        .plotly-graph-container .modebar-btn {
             color: #6c757d !important;
-        }}
-        .plotly-graph-container .modebar-btn:hover {{
+        }
+        .plotly-graph-container .modebar-btn:hover {
             background-color: #e2e6ea !important;
-        }}
-        .tabcontent h3, .tabcontent p, .tabcontent ul, .tabcontent li {{
+        }
+        .tabcontent h3, .tabcontent p, .tabcontent ul, .tabcontent li {
             color: #343a40;
-        }}
-        .tabcontent hr {{
+        }
+        .tabcontent hr {
             border-color: #ced4da;
-        }}
+        }
 
-        .candidate-images-container {{
+        .results-table {
+            border-collapse: collapse;
+            margin: 20px auto;
+            font-size: 14px;
+            background-color: #ffffff;
+            box-shadow: 0 4px 8px rgba(0,0,0,0.05);
+        }
+        .results-table th, .results-table td {
+            padding: 6px 12px;
+            border-bottom: 1px solid #dee2e6;
+            text-align: left;
+        }
+        .results-table th {
+            background-color: #0056b3;
+            color: #ffffff;
+        }
+
+        .candidate-images-container {
             display: flex;
             flex-wrap: wrap;
             justify-content: center;
@@ -554,16 +1029,16 @@ def generate_election_report():
             background-color: #f8f9fa;
             border-radius: 10px;
             box-shadow: 0 4px 8px rgba(0,0,0,0.05);
-        }}
-        .candidate-image-item {{
+        }
+        .candidate-image-item {
             display: flex;
             flex-direction: column;
             align-items: center;
             text-align: center;
             width: 100%;
             max-width: 120px;
-        }}
-        .candidate-image {{
+        }
+        .candidate-image {
             width: 100px;
             height: 100px;
             border-radius: 50%;
@@ -571,146 +1046,763 @@ def generate_election_report():
             border: 3px solid #007bff;
             box-shadow: 0 2px 4px rgba(0,0,0,0.1);
             transition: transform 0.2s ease-in-out;
-        }}
-        .candidate-image:hover {{
+        }
+        .candidate-image:hover {
             transform: scale(1.05);
-        }}
-        .candidate-name {{
+        }
+        .candidate-name {
             margin-top: 10px;
             font-weight: bold;
             color: #343a40;
             font-size: 0.9em;
-        }}
+        }
 
-        @media (max-width: 768px) {{
-            .tab-container {{
+        @media (max-width: 768px) {
+            .tab-container {
                 flex-direction: column;
                 padding: 0;
-            }}
-            .tab-container button {{
+            }
+            .tab-container button {
                 margin-right: 0;
                 border-bottom: none;
                 border-radius: 0;
                 text-align: center;
                 width: 100%;
-            }}
-            .tab-container button.active {{
+            }
+            .tab-container button.active {
                 border-bottom: none;
                 border-radius: 0;
-            }}
-            .main-content-wrapper {{
+            }
+            .main-content-wrapper {
                 margin: 10px;
                 border-radius: 0;
                 box-shadow: none;
-            }}
-            .plotly-graph-container, .map-container {{
+            }
+            .plotly-graph-container, .map-container {
                 margin: 15px auto;
                 border-radius: 0;
                 box-shadow: none;
                 padding: 5px;
                 min-height: 350px; /* Ajustar para móviles */
-            }}
-            h2 {{
+            }
+            h2 {
                 padding: 15px 0;
-            }}
-        }}
-    </style>
-</head>
-<body>
-
-<h2>Análisis de elecciones en el Norte de la Provincia de Neuquén</h2>
-
-<div class="main-content-wrapper">
-    <div class="tab-container">
-        <button class="tablinks active" onclick="openTab(event, 'Gobernador')">Resultados Elecciones 2023 - Gobernador Provincial</button>
-        <button class="tablinks" onclick="openTab(event, 'Presidente')">Resultados Elecciones Presidente</button>
-    </div>
-
-    <div id="Gobernador" class="tabcontent" style="display: block;">
-        {tab1_content}
-    </div>
-
-    <div id="Presidente" class="tabcontent">
-        {tab_presidente_content}
-    </div>
-</div>
-
-<script>
-    // Almacena los datos JSON de los gráficos de Plotly.
-    // Usamos json.dumps con indent para que el JSON sea legible en el HTML si se inspecciona.
-    const PLOTLY_GRAPHS = {json.dumps(plotly_graph_data, indent=4)};
+            }
+        }
+    """
 
-    function plotGraph(graphId) {{
+REPORT_SCRIPT = """
+    // Plantillas y layout comunes a todos los gráficos (se guardan una sola vez).
+    // Los datos de cada gráfico están en su propia etiqueta <script type="application/json">
+    // y solo se parsean cuando el gráfico se acerca a la zona visible.
+    const PLOTLY_SHARED = JSON.parse(document.getElementById('plotly-shared').textContent) || {};
+    // URL del flujo de actualizaciones en vivo (null en el informe estático).
+    const LIVE_EVENTS_URL = JSON.parse(document.getElementById('live-events-url').textContent);
+    // Modo de recursos separados: {shared: URL de las plantillas y el layout comunes,
+    // files: {URL del archivo de datos de una pestaña: IDs de sus gráficos}}; null si los datos están incrustados.
+    const REPORT_ASSETS = JSON.parse(document.getElementById('report-assets').textContent);
+    const figureFiles = {};
+    if (REPORT_ASSETS) {
+        Object.keys(REPORT_ASSETS.files).forEach(url => REPORT_ASSETS.files[url].forEach(graphId => {
+            figureFiles[graphId] = url;
+        }));
+    }
+    const assetRequests = {};
+    const pendingGraphs = new Set();
+
+    function fetchAsset(url) {
+        // Cada archivo de datos se descarga una sola vez; como su nombre lleva el hash del
+        // contenido, el navegador lo reutiliza de su caché mientras no cambie.
+        if (!assetRequests[url]) {
+            assetRequests[url] = fetch(url).then(response => {
+                if (!response.ok) {
+                    throw new Error(`HTTP ${response.status} al descargar ${url}`);
+                }
+                return response.json();
+            });
+        }
+        return assetRequests[url];
+    }
+
+    // Las plantillas comunes se descargan apenas carga la página, junto con el resto.
+    const sharedReady = REPORT_ASSETS ? fetchAsset(REPORT_ASSETS.shared).then(shared => Object.assign(PLOTLY_SHARED, shared)) : null;
+    // Margen alrededor del viewport para empezar a renderizar antes de que el gráfico sea visible,
+    // y distancia a partir de la cual un gráfico renderizado se libera.
+    const RENDER_MARGIN = '600px 0px';
+    const PURGE_MARGIN = '4000px 0px';
+    const renderedGraphs = new Set();
+
+    function mergeLayouts(base, extra) {
+        // Combina recursivamente dos layouts sin modificar los originales.
+        const merged = Object.assign({}, base);
+        Object.keys(extra).forEach(key => {
+            const value = extra[key];
+            if (value && typeof value === 'object' && !Array.isArray(value) &&
+                merged[key] && typeof merged[key] === 'object' && !Array.isArray(merged[key])) {
+                merged[key] = mergeLayouts(merged[key], value);
+            } else {
+                merged[key] = value;
+            }
+        });
+        return merged;
+    }
+
+    function loadFigure(graphId) {
+        // Parsea bajo demanda los datos del gráfico; no se conservan en memoria tras renderizar.
+        const dataElement = document.getElementById('plotly-data-' + graphId);
+        return dataElement ? JSON.parse(dataElement.textContent) : null;
+    }
+
+    function plotGraph(graphId, update) {
+        // Sin `update`, dibuja el gráfico una sola vez con sus datos incrustados;
+        // con `update` (modo en vivo), aplica los datos nuevos a un gráfico ya dibujado.
         const graphDiv = document.getElementById(graphId);
+        if (!graphDiv || (renderedGraphs.has(graphId) && !update)) {
+            return;
+        }
+        if (!update && figureFiles[graphId] && !document.getElementById('plotly-data-' + graphId)) {
+            // Modo de recursos separados: descarga los datos de la pestaña y dibuja el gráfico al recibirlos.
+            if (!pendingGraphs.has(graphId)) {
+                pendingGraphs.add(graphId);
+                Promise.all([sharedReady, fetchAsset(figureFiles[graphId])]).then(([, figures]) => {
+                    pendingGraphs.delete(graphId);
+                    if (figures[graphId]) {
+                        plotGraph(graphId, figures[graphId]);
+                    } else {
+                        console.warn(`No se encontraron datos Plotly para el ID: ${graphId}`);
+                        graphDiv.innerHTML = `<p style="color: orange;">Datos del gráfico no disponibles.</p>`;
+                    }
+                }, e => {
+                    pendingGraphs.delete(graphId);
+                    console.error(`Error al descargar los datos del gráfico ${graphId}:`, e);
+                    graphDiv.innerHTML = `<p style="color: red;">Error al cargar el gráfico: ${e.message}</p>`;
+                });
+            }
+            return;
+        }
+        const figure = update || loadFigure(graphId);
         // Verifica que el div exista y que tengamos datos para ese gráfico.
-        if (graphDiv && PLOTLY_GRAPHS[graphId]) {{
-            try {{
-                // Parsea el string JSON a un objeto JavaScript.
-                const data = JSON.parse(PLOTLY_GRAPHS[graphId]);
-                // Renderiza el gráfico usando Plotly.newPlot.
-                Plotly.newPlot(graphId, data.data, data.layout, {{responsive: true, displayModeBar: false}});
-            }} catch (e) {{
+        if (figure) {
+            try {
+                // Reconstruye el layout completo a partir de la plantilla y el layout comunes.
+                let layout = mergeLayouts(PLOTLY_SHARED.layout, figure.layout);
+                if (figure.template !== undefined) {
+                    layout.template = PLOTLY_SHARED.templates[figure.template];
+                }
+                // Plotly.react dibuja el gráfico la primera vez y en las actualizaciones solo aplica las diferencias.
+                Plotly.react(graphDiv, figure.data, layout, {responsive: true, displayModeBar: false});
+                renderedGraphs.add(graphId);
+            } catch (e) {
                 // Captura y muestra errores si el gráfico no se puede plotear.
                 // IMPORTANTE: Se escapa el $ con otro $ para que Python lo pase literalmente al JS.
-                console.error(`Error al plotear el gráfico ${{graphId}}:`, e);
-                graphDiv.innerHTML = `<p style="color: red;">Error al cargar el gráfico: ${{e.message}}</p>`;
-            }}
-        }} else if (graphDiv) {{
+                console.error(`Error al plotear el gráfico ${graphId}:`, e);
+                graphDiv.innerHTML = `<p style="color: red;">Error al cargar el gráfico: ${e.message}</p>`;
+            }
+        } else {
              // Advertencia si el div existe pero no hay datos Plotly asociados.
-             console.warn(`No se encontraron datos Plotly para el ID: ${{graphId}}`);
+             console.warn(`No se encontraron datos Plotly para el ID: ${graphId}`);
              graphDiv.innerHTML = `<p style="color: orange;">Datos del gráfico no disponibles.</p>`;
-        }}
-    }}
+        }
+    }
 
-    function openTab(evt, tabName) {{
+    function purgeGraph(graphId) {
+        // Libera el gráfico (y su memoria) cuando queda lejos de la zona visible.
+        const graphDiv = document.getElementById(graphId);
+        if (graphDiv && renderedGraphs.has(graphId)) {
+            Plotly.purge(graphDiv);
+            graphDiv.innerHTML = '';
+            renderedGraphs.delete(graphId);
+        }
+    }
+
+    function plotVisibleGraphs(container) {
+        // Alternativa para navegadores sin IntersectionObserver: renderiza todos los gráficos del contenedor.
+        container.querySelectorAll('.plotly-graph-container[id]').forEach(div => plotGraph(div.id));
+    }
+
+    const lazyRendering = 'IntersectionObserver' in window;
+    if (lazyRendering) {
+        // Renderiza cada gráfico cuando se acerca al viewport. Los gráficos de pestañas ocultas
+        // no intersectan, así que se dibujan recién cuando su pestaña se muestra.
+        const renderObserver = new IntersectionObserver(entries => {
+            entries.forEach(entry => {
+                if (entry.isIntersecting) {
+                    plotGraph(entry.target.id);
+                }
+            });
+        }, {rootMargin: RENDER_MARGIN});
+        // Purga los gráficos que quedan muy lejos (o en una pestaña oculta).
+        const purgeObserver = new IntersectionObserver(entries => {
+            entries.forEach(entry => {
+                if (!entry.isIntersecting) {
+                    purgeGraph(entry.target.id);
+                }
+            });
+        }, {rootMargin: PURGE_MARGIN});
+        document.addEventListener('DOMContentLoaded', () => {
+            document.querySelectorAll('.plotly-graph-container[id]').forEach(div => {
+                renderObserver.observe(div);
+                purgeObserver.observe(div);
+            });
+        });
+    }
+
+    function openTab(evt, tabName) {
         var i, tabcontent, tablinks;
         // Oculta todos los contenidos de las pestañas.
         tabcontent = document.getElementsByClassName("tabcontent");
-        for (i = 0; i < tabcontent.length; i++) {{
+        for (i = 0; i < tabcontent.length; i++) {
             tabcontent[i].style.display = "none";
-        }}
+        }
         // Desactiva la clase 'active' de todos los botones de pestaña.
         tablinks = document.getElementsByClassName("tablinks");
-        for (i = 0; i < tablinks.length; i++) {{
+        for (i = 0; i < tablinks.length; i++) {
             tablinks[i].className = tablinks[i].className.replace(" active", "");
-        }}
+        }
         // Muestra el contenido de la pestaña seleccionada y activa el botón.
         document.getElementById(tabName).style.display = "block";
         evt.currentTarget.className += " active";
 
-        // Re-plotear los gráficos de Plotly cuando la pestaña se hace visible.
-        // Un pequeño retraso para asegurar que los elementos del DOM estén completamente renderizados
-        // y el navegador les asigne dimensiones correctas antes de que Plotly intente dibujarlos.
-        setTimeout(() => {{
-            const activeTabContent = document.getElementById(tabName);
-            // Busca todos los divs con la clase 'plotly-graph-container' y un 'id' dentro de la pestaña activa.
-            const graphDivs = activeTabContent.querySelectorAll('.plotly-graph-container[id]');
-            graphDivs.forEach(div => {{
-                plotGraph(div.id); // Llama a la función para plotear cada gráfico.
-            }});
-            // Dispara un evento de redimensionamiento global, útil si hay otros componentes que necesiten reaccionar
-            window.dispatchEvent(new Event('resize'));
-        }}, 200); // Retraso de 200ms.
-    }}
-
-    document.addEventListener('DOMContentLoaded', (event) => {{
+        // Con IntersectionObserver, los gráficos de la pestaña se dibujan solos al volverse visibles.
+        if (!lazyRendering) {
+            plotVisibleGraphs(document.getElementById(tabName));
+        }
+        // Dispara un evento de redimensionamiento global, útil si hay otros componentes que necesiten reaccionar
+        window.dispatchEvent(new Event('resize'));
+    }
+
+    if (LIVE_EVENTS_URL && 'EventSource' in window) {
+        // Modo en vivo: el servidor envía solo los gráficos y los fragmentos cuyos datos cambiaron.
+        const liveEvents = new EventSource(LIVE_EVENTS_URL);
+        liveEvents.addEventListener('figures', message => {
+            const update = JSON.parse(message.data);
+            if (update.shared) {
+                Object.assign(PLOTLY_SHARED, update.shared);
+            }
+            // Reemplaza los fragmentos que dependen de los datos (tablas, resumen, mapa).
+            Object.keys(update.fragments || {}).forEach(fragmentId => {
+                const fragment = document.getElementById('fragment-' + fragmentId);
+                if (fragment) {
+                    fragment.innerHTML = update.fragments[fragmentId];
+                }
+            });
+            Object.keys(update.figures).forEach(graphId => {
+                // Actualiza los datos incrustados para que el gráfico se redibuje bien si se purga
+                // (en el modo de recursos separados se incrustan aquí y reemplazan a los del archivo).
+                let dataElement = document.getElementById('plotly-data-' + graphId);
+                if (!dataElement) {
+                    dataElement = document.createElement('script');
+                    dataElement.type = 'application/json';
+                    dataElement.id = 'plotly-data-' + graphId;
+                    document.body.appendChild(dataElement);
+                }
+                dataElement.textContent = JSON.stringify(update.figures[graphId]);
+                if (renderedGraphs.has(graphId)) {
+                    plotGraph(graphId, update.figures[graphId]);
+                }
+            });
+        });
+        // Recarga los iframes (el mapa) cuando cambian sus archivos.
+        liveEvents.addEventListener('frames', () => {
+            document.querySelectorAll('iframe').forEach(frame => frame.contentWindow.location.reload());
+        });
+        // Si cambió la estructura del informe (p. ej. una localidad nueva), recarga la página.
+        liveEvents.addEventListener('reload', () => window.location.reload());
+    }
+
+    document.addEventListener('DOMContentLoaded', (event) => {
         // Activa la primera pestaña al cargar la página y asegura que sus gráficos se ploteen.
         const gobernadorButton = document.querySelector('.tablinks.active');
-        if (gobernadorButton) {{
+        if (gobernadorButton) {
             gobernadorButton.click();
-        }}
-    }});
-</script>
+        }
+    });
+"""
+
+# Plantilla del informe. Las secciones '{{ nombre }}' se escriben por partes con ReportWriter
+# (ver report_writer.py) a medida que se generan, sin armar el documento completo en memoria.
+REPORT_TEMPLATE = ReportTemplate("""
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Resultados Electorales</title>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700&display=swap" rel="stylesheet">
+    <script src="https://cdn.plot.ly/plotly-2.30.0.min.js"></script>
+    {{ head }}
+</head>
+<body>
+
+<h2>Análisis de elecciones en el Norte de la Provincia de Neuquén</h2>
+
+<div class="main-content-wrapper">
+    <div class="tab-container">
+        <button class="tablinks active" onclick="openTab(event, 'Gobernador')">Resultados Elecciones 2023 - Gobernador Provincial</button>
+        <button class="tablinks" onclick="openTab(event, 'Presidente')">Resultados Elecciones Presidente</button>
+    </div>
+
+    <div id="Gobernador" class="tabcontent" style="display: block;">
+        {{ gobernador }}
+    </div>
+
+    <div id="Presidente" class="tabcontent">
+        {{ presidente }}
+    </div>
+</div>
+
+<script type="application/json" id="plotly-shared">{{ plotly_shared }}</script>
+<script type="application/json" id="live-events-url">{{ live_events_url }}</script>
+<script type="application/json" id="report-assets">{{ report_assets }}</script>
+
+{{ runtime }}
 
 </body>
 </html>
+""")
+
+def generate_election_report(use_cache=True, jobs=1, mesas_path=None, live_events_url=None, map_tiles=False,
+                             bundle=False, region=None, strict=False, split_assets=False):
     """
+    Genera el informe HTML completo con los gráficos y mapas electorales.
 
-    # Guarda el archivo HTML final en el directorio de salida.
-    with open(output_html_path, 'w', encoding='utf-8') as f:
-        f.write(full_html_content)
+    Cada sección se cachea según el contenido de sus entradas (CSV, GeoJSON, imágenes),
+    así que solo se regeneran las secciones cuyas entradas cambiaron y luego se vuelve
+    a armar el HTML final.
+
+    Con `jobs` > 1, las secciones independientes (departamentos, presidente, mapa y los
+    grupos de localidades) se generan en un pool de procesos. Los resultados se reúnen
+    siempre en el mismo orden, por lo que el HTML es idéntico al del modo en serie.
+
+    Con `mesas_path`, los datos de Gobernador y Presidente se obtienen del CSV de resultados
+    por mesa (leído por bloques, ver ingest.py) en lugar de los CSV agregados a mano.
+
+    Args:
+        use_cache (bool): Si es False, se regeneran todas las secciones.
+        jobs (int): Cantidad de procesos a usar. 1 ejecuta todo en el proceso actual.
+        mesas_path (str): Ruta opcional al CSV de resultados por mesa.
+        live_events_url (str): URL del flujo de eventos (Server-Sent Events) del modo en vivo.
+            Si se indica, el informe se suscribe y actualiza los gráficos sin recargar la página.
+        map_tiles (bool): Si es True, el mapa carga los departamentos como teselas bajo demanda
+            (ver build_department_map).
+        bundle (bool): Si es True, genera un informe que funciona sin conexión: Plotly, Leaflet y
+            la fuente se copian desde copias locales, el HTML se minifica y cada archivo de salida
+            recibe versiones precomprimidas '.gz' (y '.br' si está instalado brotli).
+        region (list): Departamentos a incluir (p. ej. ['Minas']). Los CSV se recortan a esos
+            departamentos y el mapa muestra solo sus capas. Por defecto se incluye toda la Zona Norte.
+        strict (bool): Si es True, no se genera el informe cuando los CSV tienen errores de
+            consistencia entre sí (ver check_report_data). Por defecto solo se advierten.
+        split_assets (bool): Si es True, la hoja de estilos, el código JavaScript, el mapa, las
+            plantillas comunes de los gráficos y los datos de los gráficos de cada pestaña se guardan
+            como archivos separados con el hash de su contenido en el nombre (ver static_assets.py),
+            y el informe queda como un HTML chico que los referencia. Los archivos con hash pueden
+            servirse con caché permanente: tras una actualización de datos solo se descargan los que
+            cambiaron. Los datos se piden con fetch, así que el informe debe servirse por HTTP.
+
+    Returns:
+        dict: {'figures': figuras del payload, 'shared': plantillas y layout comunes, 'fragments':
+        fragmentos HTML que dependen de los datos (tablas, resumen, mapa, nota de la proyección), 'content': huella de la
+        estructura de las pestañas}, usado por el modo en vivo para detectar qué cambió. Las figuras
+        y los fragmentos solo se devuelven con `live_events_url`; si no, quedan vacíos.
+
+    Raises:
+        ValueError: Con `strict`, si los CSV tienen errores de consistencia.
+    """
+    from ingest import CARGO_GOBERNADOR
+    from plotly_payload import PlotlyPayloadBuilder, dumps_for_script
+    from static_assets import STATIC_DIRNAME, StaticAssets
+    from tiles import MAP_TILES_DIRNAME
+    from validation import SEVERITY_ERROR, summarize_discrepancies
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    cache = create_build_cache(enabled=use_cache)
+    departamentos_path, localidades_path, presidente_path = csv_file_path, localidades_csv_file_path, presidente_csv_file_path
+    if mesas_path is not None:
+        departamentos_path, localidades_path, presidente_path = ingest_mesas_csv(cache, mesas_path)
+    if region:
+        from datasets import REGION_DIRNAME, write_region_csv
+        region_dir = os.path.join(OUTPUT_DIR, REGION_DIRNAME)
+        departamentos_path, localidades_path, presidente_path = (
+            write_region_csv(path, region, os.path.join(region_dir, os.path.basename(path)))
+            for path in (departamentos_path, localidades_path, presidente_path))
+    # Controla que los CSV cierren entre sí antes de publicar el informe.
+    discrepancies = check_report_data(departamentos_path, localidades_path, presidente_path, cache=cache)
+    if discrepancies:
+        errors = sum(1 for discrepancy in discrepancies if discrepancy.severity == SEVERITY_ERROR)
+        print(f"Advertencia: los datos tienen {errors} error(es) y {len(discrepancies) - errors} aviso(s) "
+              f"de consistencia (detalle con 'main.py validate --consistencia'):")
+        for line in summarize_discrepancies(discrepancies, limit=3):
+            print(f"  - {line}")
+        if strict and errors:
+            raise ValueError(f"los datos tienen {errors} error(es) de consistencia")
+    # Todas las secciones y el mapa leen los votos del mismo cubo, armado una sola vez.
+    cube = load_report_cube(departamentos_path, localidades_path, presidente_path)
+    # En el modo empaquetado, cada fragmento se minifica y usa copias locales al escribirse.
+    transform = (lambda html: bundle_html(html, OUTPUT_DIR, VENDOR_DIR)) if bundle else None
+    # En el modo de recursos separados, los estilos, el código y los datos van a archivos con hash.
+    static = StaticAssets(OUTPUT_DIR) if split_assets else None
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    submit = executor.submit if executor else _run_now
+    map_chunks = executor.map if executor else map
+    try:
+        # El informe se escribe por secciones a medida que se generan (ver report_writer.py).
+        with span('informe'), open_report(output_html_path, REPORT_TEMPLATE, transform=transform) as report:
+            # Payload compacto de los gráficos: la plantilla y el layout comunes se guardan una sola vez
+            # y cada figura conserva solo sus trazas y su layout propio (ver plotly_payload.py).
+            payload = PlotlyPayloadBuilder(PLOTLY_LAYOUT_CONFIG)
+            live_figures = {}  # Figuras compactas, solo en el modo en vivo (para detectar qué cambió).
+            live_fragments = {}  # Fragmentos que dependen de los datos, solo en el modo en vivo.
+            tab_figures = {}  # Modo de recursos separados: figuras de la pestaña en curso.
+
+            def write_figures(figures):
+                """Escribe los datos de los gráficos de una sección y libera cada especificación al escribirla."""
+                with span('payload:escribir', figuras=len(figures)):
+                    for graph_id in list(figures):
+                        figure = payload.add(figures.pop(graph_id))
+                        if live_events_url:
+                            live_figures[graph_id] = figure
+                        if static is None:
+                            report.write_data(figure_data_html(graph_id, figure))
+                        else:
+                            tab_figures[graph_id] = figure
+
+            def write_fragment(fragment_id, html):
+                """Escribe un fragmento que depende de los datos; el modo en vivo lo reemplaza si cambia."""
+                html = report.write_fragment(fragment_id, html)
+                if live_events_url:
+                    live_fragments[fragment_id] = html
+
+            def write_tab_figures(tab):
+                """Modo de recursos separados: guarda los datos de la pestaña en su propio archivo."""
+                if tab_figures:
+                    report_assets['files'][static.add_json(f'datos-{tab}', tab_figures)] = list(tab_figures)
+                    tab_figures.clear()
+
+            # Un archivo con los datos de los gráficos de cada pestaña y otro con las plantillas comunes:
+            # una actualización de votos solo cambia los archivos de las pestañas afectadas.
+            report_assets = {'shared': None, 'files': {}} if static is not None else None
+
+            # Hoja de estilos del informe.
+            report.section('head')
+            if static is None:
+                report.write(f'<style>{REPORT_STYLE}</style>')
+            else:
+                css_url = static.add('informe', '.css', minify_css(REPORT_STYLE) if bundle else REPORT_STYLE)
+                report.write(f'<link rel="stylesheet" href="{css_url}">')
+
+            geojson_paths = [path for path, _ in department_geojson_layers()]
+            geometry_params = {'tolerance': GEOMETRY_SIMPLIFY_TOLERANCE, 'precision': GEOMETRY_COORD_PRECISION,
+                               'layers': DEPARTMENT_GEOJSON_FILES}
+            mapa_outputs = [mapa_output_path]
+            if map_tiles:
+                geometry_params['tiles'] = True
+                mapa_outputs.append(os.path.join(OUTPUT_DIR, MAP_TILES_DIRNAME, 'index.json'))
+            if bundle:
+                geometry_params['bundle'] = True
+            if region:
+                geometry_params['region'] = sorted(region)
+
+            # Programa las secciones independientes (en el pool, si lo hay).
+            departamentos_task = schedule_artifact(cache, submit, 'departamentos', [departamentos_path],
+                                                   build_departamentos_section, (cube,),
+                                                   extra=PLOTLY_LAYOUT_CONFIG)
+            presidente_task = schedule_artifact(cache, submit, 'presidente', [presidente_path],
+                                                build_presidente_section, (cube,),
+                                                extra=PLOTLY_LAYOUT_CONFIG)
+
+            # --- Generar gráficos por localidad y resumen (los grupos de localidades se reparten en el pool) ---
+            with span('seccion:localidades'):
+                localidades = cache.memo('localidades', [localidades_path],
+                                         lambda: build_localidades_section(cube, map_chunks=map_chunks,
+                                                                           n_chunks=jobs))
+
+            # --- Procesamiento de datos de Departamentos (Gobernador Provincial) y mapa ---
+            departamentos = collect_artifact(cache, departamentos_task)
+            mapa_task = None
+            if cube.has(CARGO_GOBERNADOR, 'departamento'):
+                mapa_task = schedule_artifact(cache, submit, 'mapa', [departamentos_path] + geojson_paths,
+                                              build_department_map,
+                                              (cube, mapa_output_path, map_tiles, bundle, region),
+                                              extra=geometry_params)
+
+            # --- Pestaña de Gobernador ---
+            report.section('gobernador')
+            report.write(departamentos['html'])
+            if mapa_task is not None:
+                map_html = collect_artifact(cache, mapa_task, outputs=mapa_outputs)
+                map_src = 'src="{}"'.format(os.path.relpath(mapa_output_path, OUTPUT_DIR).replace(os.sep, '/'))
+                if static is not None and map_src in map_html and os.path.exists(mapa_output_path):
+                    # El iframe apunta a la copia con hash del mapa.
+                    map_html = map_html.replace(map_src, f'src="{static.add_page(mapa_output_path)}"')
+                write_fragment('mapa', map_html)
+
+            # Añade las imágenes de los candidatos a Gobernador al contenido de la pestaña
+            # (las imágenes procesadas tienen su propia caché, ver assets.py).
+            with span('imagenes:gobernador'):
+                report.write(create_candidate_images_html(CANDIDATE_IMAGES_GOBERNADOR, IMAGES_DIR, OUTPUT_DIR))
+            # Añade los contenedores (divs) donde Plotly renderizará los gráficos.
+            report.write(f'<div class="plotly-graph-container" id="graph_gobernador_depto_candidato"></div>')
+            report.write(f'<div class="plotly-graph-container" id="graph_gobernador_total_zona_norte"></div>')
+            write_fragment('tabla-departamentos', departamentos['table_html'])
+            # Los datos de cada gráfico van en su propia etiqueta JSON, que el navegador no parsea hasta
+            # que se necesita; se escriben después del HTML de su sección y se liberan.
+            write_figures(departamentos['figures'])
+
+            # Los fragmentos de las localidades (uno por grupo) se escriben y se liberan de a uno.
+            html_parts = localidades['html_parts']
+            while html_parts:
+                report.write(html_parts.pop(0))
+            write_fragment('resumen-localidades', localidades['summary_html'])
+            write_figures(localidades['figures'])
+            write_tab_figures('gobernador')
+
+            # --- Pestaña de Presidente ---
+            presidente = collect_artifact(cache, presidente_task)
+            report.section('presidente')
+            report.write(presidente['html'])
+            write_fragment('tabla-presidente', presidente['table_html'])
+            write_fragment('nota-proyeccion', presidente['projection_note_html'])
+            report.write(presidente['projection_html'])
+            if presidente['show_images']:
+                # Añade las imágenes de los candidatos a Presidente.
+                with span('imagenes:presidente'):
+                    report.write(create_candidate_images_html(CANDIDATE_IMAGES_PRESIDENTE, IMAGES_DIR, OUTPUT_DIR))
+            write_figures(presidente['figures'])
+            write_tab_figures('presidente')
+            # Huella del contenido de las pestañas (sin los datos de los gráficos), para el modo en vivo.
+            content_digest = report.content_digest()
+
+            plotly_shared = payload.shared()
+            report.section('plotly_shared')
+            if static is None:
+                report.write_data(dumps_for_script(plotly_shared))
+            else:
+                report_assets['shared'] = static.add_json('plotly-comun', plotly_shared)
+                report.write_data('null')
+            report.section('live_events_url')
+            report.write_data(dumps_for_script(live_events_url))
+            report.section('report_assets')
+            report.write_data(dumps_for_script(report_assets))
+
+            # Código JavaScript del informe.
+            report.section('runtime')
+            if static is None:
+                report.write(f'<script>{REPORT_SCRIPT}</script>')
+            else:
+                js_url = static.add('informe', '.js', minify_js(REPORT_SCRIPT) if bundle else REPORT_SCRIPT)
+                report.write(f'<script src="{js_url}"></script>')
+    finally:
+        if executor is not None:
+            executor.shutdown()
     print(f"Informe HTML generado exitosamente en: {output_html_path}")
 
+    if static is not None:
+        removed = static.finish()
+        print(f"Recursos separados: {len(static.files)} archivo(s) en {os.path.join(OUTPUT_DIR, STATIC_DIRNAME)} "
+              f"({static.written} nuevo(s), {removed} de versiones anteriores eliminado(s)).")
+
+    # Sin --bundle no se comprime, pero se borran las versiones '.gz'/'.br' de un informe empaquetado
+    # anterior que ya no corresponden a los archivos regenerados.
+    with span('precomprimir'):
+        stats = precompress_tree(OUTPUT_DIR, compress=bundle)
+    if bundle:
+        print(f"Versiones precomprimidas: {stats['files']} archivo(s), {stats['bytes'] / 1e6:.1f} MB -> "
+              f"{stats['gzip_bytes'] / 1e6:.1f} MB con gzip" +
+              (f", {stats['brotli_bytes'] / 1e6:.1f} MB con brotli" if stats['brotli_bytes'] else '') + '.')
+    elif stats['removed']:
+        print(f"Versiones precomprimidas desactualizadas eliminadas: {stats['removed']}.")
+
+    with span('cache:guardar'):
+        cache.save()
+    if cache.hits:
+        print(f"Secciones reutilizadas de la caché: {', '.join(cache.hits)}")
+    return {'figures': live_figures, 'shared': plotly_shared, 'fragments': live_fragments, 'content': content_digest}
+
+# --- Línea de comandos ---
+# Cada comando importa solo lo que necesita: 'validate' no carga pandas, Plotly, Folium ni branca,
+# y 'map' no carga Plotly (ver benchmarks/bench_startup.py).
+
+def command_report(args):
+    """Comando 'report': genera el informe completo (opcionalmente en modo en vivo)."""
+    report = generate_election_report
+    if args.trace:
+        report = traced(generate_election_report, args.trace, memory=args.trace_memory)
+    options = dict(use_cache=not args.no_cache, jobs=max(1, args.jobs), mesas_path=args.mesas,
+                   map_tiles=args.map_tiles, bundle=args.bundle, region=args.region, strict=args.strict,
+                   split_assets=args.split_assets)
+    try:
+        if args.live:
+            from live import LIVE_EVENTS_PATH, serve_live
+            watch_patterns = [os.path.join(DATA_DIR, 'Datos_Norte_NQN - *.csv')] + ([args.mesas] if args.mesas else [])
+            # Con --strict, una actualización con errores de consistencia no se publica: los
+            # navegadores conservan la última versión válida (ver LiveReport.watch).
+            serve_live(lambda: report(live_events_url=LIVE_EVENTS_PATH, **options),
+                       watch_patterns, OUTPUT_DIR, output_html_path, host=args.host, port=args.port)
+        else:
+            report(**options)
+    except ValueError as e:
+        print(f"Error: No se generó el informe: {e}.")
+        return 1
+    return 0
+
+def command_map(args):
+    """Comando 'map': regenera solo el mapa de departamentos, sin gráficos ni informe."""
+    from ingest import CARGO_GOBERNADOR
+    cube = load_report_cube(args.departamentos, None, None)
+    if not cube.has(CARGO_GOBERNADOR, 'departamento'):
+        print(f"Error: No hay votos por departamento en {args.departamentos} para armar el mapa.")
+        return 1
+    build_department_map(cube, mapa_output_path, tiled=args.map_tiles, bundle=args.bundle)
+    # Las versiones precomprimidas del mapa anterior no deben quedar junto al nuevo.
+    precompress_tree(OUTPUT_DIR, compress=args.bundle)
+    return 0
+
+def command_validate(args):
+    """
+    Comando 'validate': revisa el formato de los CSV sin convertirlos y, con --consistencia,
+    controla que los CSV del informe cierren entre sí (ver validation.py).
+    """
+    import json
+    from validation import SEVERITY_ERROR, consistency_report, summarize_discrepancies, validate_files
+    paths = args.csv or [csv_file_path, localidades_csv_file_path, presidente_csv_file_path]
+    results = validate_files(paths)
+    failed = any(results.values())
+    discrepancies = None
+    if args.consistencia:
+        # Importa pandas: por eso el control de consistencia no corre por defecto.
+        discrepancies = check_report_data(csv_file_path, localidades_csv_file_path, presidente_csv_file_path)
+        failed = failed or any(discrepancy.severity == SEVERITY_ERROR for discrepancy in discrepancies)
+    if args.json:
+        print(json.dumps({'formato': results,
+                          'consistencia': consistency_report(discrepancies) if discrepancies is not None else None},
+                         ensure_ascii=False, indent=2))
+        return 1 if failed else 0
+
+    for path, problems in results.items():
+        if not problems:
+            print(f"{path}: OK")
+            continue
+        print(f"{path}: {len(problems)} problema(s)")
+        for problem in problems:
+            print(f"  - {problem}")
+    if discrepancies is not None:
+        report = consistency_report(discrepancies)
+        print(f"Consistencia entre archivos: {report['errores']} error(es), {report['avisos']} aviso(s)")
+        for line in summarize_discrepancies(discrepancies):
+            print(f"  - {line}")
+    return 1 if failed else 0
+
+def command_data(args):
+    """Comando 'data': muestra los votos del cubo de resultados por cargo en un nivel territorial."""
+    import json
+    cube = load_report_cube(csv_file_path, localidades_csv_file_path, presidente_csv_file_path)
+    tables = {}
+    for cargo in cube.cargos:
+        if cube.has(cargo, args.nivel) or cube.has(cargo, args.nivel, rollup=True):
+            tables[cargo] = cube.table(cargo, args.nivel)
+    if args.json:
+        print(json.dumps({cargo: {unit: dict(zip(table.candidates, row.tolist()))
+                                  for unit, row in zip(table.units, table.votes)}
+                          for cargo, table in tables.items()}, ensure_ascii=False, indent=2))
+        return 0
+    for cargo, table in tables.items():
+        print(f"--- {cargo} por {args.nivel} ({len(table.units)} unidad(es), {len(table.candidates)} candidato(s)) ---")
+        for unit, row in zip(table.units, table.votes):
+            ranking = sorted(zip(table.candidates, row.tolist()), key=lambda item: -item[1])
+            print(f"{unit}: {int(row.sum())} votos; " + ', '.join(f'{name} {votes}' for name, votes in ranking))
+    return 0
+
+def command_serve(args):
+    """Comando 'serve': sirve consultas sobre los resultados como JSON (ver service.py)."""
+    from service import serve_results
+    serve_results(csv_file_path, localidades_csv_file_path, presidente_csv_file_path, host=args.host,
+                  port=args.port, cache_size=args.cache_size)
+    return 0
+
+def build_parser():
+    """Arma el parser de la línea de comandos con los comandos report, map, validate, data y serve."""
+    parser = argparse.ArgumentParser(description='Genera el informe HTML de resultados electorales del Norte Neuquino.')
+    commands = parser.add_subparsers(dest='command', metavar='COMANDO')
+
+    report_parser = commands.add_parser('report', help='Genera el informe completo (comando por defecto).')
+    report_parser.add_argument('--no-cache', action='store_true',
+                               help='Regenera todas las secciones, ignorando la caché de compilación incremental.')
+    report_parser.add_argument('--jobs', '-j', type=int, default=1,
+                               help='Cantidad de procesos para generar gráficos y mapa en paralelo (por defecto 1, en serie).')
+    report_parser.add_argument('--mesas', metavar='CSV',
+                               help='CSV de resultados por mesa (formato largo) a usar en lugar de los CSV agregados.')
+    report_parser.add_argument('--map-tiles', action='store_true',
+                               help='Genera el mapa con teselas z/x/y cargadas bajo demanda (requiere servirlo por HTTP, p. ej. con --live).')
+    report_parser.add_argument('--bundle', action='store_true',
+                               help='Genera un informe que funciona sin conexión (librerías locales, HTML minificado y archivos .gz/.br).')
+    report_parser.add_argument('--split-assets', action='store_true',
+                               help='Guarda estilos, código, mapa y datos de cada pestaña en archivos con hash (output/static) '
+                                    'que pueden cachearse indefinidamente, con un HTML chico que los referencia '
+                                    '(requiere servirlo por HTTP, p. ej. con --live).')
+    report_parser.add_argument('--trace', nargs='?', const=os.path.join(OUTPUT_DIR, 'traza'), metavar='PREFIJO',
+                               help='Mide cada etapa y gráfico y guarda la traza en PREFIJO.json y PREFIJO.chrome.json '
+                                    '(por defecto output/traza), con un resumen por consola.')
+    report_parser.add_argument('--trace-memory', action='store_true',
+                               help='Con --trace, registra también el pico de memoria de cada etapa (tracemalloc; más lento).')
+    report_parser.add_argument('--live', action='store_true',
+                               help='Modo en vivo: vigila los CSV y sirve el informe, actualizando los gráficos abiertos.')
+    report_parser.add_argument('--strict', action='store_true',
+                               help='No genera el informe si los CSV tienen errores de consistencia entre sí '
+                                    '(ver validate --consistencia); por defecto solo se advierten.')
+    report_parser.add_argument('--region', nargs='+', metavar='DEPARTAMENTO',
+                               help='Departamentos a incluir (p. ej. --region Minas). Por defecto, toda la Zona Norte.')
+    report_parser.add_argument('--host', default='127.0.0.1', help='Dirección del servidor del modo en vivo.')
+    report_parser.add_argument('--port', type=int, default=8000, help='Puerto del servidor del modo en vivo.')
+    report_parser.set_defaults(func=command_report)
+
+    map_parser = commands.add_parser('map', help='Regenera solo el mapa de departamentos.')
+    map_parser.add_argument('--departamentos', default=csv_file_path, metavar='CSV',
+                            help='CSV de Gobernador por departamento (por defecto, el del informe).')
+    map_parser.add_argument('--map-tiles', action='store_true', help='Genera el mapa con teselas (ver report --map-tiles).')
+    map_parser.add_argument('--bundle', action='store_true', help='Usa copias locales de Leaflet y minifica el HTML.')
+    map_parser.set_defaults(func=command_map)
+
+    validate_parser = commands.add_parser('validate', help='Revisa el formato de los CSV sin generar nada.')
+    validate_parser.add_argument('csv', nargs='*', help='CSV a revisar (por defecto, los tres del informe).')
+    validate_parser.add_argument('--consistencia', action='store_true',
+                                 help='Controla también que los CSV del informe cierren entre sí: totales de '
+                                      'departamentos contra localidades, nombres, porcentajes y valores faltantes.')
+    validate_parser.add_argument('--json', action='store_true', help='Muestra el resultado como JSON.')
+    validate_parser.set_defaults(func=command_validate)
+
+    data_parser = commands.add_parser('data', help='Muestra los votos por cargo en un nivel territorial.')
+    # Niveles de cube.LEVELS (se repiten aquí para no importar numpy al armar el parser).
+    data_parser.add_argument('--nivel', choices=('localidad', 'departamento', 'zona'), default='zona',
+                             help='Nivel territorial (por defecto, el total de la zona).')
+    data_parser.add_argument('--json', action='store_true', help='Muestra los votos como JSON.')
+    data_parser.set_defaults(func=command_data)
+
+    serve_parser = commands.add_parser('serve', help='Sirve totales, localidades y gráficos como JSON por HTTP.')
+    serve_parser.add_argument('--host', default='127.0.0.1', help='Dirección del servidor.')
+    serve_parser.add_argument('--port', type=int, default=8001, help='Puerto del servidor.')
+    # Valor por defecto de service.DEFAULT_CACHE_SIZE (se repite aquí para no importar el servicio al armar el parser).
+    serve_parser.add_argument('--cache-size', type=int, default=4096,
+                              help='Cantidad máxima de respuestas en la caché del servidor.')
+    serve_parser.set_defaults(func=command_serve)
+    return parser
+
+def run_cli(argv=None):
+    """
+    Ejecuta la línea de comandos.
+
+    Args:
+        argv (list): Argumentos (por defecto, los del proceso).
+
+    Returns:
+        int: Código de salida.
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # Sin comando se genera el informe, como antes de que existieran los comandos ('main.py --no-cache').
+    if not argv or (argv[0].startswith('-') and argv[0] not in ('-h', '--help')):
+        argv = ['report'] + argv
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
 # --- Ejecución del script ---
 if __name__ == "__main__":
-    generate_election_report()
\ No newline at end of file
+    sys.exit(run_cli())
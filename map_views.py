@@ -0,0 +1,172 @@
+import branca.colormap as cm
+import numpy as np
+from branca.element import MacroElement
+from jinja2 import Template
+from plotly.colors import qualitative
+
+# Colores de cada candidato en el mapa: la paleta de los gráficos del informe (charts.CHART_COLORS),
+# en el orden de los candidatos de la fuente, así un candidato tiene el mismo color en ambos.
+CANDIDATE_COLORS = qualitative.D3
+# Escala de la vista de votos totales (la del mapa original).
+TOTAL_COLORS = ['#f0f0f0', '#e31a1c', '#800026']
+# Color del extremo inferior de las escalas de porcentaje por candidato.
+SHARE_BASE_COLOR = '#f7f7f7'
+# Relleno de los departamentos sin votos en las vistas de candidato y de ganador.
+NO_DATA_COLOR = '#cccccc'
+TOTAL_VIEW = 'total'
+WINNER_VIEW = 'ganador'
+
+
+# --- Colores de cada vista ---
+
+def build_map_views(candidates, votes):
+    """
+    Calcula, en un solo paso sobre la matriz de votos, las vistas del mapa de coropletas: votos
+    totales, porcentaje de cada candidato y ganador. Cada unidad recibe un color por vista;
+    las geometrías se dibujan una sola vez y el navegador cambia solo el relleno (ver MapViews).
+
+    Args:
+        candidates (list): Nombres de los candidatos, uno por columna de `votes`.
+        votes (np.ndarray): Matriz de votos (unidades × candidatos).
+
+    Returns:
+        dict: {'views': lista de {'key', 'name', 'legend'} (la primera es la vista inicial),
+        'colors': un dict {vista: color} por unidad, 'missing': colores de una unidad sin datos,
+        'totals': total de votos por unidad, 'shares': matriz de porcentajes (unidades × candidatos)}.
+    """
+    votes = np.asarray(votes, dtype=np.int64).reshape(-1, len(candidates))
+    totals = votes.sum(axis=1)
+    shares = np.zeros(votes.shape)
+    np.divide(votes * 100.0, totals[:, None], out=shares, where=totals[:, None] > 0)
+    colors = [{} for _ in range(len(totals))]
+    missing = {}
+
+    # Votos totales: los mismos valores de la leyenda que el mapa original.
+    min_votos, max_votos = (int(totals.min()), int(totals.max())) if len(totals) else (0, 1)
+    if max_votos <= min_votos:
+        max_votos = min_votos + 1
+    total_colormap = cm.LinearColormap(colors=TOTAL_COLORS, index=[min_votos, (min_votos + max_votos) / 2, max_votos])
+    for unit_colors, total in zip(colors, totals.tolist()):
+        unit_colors[TOTAL_VIEW] = total_colormap.rgb_hex_str(total)
+    missing[TOTAL_VIEW] = total_colormap.rgb_hex_str(0)
+    views = [{'key': TOTAL_VIEW, 'name': 'Votos totales',
+              'legend': {'caption': 'Votos Totales por Departamento', 'colors': TOTAL_COLORS,
+                         'min': min_votos, 'max': max_votos}}]
+
+    # Ganador: el color del candidato más votado (las unidades sin votos quedan en gris).
+    candidate_colors = [CANDIDATE_COLORS[i % len(CANDIDATE_COLORS)] for i in range(len(candidates))]
+    winners = shares.argmax(axis=1) if len(candidates) else np.zeros(len(totals), dtype=int)
+    for unit_colors, winner, total in zip(colors, winners.tolist(), totals.tolist()):
+        unit_colors[WINNER_VIEW] = candidate_colors[winner] if total > 0 else NO_DATA_COLOR
+    missing[WINNER_VIEW] = NO_DATA_COLOR
+    won = sorted(set(winners[totals > 0].tolist()))
+    views.append({'key': WINNER_VIEW, 'name': 'Ganador',
+                  'legend': {'caption': 'Candidato más votado',
+                             'items': [[candidates[i], candidate_colors[i]] for i in won]}})
+
+    # Porcentaje de cada candidato, con la escala entre 0 y su mejor porcentaje.
+    for j, candidate in enumerate(candidates):
+        key = f'candidato_{j}'
+        best = float(shares[:, j].max()) if len(totals) else 0.0
+        colormap = cm.LinearColormap(colors=[SHARE_BASE_COLOR, candidate_colors[j]], vmin=0, vmax=best or 1)
+        for unit_colors, share, total in zip(colors, shares[:, j].tolist(), totals.tolist()):
+            unit_colors[key] = colormap.rgb_hex_str(share) if total > 0 else NO_DATA_COLOR
+        missing[key] = NO_DATA_COLOR
+        views.append({'key': key, 'name': f'{candidate} (%)',
+                      'legend': {'caption': f'Votos de {candidate} (%)', 'colors': [SHARE_BASE_COLOR, candidate_colors[j]],
+                                 'min': 0, 'max': round(best, 1)}})
+    return {'views': views, 'colors': colors, 'missing': missing, 'totals': totals, 'shares': shares}
+
+
+# --- Control de vistas en el mapa ---
+
+class MapViews(MacroElement):
+    """
+    Control de Leaflet para elegir la vista de una capa de departamentos (folium.GeoJson o
+    tiles.TiledGeoJson) cuyas features llevan en 'colors' su relleno para cada vista.
+
+    Cada vista aparece como una capa base (vacía) del control de capas; al elegirla, la capa
+    cambia solo el color de relleno (setStyle, o setView en la capa de teselas) y la leyenda
+    se actualiza. Las geometrías están una sola vez en el HTML, con cualquier cantidad de vistas.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            (function () {
+                var map = {{ this._parent.get_name() }};
+                var target = {{ this.target.get_name() }};
+                var views = {{ this.views|tojson }};
+                var legend = L.control({position: 'bottomright'});
+                legend.onAdd = function () {
+                    var div = L.DomUtil.create('div', 'map-view-legend');
+                    div.style.cssText = 'background: rgba(255,255,255,0.85); padding: 6px 8px; font: 12px sans-serif; border-radius: 4px;';
+                    return div;
+                };
+                legend.addTo(map);
+
+                function renderLegend(spec) {
+                    var div = legend.getContainer();
+                    div.innerHTML = '';
+                    var caption = L.DomUtil.create('div', '', div);
+                    caption.style.fontWeight = 'bold';
+                    caption.textContent = spec.caption;
+                    if (spec.items) {
+                        spec.items.forEach(function (item) {
+                            var row = L.DomUtil.create('div', '', div);
+                            var swatch = L.DomUtil.create('span', '', row);
+                            swatch.style.cssText = 'display: inline-block; width: 12px; height: 12px; margin-right: 4px; vertical-align: middle; background: ' + item[1] + ';';
+                            row.appendChild(document.createTextNode(item[0]));
+                        });
+                        return;
+                    }
+                    var bar = L.DomUtil.create('div', '', div);
+                    bar.style.cssText = 'width: 180px; height: 10px; margin: 4px 0; background: linear-gradient(to right, ' + spec.colors.join(', ') + ');';
+                    var labels = L.DomUtil.create('div', '', div);
+                    labels.style.cssText = 'display: flex; justify-content: space-between;';
+                    L.DomUtil.create('span', '', labels).textContent = spec.min;
+                    L.DomUtil.create('span', '', labels).textContent = spec.max;
+                }
+
+                function show(view) {
+                    if (typeof target.setView === 'function') {
+                        target.setView(view.key);
+                    } else {
+                        target.setStyle(function (feature) {
+                            return {fillColor: feature.properties.colors[view.key]};
+                        });
+                    }
+                    renderLegend(view.legend);
+                }
+
+                var baseLayers = {};
+                views.forEach(function (view, i) {
+                    var group = L.layerGroup();
+                    group.mapView = view;
+                    baseLayers[view.name] = group;
+                    if (i === 0) {
+                        group.addTo(map);
+                    }
+                });
+                L.control.layers(baseLayers, null, {collapsed: {{ this.collapsed|tojson }}}).addTo(map);
+                map.on('baselayerchange', function (e) {
+                    if (e.layer.mapView) {
+                        show(e.layer.mapView);
+                    }
+                });
+                show(views[0]);
+            })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, target, views, collapsed=True):
+        """
+        Args:
+            target (folium.GeoJson or tiles.TiledGeoJson): Capa cuyas features llevan la propiedad 'colors'.
+            views (list): Vistas de build_map_views (la primera es la inicial).
+            collapsed (bool): Si es True, el control de capas se muestra plegado.
+        """
+        super().__init__()
+        self._name = 'MapViews'
+        self.target = target
+        self.views = views
+        self.collapsed = collapsed
@@ -0,0 +1,245 @@
+import base64
+import json
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from instrumentation import span
+
+# Tipos de arreglos tipados soportados por plotly.js ({"dtype": ..., "bdata": ...}),
+# ordenados de menor a mayor tamaño para elegir el más compacto que represente los datos.
+_INT_DTYPES = [('i1', np.int8), ('u1', np.uint8), ('i2', np.int16), ('u2', np.uint16),
+               ('i4', np.int32), ('u4', np.uint32)]
+_NUMPY_DTYPES = {'i1': '<i1', 'u1': '<u1', 'i2': '<i2', 'u2': '<u2', 'i4': '<i4', 'u4': '<u4',
+                 'f4': '<f4', 'f8': '<f8'}
+# Por debajo de este largo, la lista JSON es más corta que su versión base64.
+MIN_TYPED_ARRAY_LENGTH = 8
+
+
+# --- Codificación de arreglos numéricos ---
+
+def _is_number(value):
+    """Indica si un valor JSON es numérico (los booleanos no cuentan como números)."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _typed_array(values):
+    """
+    Convierte una lista numérica (1D o 2D rectangular) en la especificación de arreglo
+    tipado de plotly.js, eligiendo el dtype más chico que conserve los valores exactos.
+
+    Args:
+        values (list): Lista de números o lista de listas de números.
+
+    Returns:
+        dict or None: {'dtype', 'bdata'[, 'shape']} o None si la lista no es numérica.
+    """
+    if len(values) < MIN_TYPED_ARRAY_LENGTH:
+        return None
+    if all(isinstance(row, list) for row in values):
+        if not values or not all(len(row) == len(values[0]) and all(_is_number(v) for v in row) for row in values):
+            return None
+    elif not all(_is_number(v) for v in values):
+        return None
+    array = np.asarray(values)
+    spec = None
+    if np.issubdtype(array.dtype, np.integer) or (array.size and np.all(np.mod(array, 1) == 0)
+                                                   and np.all(np.abs(array) < 2 ** 31)):
+        for dtype_name, dtype in _INT_DTYPES:
+            info = np.iinfo(dtype)
+            if array.size == 0 or (array.min() >= info.min and array.max() <= info.max):
+                spec = {'dtype': dtype_name, 'bdata': base64.b64encode(array.astype(dtype).tobytes()).decode('ascii')}
+                break
+    if spec is None:
+        spec = {'dtype': 'f8', 'bdata': base64.b64encode(array.astype('<f8').tobytes()).decode('ascii')}
+    if array.ndim == 2:
+        spec['shape'] = f'{array.shape[0]},{array.shape[1]}'
+    return spec
+
+
+def _small_typed_array_to_list(spec):
+    """Decodifica a lista JSON los arreglos tipados 1D demasiado cortos para justificar base64."""
+    if 'shape' in spec or spec['dtype'] not in _NUMPY_DTYPES:
+        return spec
+    array = np.frombuffer(base64.b64decode(spec['bdata']), dtype=_NUMPY_DTYPES[spec['dtype']])
+    if len(array) >= MIN_TYPED_ARRAY_LENGTH:
+        return spec
+    return array.tolist()
+
+
+def encode_numeric_arrays(trace):
+    """
+    Recorre una traza (dict JSON) y reemplaza las listas numéricas por arreglos
+    tipados en base64, que plotly.js decodifica directamente a TypedArray.
+
+    Args:
+        trace (dict): La traza, tal como aparece en la lista 'data' de una figura.
+
+    Returns:
+        dict: Una nueva traza con los arreglos numéricos codificados.
+    """
+    encoded = {}
+    for key, value in trace.items():
+        if isinstance(value, dict) and 'bdata' in value and 'dtype' in value:
+            encoded[key] = _small_typed_array_to_list(value)
+        elif isinstance(value, dict):
+            encoded[key] = encode_numeric_arrays(value)
+        elif isinstance(value, list):
+            encoded[key] = _typed_array(value) or value
+        else:
+            encoded[key] = value
+    return encoded
+
+
+# --- Conversión de figuras ---
+
+def _layout_diff(layout, base):
+    """
+    Devuelve solo las claves de `layout` que difieren de `base` (comparación recursiva),
+    para no repetir en cada figura la configuración compartida.
+    """
+    diff = {}
+    for key, value in layout.items():
+        if key not in base:
+            diff[key] = value
+        elif isinstance(value, dict) and isinstance(base[key], dict):
+            nested = _layout_diff(value, base[key])
+            if nested:
+                diff[key] = nested
+        elif value != base[key]:
+            diff[key] = value
+    return diff
+
+
+def figure_to_spec(fig):
+    """
+    Convierte una figura de Plotly en un diccionario JSON plano ({'data', 'layout'})
+    con los arreglos numéricos ya codificados como arreglos tipados.
+
+    Args:
+        fig (plotly.graph_objects.Figure or dict): La figura a convertir.
+
+    Returns:
+        dict: La especificación de la figura.
+    """
+    if isinstance(fig, dict):
+        spec = fig
+    else:
+        with span('pio.to_json') as to_json_span:
+            text = pio.to_json(fig, validate=False, remove_uids=True)
+            to_json_span.set(bytes=len(text))
+        spec = json.loads(text)
+    return {
+        'data': [encode_numeric_arrays(trace) for trace in spec.get('data', [])],
+        'layout': spec.get('layout', {}),
+    }
+
+
+def shared_layout_spec(layout_config):
+    """
+    Convierte la configuración de diseño común (p. ej. PLOTLY_LAYOUT_CONFIG) a su forma JSON,
+    tal como aparece en el layout de una figura serializada.
+
+    Args:
+        layout_config (dict): Argumentos de diseño comunes a todos los gráficos.
+
+    Returns:
+        dict: El layout común en forma JSON.
+    """
+    return json.loads(pio.to_json(go.Layout(**layout_config), validate=False))
+
+
+class PlotlyPayloadBuilder:
+    """
+    Arma el payload compacto de los gráficos del informe figura por figura. La plantilla de
+    Plotly y el layout común se guardan una sola vez; cada figura conserva solo sus trazas y
+    las claves de layout propias. Como cada figura se convierte por separado, puede escribirse
+    apenas se genera y liberarse: el constructor solo conserva las plantillas distintas.
+    """
+
+    def __init__(self, layout_config):
+        """
+        Args:
+            layout_config (dict): Configuración de diseño común a todos los gráficos.
+        """
+        self.layout = shared_layout_spec(layout_config)
+        self.templates = []
+        self._template_index = {}
+        # Última plantilla resuelta: las figuras seguidas que comparten el mismo objeto de
+        # plantilla (p. ej. los gráficos por localidad) se resuelven sin volver a serializarla.
+        self._last_template = None
+        self._last_index = None
+
+    def add(self, spec):
+        """
+        Convierte una figura a su forma compacta.
+
+        Args:
+            spec (dict): Especificación de la figura (ver figure_to_spec).
+
+        Returns:
+            dict: {'data', 'layout'[, 'template']}, con 'template' como índice en `templates`.
+        """
+        layout = dict(spec.get('layout', {}))
+        template = layout.pop('template', None)
+        figure = {'data': spec.get('data', []), 'layout': _layout_diff(layout, self.layout)}
+        if template is not None:
+            if template is not self._last_template:
+                key = json.dumps(template, sort_keys=True)
+                if key not in self._template_index:
+                    self._template_index[key] = len(self.templates)
+                    self.templates.append(template)
+                self._last_template, self._last_index = template, self._template_index[key]
+            figure['template'] = self._last_index
+        return figure
+
+    def shared(self):
+        """Plantillas y layout comunes de las figuras agregadas hasta ahora: {'templates', 'layout'}."""
+        return {'templates': self.templates, 'layout': self.layout}
+
+
+def build_plotly_payload(figure_specs, layout_config):
+    """
+    Arma el payload compacto de todos los gráficos del informe de una vez (ver PlotlyPayloadBuilder).
+
+    Args:
+        figure_specs (dict): Mapa de ID de gráfico a especificación (ver figure_to_spec).
+        layout_config (dict): Configuración de diseño común a todos los gráficos.
+
+    Returns:
+        dict: {'templates': [...], 'layout': {...}, 'figures': {id: {'data', 'layout', 'template'}}}.
+    """
+    builder = PlotlyPayloadBuilder(layout_config)
+    figures = {graph_id: builder.add(spec) for graph_id, spec in figure_specs.items()}
+    return {**builder.shared(), 'figures': figures}
+
+
+def merge_layouts(base, extra):
+    """
+    Combina recursivamente dos layouts sin modificar los originales (igual que mergeLayouts
+    en el JavaScript del informe): las claves de `extra` reemplazan a las de `base`.
+
+    Returns:
+        dict: El layout combinado.
+    """
+    merged = dict(base)
+    for key, value in extra.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_layouts(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def dumps_for_script(data):
+    """
+    Serializa a JSON compacto apto para incrustar como literal dentro de un <script>.
+
+    Args:
+        data: Objeto serializable a JSON.
+
+    Returns:
+        str: El JSON compacto, con '</' escapado para no cerrar la etiqueta <script>.
+    """
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
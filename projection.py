@@ -0,0 +1,156 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Cantidad de simulaciones del total de todas las unidades.
+DEFAULT_DRAWS = 20_000
+# Cantidad de simulaciones de cada unidad pendiente: alcanzan para sus intervalos y su
+# probabilidad de ganar (error estándar menor a 1,2 puntos) y el costo por unidad es 10 veces menor.
+DEFAULT_UNIT_DRAWS = 2_000
+# Concentración de la distribución de los votos no escrutados: cuanto mayor, más se parecen las
+# mesas que faltan a las ya escrutadas de la misma unidad. También fija la incertidumbre sobre
+# cuántos votos faltan: su coeficiente de variación es 1 / sqrt(concentración) (5 % con 400).
+DEFAULT_CONCENTRATION = 400.0
+# Nivel de los intervalos de confianza (se informan los percentiles 5 y 95).
+DEFAULT_CONFIDENCE = 0.9
+# Semilla por defecto: la misma entrada produce siempre la misma proyección (y el mismo informe).
+DEFAULT_SEED = 0
+# Máximo de valores simulados a la vez (simulaciones × unidades × candidatos); las unidades se
+# procesan en bloques de ese tamaño, así la memoria no depende de la cantidad de unidades.
+MAX_BLOCK_VALUES = 4_000_000
+
+# Resultado de una proyección: unidades y candidatos en el orden de la entrada; por unidad y
+# candidato (matrices unidades × candidatos) los votos escrutados, la media simulada de los
+# votos finales, los extremos del intervalo de confianza y la probabilidad de ganar; lo mismo
+# para el total de todas las unidades (vectores por candidato); y la fracción escrutada por unidad.
+Projection = namedtuple('Projection', ['units', 'candidates', 'scrutinized', 'counted', 'mean', 'low', 'high',
+                                       'win_probability', 'total_counted', 'total_mean', 'total_low',
+                                       'total_high', 'total_win_probability', 'draws', 'confidence',
+                                       'unit_draws'])
+
+
+def project_results(units, candidates, votes, scrutinized, draws=DEFAULT_DRAWS, concentration=DEFAULT_CONCENTRATION,
+                    confidence=DEFAULT_CONFIDENCE, seed=DEFAULT_SEED, unit_draws=DEFAULT_UNIT_DRAWS):
+    """
+    Proyecta el resultado final a partir de resultados parciales (por localidad, departamento o
+    cualquier otra unidad) con una simulación de Monte Carlo vectorizada en NumPy.
+
+    En cada unidad faltan en promedio R = total escrutado × (1 - s) / s votos (con s la fracción
+    escrutada). El modelo es el habitual para este caso: la cantidad que falta sigue una Gamma
+    alrededor de R y su reparto entre candidatos, una Dirichlet centrada en los porcentajes ya
+    escrutados. Como el producto de ambas equivale a una Gamma independiente por candidato
+    (con forma α_j y escala R / Σα), cada simulación cuesta un único valor aleatorio por
+    unidad y candidato, sin normalizar repartos. Las unidades ya completas no se simulan.
+
+    Como las Gamma son independientes, el total de cada candidato no necesita las simulaciones
+    de cada unidad: los votos que faltan de todas las unidades se agregan por candidato en una
+    sola Gamma con la misma media y la misma varianza que su suma (cada unidad se desvía por
+    separado, así que las varianzas se suman). El total se simula con `draws` valores por
+    candidato, sin importar cuántas unidades falten, y cada unidad pendiente con `unit_draws`.
+
+    Args:
+        units (list): Nombres de las unidades, uno por fila de `votes`.
+        candidates (list): Nombres de los candidatos, uno por columna de `votes`.
+        votes (np.ndarray): Votos escrutados (unidades × candidatos).
+        scrutinized (np.ndarray): Fracción escrutada de cada unidad, entre 0 y 1. Las unidades sin
+            fracción válida (<= 0 o NaN) se toman como completas: sin votos escrutados no hay
+            porcentajes de los que partir.
+        draws (int): Cantidad de simulaciones del total.
+        concentration (float): Concentración (Σα) de cada unidad (ver DEFAULT_CONCENTRATION).
+        confidence (float): Nivel de los intervalos de confianza.
+        seed (int): Semilla del generador aleatorio.
+        unit_draws (int): Cantidad de simulaciones de cada unidad pendiente (a lo sumo `draws`).
+
+    Returns:
+        Projection: Votos finales proyectados, intervalos y probabilidades de ganar.
+    """
+    rng = np.random.default_rng(seed)
+    counted = np.asarray(votes, dtype=np.float64).reshape(len(units), len(candidates))
+    scrutinized = np.asarray(scrutinized, dtype=np.float64).reshape(len(units))
+    n_units, n_candidates = counted.shape
+    valid = np.isfinite(scrutinized) & (scrutinized > 0)
+    fraction = np.where(valid, np.clip(scrutinized, 0, 1), 1.0)
+    unit_totals = counted.sum(axis=1)
+    remaining = unit_totals * (1 - fraction) / fraction
+
+    # Formas de las Gamma: porcentajes escrutados (con medio voto por candidato, para que ninguno
+    # quede en cero) por la concentración. Como suman `concentration`, la escala es R / concentration.
+    alpha = (counted + 0.5) / (unit_totals[:, None] + 0.5 * n_candidates) * concentration
+    scale = remaining / concentration
+
+    # Las unidades completas tienen un resultado fijo; en las demás, la media es exacta
+    # (los votos escrutados más la media de cada Gamma).
+    mean = counted + alpha * scale[:, None]
+    low, high = counted.copy(), counted.copy()
+    win_probability = np.zeros_like(counted)
+    if n_candidates:
+        win_probability[np.arange(n_units), counted.argmax(axis=1)] = 1.0
+    quantiles = [(1 - confidence) / 2, (1 + confidence) / 2]
+    pending = np.flatnonzero(remaining > 0)
+
+    # Total de cada candidato: una Gamma con la media y la varianza de la suma de los votos que
+    # faltan en todas las unidades (forma media² / varianza y escala varianza / media).
+    missing_mean = (alpha * scale[:, None]).sum(axis=0)
+    missing_var = (alpha * scale[:, None] ** 2).sum(axis=0)
+    has_missing = missing_var > 0
+    totals = np.repeat(counted.sum(axis=0)[:, None], draws, axis=1)
+    if has_missing.any():
+        shape = missing_mean[has_missing] ** 2 / missing_var[has_missing]
+        totals[has_missing] += (rng.standard_gamma(np.broadcast_to(shape[:, None], (len(shape), draws)))
+                                * (missing_var[has_missing] / missing_mean[has_missing])[:, None])
+
+    unit_draws = max(1, min(unit_draws, draws))
+    block = max(1, MAX_BLOCK_VALUES // max(1, unit_draws * n_candidates))
+    for start in range(0, len(pending), block):
+        rows = pending[start:start + block]
+        # Votos finales simulados (unidades × candidatos × simulaciones): las simulaciones de cada
+        # unidad y candidato quedan contiguas, que es el eje de los percentiles.
+        final = rng.standard_gamma(np.broadcast_to(alpha[rows][:, :, None], (len(rows), n_candidates, unit_draws)))
+        final *= scale[rows][:, None, None]
+        final += counted[rows][:, :, None]
+        low[rows], high[rows] = np.quantile(final, quantiles, axis=2)
+        winners = final.argmax(axis=1)
+        win_probability[rows] = (winners[:, None, :] == np.arange(n_candidates)[:, None]).mean(axis=2)
+
+    total_low, total_high = np.quantile(totals, quantiles, axis=1)
+    total_win = np.bincount(totals.argmax(axis=0), minlength=n_candidates) / draws
+    return Projection(list(units), list(candidates), fraction, counted, mean, low, high, win_probability,
+                      counted.sum(axis=0), counted.sum(axis=0) + missing_mean, total_low, total_high, total_win,
+                      draws, confidence, unit_draws)
+
+
+def projection_summary(projection, total_name='Total'):
+    """
+    Resume una proyección en un dict serializable como JSON (votos redondeados, porcentajes
+    y probabilidades en %).
+
+    Args:
+        projection (Projection): Resultado de project_results.
+        total_name (str): Nombre de la fila del total de todas las unidades.
+
+    Returns:
+        dict: {'simulaciones', 'simulaciones_por_unidad', 'confianza', 'unidades': {unidad: resumen},
+        total_name: resumen}; cada resumen tiene 'escrutado' (%) y, por candidato, votos escrutados,
+        proyectados, intervalo y probabilidad de ganar.
+    """
+    def summary(scrutinized, counted, mean, low, high, win):
+        return {
+            'escrutado': round(float(scrutinized) * 100, 2),
+            'candidatos': {candidate: {'escrutados': int(round(counted[j])), 'proyectados': int(round(mean[j])),
+                                       'intervalo': [int(round(low[j])), int(round(high[j]))],
+                                       'porcentaje': round(float(mean[j] / mean.sum() * 100), 2) if mean.sum() else 0.0,
+                                       'probabilidad_ganar': round(float(win[j]) * 100, 2)}
+                           for j, candidate in enumerate(projection.candidates)},
+        }
+
+    p = projection
+    total_scrutinized = p.total_counted.sum() / p.total_mean.sum() if p.total_mean.sum() else 1.0
+    return {
+        'simulaciones': p.draws,
+        'simulaciones_por_unidad': p.unit_draws,
+        'confianza': p.confidence,
+        'unidades': {unit: summary(p.scrutinized[i], p.counted[i], p.mean[i], p.low[i], p.high[i], p.win_probability[i])
+                     for i, unit in enumerate(p.units)},
+        total_name: summary(total_scrutinized, p.total_counted, p.total_mean, p.total_low, p.total_high,
+                            p.total_win_probability),
+    }
@@ -0,0 +1,143 @@
+import hashlib
+import os
+import re
+from contextlib import contextmanager
+
+# Marcador de una sección dentro de una plantilla de informe: '{{ nombre }}'.
+_SLOT_PATTERN = re.compile(r'\{\{ (\w+) \}\}')
+
+
+class ReportTemplate:
+    """
+    Plantilla de informe dividida en fragmentos de texto fijo y secciones con nombre
+    ('{{ nombre }}'). A diferencia de una f-string, las secciones no se interpolan todas
+    juntas: ReportWriter escribe el texto fijo hasta cada sección y luego el contenido de
+    la sección a medida que se genera.
+    """
+
+    def __init__(self, text):
+        """
+        Args:
+            text (str): Texto de la plantilla con marcadores '{{ nombre }}'.
+        """
+        parts = _SLOT_PATTERN.split(text)
+        self.literals = parts[0::2]
+        self.slots = parts[1::2]
+        if len(set(self.slots)) != len(self.slots):
+            raise ValueError('la plantilla tiene secciones repetidas')
+
+
+class ReportWriter:
+    """
+    Escribe un informe HTML por partes en un archivo (o cualquier objeto con `write`, como un
+    socket envuelto). Cada fragmento se escribe apenas se recibe y el escritor no conserva
+    nada: la memoria usada depende del fragmento más grande que arme quien lo llama, no del
+    tamaño del documento.
+
+    Los fragmentos HTML pueden pasar por una transformación (p. ej. la minificación del modo
+    empaquetado); los datos (JSON) se escriben sin transformar. Además se calcula un hash
+    del HTML de las secciones (sin los datos), que permite detectar cambios de estructura
+    sin guardar su contenido.
+    """
+
+    def __init__(self, stream, template, transform=None):
+        """
+        Args:
+            stream: Objeto de texto con método `write`.
+            template (ReportTemplate): Plantilla del informe.
+            transform (callable): Función opcional aplicada a cada fragmento HTML antes de escribirlo.
+        """
+        self.stream = stream
+        self.template = template
+        self.transform = transform
+        self._next = 0  # Índice del próximo fragmento de texto fijo de la plantilla.
+        self._digest = hashlib.sha256()
+
+    def _emit(self, text):
+        self.stream.write(text)
+
+    def write(self, html):
+        """Escribe un fragmento HTML de la sección actual."""
+        if html:
+            self._digest.update(html.encode('utf-8'))
+            self._emit(self.transform(html) if self.transform else html)
+
+    def write_fragment(self, fragment_id, html):
+        """
+        Escribe un fragmento HTML que depende de los datos (p. ej. una tabla de resultados) dentro
+        de un contenedor con id 'fragment-<fragment_id>'. Al hash solo se suma el id: un cambio de
+        datos no cuenta como cambio de estructura, y el modo en vivo reemplaza el contenido del
+        contenedor sin recargar la página.
+
+        Returns:
+            str: El fragmento tal como se escribió (con la transformación aplicada).
+        """
+        self._digest.update(f'<fragment {fragment_id}>'.encode('utf-8'))
+        if html and self.transform:
+            html = self.transform(html)
+        self._emit(f'<div class="live-fragment" id="fragment-{fragment_id}">{html}</div>')
+        return html
+
+    def write_data(self, text):
+        """Escribe datos (p. ej. JSON dentro de un <script>) sin aplicar la transformación ni sumarlos al hash."""
+        if text:
+            self._emit(text)
+
+    def section(self, name):
+        """
+        Escribe el texto fijo de la plantilla hasta la sección `name`; lo que se escriba a
+        continuación forma parte de esa sección.
+
+        Raises:
+            ValueError: Si la sección no existe o ya quedó atrás.
+        """
+        slots = self.template.slots
+        if name not in slots[self._next:]:
+            raise ValueError(f"la sección '{name}' no existe o ya fue escrita")
+        target = slots.index(name, self._next)
+        while self._next <= target:
+            self._write_literal(self.template.literals[self._next])
+            self._next += 1
+
+    def _write_literal(self, text):
+        if text:
+            self._emit(self.transform(text) if self.transform else text)
+
+    def finish(self):
+        """Escribe el resto de la plantilla (las secciones no visitadas quedan vacías)."""
+        while self._next < len(self.template.literals):
+            self._write_literal(self.template.literals[self._next])
+            self._next += 1
+
+    def content_digest(self):
+        """Hash del HTML escrito en las secciones (sin la plantilla, los datos ni la transformación)."""
+        return self._digest.hexdigest()
+
+
+@contextmanager
+def open_report(path, template, transform=None):
+    """
+    Abre un ReportWriter sobre un archivo. El informe se escribe en un archivo temporal que
+    reemplaza al final al anterior, de modo que quien lo lea (p. ej. el servidor del modo en
+    vivo) nunca ve un documento a medio escribir. Si ocurre un error, el archivo anterior
+    queda intacto. El temporal da atomicidad, no una respuesta más temprana: el informe
+    recién se publica cuando está completo.
+
+    Args:
+        path (str): Ruta del informe.
+        template (ReportTemplate): Plantilla del informe.
+        transform (callable): Transformación opcional de los fragmentos HTML.
+
+    Yields:
+        ReportWriter: El escritor; al salir del bloque se completa la plantilla.
+    """
+    tmp_path = f'{path}.tmp{os.getpid()}'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            writer = ReportWriter(f, template, transform=transform)
+            yield writer
+            writer.finish()
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
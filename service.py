@@ -0,0 +1,445 @@
+import asyncio
+import hashlib
+import json
+import os
+import urllib.parse
+from collections import OrderedDict
+
+import main
+from cube import ZONE_NAME
+from ingest import CARGO_GOBERNADOR, CARGO_PRESIDENTE
+
+# Cantidad máxima de respuestas guardadas en la caché LRU del servicio.
+DEFAULT_CACHE_SIZE = 4096
+# Intervalo de sondeo de los CSV de entrada, en segundos.
+POLL_INTERVAL = 1.0
+# Tiempo máximo de espera de la próxima petición en una conexión abierta, en segundos.
+IDLE_TIMEOUT = 30
+# Cantidad máxima de cabeceras por petición (las peticiones con más se rechazan).
+MAX_HEADERS = 100
+# Valores aceptados en el parámetro 'cargo' de /totals.
+CARGOS = {'gobernador': CARGO_GOBERNADOR, 'presidente': CARGO_PRESIDENTE}
+# Gráficos del informe que arma cada sección (ver main.build_departamentos_section y build_presidente_section).
+SECTION_FIGURES = {
+    'graph_gobernador_depto_candidato': 'departamentos',
+    'graph_gobernador_total_zona_norte': 'departamentos',
+    'graph_presidente_depto': 'presidente',
+    'graph_presidente_proyeccion': 'presidente',
+    'graph_presidente_prob_depto': 'presidente',
+}
+LOCALITY_FIGURE_PREFIX = 'localidad_graph_'
+
+_REASONS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            500: 'Internal Server Error'}
+
+
+class LRUCache:
+    """Caché acotada que descarta primero la entrada usada hace más tiempo."""
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        """
+        Args:
+            maxsize (int): Cantidad máxima de entradas.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        """Devuelve el valor guardado para `key` (y lo marca como recién usado), o None."""
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _signature(paths):
+    """Devuelve (tamaño, fecha de modificación) de cada archivo, o None si no existe."""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            signature.append(None)
+        else:
+            signature.append((stat.st_size, stat.st_mtime_ns))
+    return signature
+
+
+def _json_body(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _error_body(message):
+    return _json_body({'error': message})
+
+
+def _etag(body):
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def _etag_matches(header, etag):
+    """Indica si la cabecera If-None-Match incluye `etag` (las comparaciones débiles también valen)."""
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or candidate.removeprefix('W/') == etag:
+            return True
+    return False
+
+
+class ResultsService:
+    """
+    Servicio HTTP de consultas sobre los resultados, para widgets y otras páginas que no
+    necesitan el informe completo. Usa la misma capa de datos que generate_election_report
+    (el cubo de resultados, ver cube.py) y responde JSON:
+
+    - `/totals?cargo=gobernador&departamento=Minas` (o `&localidad=...`; sin unidad, la zona),
+    - `/localidades` (nombres y departamentos) y `/localidad/{nombre}` (Gobernador en una localidad),
+    - `/figure/{id}` (un gráfico del informe, listo para Plotly.newPlot) y `/figures` (los IDs),
+    - `/proyeccion` (proyección del resultado final de Presidente a partir del escrutinio parcial).
+
+    Cada respuesta se calcula la primera vez que se pide y se guarda en una caché LRU acotada,
+    que se vacía cuando cambian los CSV de entrada. Las respuestas llevan un ETag derivado de
+    su contenido, así que un cliente que repite la consulta con If-None-Match recibe un 304
+    sin cuerpo mientras los datos no cambien (aunque los CSV se hayan vuelto a cargar).
+    """
+
+    def __init__(self, departamentos_path, localidades_path, presidente_path, cache_size=DEFAULT_CACHE_SIZE):
+        """
+        Args:
+            departamentos_path (str): CSV de Gobernador por departamento.
+            localidades_path (str): CSV de Gobernador por localidad.
+            presidente_path (str): CSV de Presidente por departamento.
+            cache_size (int): Cantidad máxima de respuestas en la caché.
+        """
+        self.paths = [departamentos_path, localidades_path, presidente_path]
+        self.cache = LRUCache(cache_size)
+        self.cube = None
+        self.generation = 0
+        self._signature = None
+        self._locality_figures = {}
+        self._sections = {}
+        self._pending = {}
+        self._shared_layout = None
+
+    # --- Datos ---
+
+    def load(self):
+        """
+        Carga los CSV en un cubo nuevo. Se ejecuta fuera del bucle de eventos; el cubo se
+        instala luego con install() para que las consultas en curso no vean un estado a medias.
+
+        Returns:
+            tuple: (cubo, huella de los archivos).
+        """
+        signature = _signature(self.paths)
+        return main.load_report_cube(*self.paths), signature
+
+    def install(self, loaded):
+        """Reemplaza el cubo por uno recién cargado y vacía la caché de respuestas."""
+        cube, signature = loaded
+        table = cube.table(CARGO_GOBERNADOR, 'localidad') if cube.has(CARGO_GOBERNADOR, 'localidad') else None
+        self._locality_figures = {}
+        if table is not None:
+            for index, name in enumerate(table.units):
+                self._locality_figures.setdefault(LOCALITY_FIGURE_PREFIX + main.clean_filename(name), index)
+        self.cube, self._signature = cube, signature
+        self._sections = {}
+        self.generation += 1
+        self.cache.clear()
+
+    async def watch(self, interval=POLL_INTERVAL):
+        """Sondea los CSV y recarga el cubo cuando cambian (y dejan de cambiar entre dos sondeos)."""
+        pending = None
+        while True:
+            await asyncio.sleep(interval)
+            signature = _signature(self.paths)
+            if signature == self._signature:
+                pending = None
+                continue
+            if signature != pending:
+                pending = signature
+                continue
+            pending = None
+            try:
+                self.install(await asyncio.to_thread(self.load))
+            except Exception as e:
+                print(f"Error al recargar los datos del servicio: {e}")
+                continue
+            print(f"Servicio: datos recargados ({', '.join(os.path.basename(path) for path in self.paths)}).")
+
+    # --- Consultas ---
+
+    def unit_result(self, cargo, level, name):
+        """
+        Votos, porcentajes, ganador y margen de una unidad.
+
+        Raises:
+            KeyError: Si no hay votos del cargo para esa unidad.
+        """
+        cube = self.cube
+        if not (cube.has(cargo, level) or cube.has(cargo, level, rollup=True)):
+            raise KeyError(f"no hay votos de {cargo} por {level}")
+        votes = cube.unit_votes(cargo, level, name)
+        if votes is None:
+            raise KeyError(f"no hay votos de {cargo} para '{name}' ({level})")
+        total = sum(votes.values())
+        ranking = sorted(votes.items(), key=lambda item: -item[1])
+        result = {
+            'cargo': cargo,
+            'nivel': level,
+            'unidad': cube.unit_label(level, name, cargo),
+            'total': total,
+            'votos': votes,
+            'porcentajes': {candidate: round(100 * count / total, 2) if total else 0.0
+                            for candidate, count in votes.items()},
+            'ganador': ranking[0][0] if ranking and ranking[0][1] > 0 else None,
+            'margen': ranking[0][1] - ranking[1][1] if len(ranking) > 1 else None,
+        }
+        if level != 'zona':
+            result['superior'] = cube.parent(level, name)
+        return result
+
+    def totals(self, query):
+        cargo = CARGOS.get(query.get('cargo', 'gobernador').lower())
+        if cargo is None:
+            raise ValueError(f"cargo desconocido: use uno de {', '.join(CARGOS)}")
+        units = [level for level in ('localidad', 'departamento') if level in query]
+        if len(units) > 1:
+            raise ValueError("indique un departamento o una localidad, no ambos")
+        if units:
+            return self.unit_result(cargo, units[0], query[units[0]])
+        return self.unit_result(cargo, 'zona', ZONE_NAME)
+
+    def localities(self):
+        if not self.cube.has(CARGO_GOBERNADOR, 'localidad'):
+            raise KeyError("no hay votos por localidad")
+        names = self.cube.table(CARGO_GOBERNADOR, 'localidad').units
+        return {'localidades': [{'nombre': name, 'departamento': self.cube.parent('localidad', name)} for name in names]}
+
+    def figure_ids(self):
+        return {'figuras': list(SECTION_FIGURES) + list(self._locality_figures)}
+
+    def projection(self):
+        """
+        Proyección del resultado final de Presidente por departamento y en la zona (ver
+        projection.project_results). Es una simulación: se ejecuta fuera del bucle de eventos.
+        """
+        from projection import project_results, projection_summary
+
+        cube = self.cube
+        if not cube.has(CARGO_PRESIDENTE, 'departamento'):
+            raise KeyError("no hay votos de Presidente por departamento")
+        table = cube.table(CARGO_PRESIDENTE, 'departamento')
+        escrutado = table.extras.get(main.PRESIDENTE_ESCRUTADO_COLUMN)
+        if escrutado is None:
+            raise KeyError(f"el CSV de Presidente no tiene la columna '{main.PRESIDENTE_ESCRUTADO_COLUMN}'")
+        projection = project_results(table.units, table.candidates, table.votes, escrutado / 100)
+        return projection_summary(projection, total_name=ZONE_NAME)
+
+    def figure(self, graph_id):
+        """
+        Arma un gráfico del informe como figura completa ({'data', 'layout'}), con el layout
+        común del informe ya combinado. Es la consulta más costosa: se ejecuta fuera del bucle de eventos.
+        """
+        from plotly_payload import merge_layouts, shared_layout_spec
+
+        # Se toma el estado actual de una vez: una recarga puede instalar otro cubo mientras tanto.
+        cube, sections, locality_figures = self.cube, self._sections, self._locality_figures
+        section_name = SECTION_FIGURES.get(graph_id)
+        if section_name is not None:
+            section = sections.get(section_name)
+            if section is None:
+                builder = (main.build_departamentos_section if section_name == 'departamentos'
+                           else main.build_presidente_section)
+                # Cada sección arma todos sus gráficos juntos; se conserva para los demás gráficos de la misma sección.
+                section = sections[section_name] = builder(cube)
+            spec = section['figures'].get(graph_id)
+        elif graph_id in locality_figures:
+            index = locality_figures[graph_id]
+            table = cube.table(CARGO_GOBERNADOR, 'localidad')
+            _, figures = main.build_locality_charts(table.units[index:index + 1], table.votes[index:index + 1],
+                                                    table.candidates)
+            spec = figures.get(graph_id)
+        else:
+            raise KeyError(f"no existe el gráfico '{graph_id}'")
+        if spec is None:
+            raise KeyError(f"el gráfico '{graph_id}' no tiene datos válidos")
+        if self._shared_layout is None:
+            self._shared_layout = shared_layout_spec(main.PLOTLY_LAYOUT_CONFIG)
+        return {'data': spec['data'], 'layout': merge_layouts(self._shared_layout, spec['layout'])}
+
+    def route(self, path, query):
+        """
+        Resuelve una ruta.
+
+        Returns:
+            tuple: (función sin argumentos que calcula la respuesta, True si debe ejecutarse fuera del bucle).
+
+        Raises:
+            KeyError: Si la ruta no existe.
+        """
+        if path == '/':
+            return (lambda: {'endpoints': ['/totals?cargo=gobernador&departamento=Minas', '/localidades',
+                                           '/localidad/{nombre}', '/figures', '/figure/{id}',
+                                           '/proyeccion']}), False
+        if path == '/totals':
+            return (lambda: self.totals(query)), False
+        if path == '/localidades':
+            return self.localities, False
+        if path.startswith('/localidad/') and len(path) > len('/localidad/'):
+            name = path[len('/localidad/'):]
+            return (lambda: self.unit_result(CARGO_GOBERNADOR, 'localidad', name)), False
+        if path == '/figures':
+            return self.figure_ids, False
+        if path == '/proyeccion':
+            return self.projection, True
+        if path.startswith('/figure/'):
+            graph_id = path[len('/figure/'):]
+            return (lambda: self.figure(graph_id)), True
+        raise KeyError(f"ruta desconocida: {path}")
+
+    async def query(self, target):
+        """
+        Devuelve la respuesta a una petición GET, desde la caché si está.
+
+        Returns:
+            tuple: (código de estado, cuerpo JSON en bytes, ETag o None).
+        """
+        parts = urllib.parse.urlsplit(target)
+        path = urllib.parse.unquote(parts.path)
+        query = dict(urllib.parse.parse_qsl(parts.query))
+        key = (path, tuple(sorted(query.items())))
+        entry = self.cache.get(key)
+        if entry is not None:
+            return 200, entry[0], entry[1]
+        generation = self.generation
+        try:
+            compute, blocking = self.route(path, query)
+            if blocking:
+                # Las peticiones simultáneas de un mismo gráfico esperan a un único cálculo. La clave
+                # incluye la generación: tras una recarga, una petición nueva no espera (ni guarda en
+                # la caché) el resultado de un cálculo que empezó con los datos anteriores.
+                pending_key = (generation, key)
+                task = self._pending.get(pending_key)
+                if task is None:
+                    task = self._pending[pending_key] = asyncio.ensure_future(asyncio.to_thread(compute))
+                    task.add_done_callback(lambda _: self._pending.pop(pending_key, None))
+                result = await task
+            else:
+                result = compute()
+        except KeyError as e:
+            return 404, _error_body(e.args[0]), None
+        except ValueError as e:
+            return 400, _error_body(str(e)), None
+        body = _json_body(result)
+        etag = _etag(body)
+        # Si los datos se recargaron mientras se calculaba, la respuesta no se guarda.
+        if generation == self.generation:
+            self.cache.put(key, (body, etag))
+        return 200, body, etag
+
+    # --- Servidor HTTP ---
+
+    async def handle(self, reader, writer):
+        """Atiende una conexión HTTP/1.1; la conexión se reutiliza mientras el cliente no pida cerrarla."""
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                    if len(headers) > MAX_HEADERS:
+                        break
+                parts = request_line.decode('latin-1').split()
+                if len(parts) != 3 or len(headers) > MAX_HEADERS:
+                    await self._respond(writer, 400, _error_body('petición mal formada'), None, keep_alive=False)
+                    break
+                method, target, version = parts
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+                if method not in ('GET', 'HEAD'):
+                    # Las peticiones con cuerpo no se admiten: se responde y se cierra la conexión.
+                    await self._respond(writer, 405, _error_body('método no permitido'), None, keep_alive=False)
+                    break
+                try:
+                    status, body, etag = await self.query(target)
+                except Exception as e:
+                    print(f"Error al atender {target}: {e}")
+                    status, body, etag = 500, _error_body(str(e)), None
+                if etag is not None and _etag_matches(headers.get('if-none-match', ''), etag):
+                    status, body = 304, b''
+                await self._respond(writer, status, body, etag, keep_alive=keep_alive, head=(method == 'HEAD'))
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, body, etag, keep_alive=True, head=False):
+        head_lines = [f'HTTP/1.1 {status} {_REASONS[status]}']
+        if status != 304:
+            head_lines += ['Content-Type: application/json; charset=utf-8', f'Content-Length: {len(body)}']
+        if etag is not None:
+            # El cliente puede guardar la respuesta, pero debe revalidarla (con If-None-Match) antes de usarla.
+            head_lines += [f'ETag: {etag}', 'Cache-Control: no-cache']
+        # Los widgets se incrustan en páginas de otros dominios.
+        head_lines.append('Access-Control-Allow-Origin: *')
+        if not keep_alive:
+            head_lines.append('Connection: close')
+        writer.write(('\r\n'.join(head_lines) + '\r\n\r\n').encode('latin-1') + (b'' if head else body))
+        await writer.drain()
+
+    async def serve(self, host, port):
+        """Carga los datos, inicia el servidor y vigila los CSV hasta que se interrumpa."""
+        self.install(await asyncio.to_thread(self.load))
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Servicio de resultados disponible en http://{host}:{port}/ (Ctrl+C para salir)")
+        async with server:
+            await self.watch()
+
+
+def serve_results(departamentos_path, localidades_path, presidente_path, host='127.0.0.1', port=8001,
+                  cache_size=DEFAULT_CACHE_SIZE):
+    """
+    Inicia el servicio de resultados (ver ResultsService) y bloquea hasta que se interrumpa con Ctrl+C.
+
+    Args:
+        departamentos_path (str): CSV de Gobernador por departamento.
+        localidades_path (str): CSV de Gobernador por localidad.
+        presidente_path (str): CSV de Presidente por departamento.
+        host (str): Dirección en la que escucha el servidor.
+        port (int): Puerto del servidor.
+        cache_size (int): Cantidad máxima de respuestas en la caché.
+    """
+    service = ResultsService(departamentos_path, localidades_path, presidente_path, cache_size=cache_size)
+    try:
+        asyncio.run(service.serve(host, port))
+    except KeyboardInterrupt:
+        print("Servicio de resultados detenido.")
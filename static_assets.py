@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import re
+
+# Subdirectorio (dentro del directorio de salida) con los recursos del modo de recursos separados.
+STATIC_DIRNAME = 'static'
+# Dígitos del hash del contenido en el nombre de cada recurso (los mismos que las imágenes, ver assets.py).
+HASH_LENGTH = 10
+# Generaciones del informe cuyos recursos se conservan: un navegador o un CDN con una versión
+# anterior del HTML todavía puede pedir los recursos que esa versión referencia.
+KEEP_GENERATIONS = 3
+# Cabecera Cache-Control de los recursos con hash: su contenido no cambia nunca.
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Nombre con el hash del contenido: 'informe.3f2a9c1b0d.css', 'sergio-massa.5c26c2d1a3.2x.png'.
+_HASHED_NAME_PATTERN = re.compile(r'\.[0-9a-f]{%d}\.' % HASH_LENGTH)
+_HEAD_PATTERN = re.compile(r'<head\b[^>]*>', re.I)
+
+
+def is_hashed_asset(path):
+    """Indica si el nombre de un archivo incluye el hash de su contenido (y puede cachearse indefinidamente)."""
+    return bool(_HASHED_NAME_PATTERN.search(os.path.basename(path)))
+
+
+def rebase_html(html, base_url):
+    """
+    Agrega un <base href> al documento, para que sus URL relativas (recursos locales, teselas)
+    sigan resolviéndose contra el directorio original después de moverlo a otro directorio.
+
+    Args:
+        html (str): El documento HTML.
+        base_url (str): URL base (p. ej. '../').
+
+    Returns:
+        str: El documento con la etiqueta <base>.
+    """
+    tag = f'<base href="{base_url}">'
+    match = _HEAD_PATTERN.search(html)
+    if match is None:
+        return tag + html
+    return html[:match.end()] + tag + html[match.end():]
+
+
+class StaticAssets:
+    """
+    Recursos del modo de recursos separados: cada uno se guarda en STATIC_DIRNAME con el hash
+    de su contenido en el nombre ('<nombre>.<hash>.<ext>'). Un recurso que no cambió conserva
+    su nombre (y el navegador o el CDN, su copia en caché); uno que cambió recibe un nombre nuevo,
+    así que nunca hace falta invalidar cachés.
+
+    Un manifiesto en el mismo directorio registra los recursos de las últimas generaciones del
+    informe; al terminar (finish) se borran los que ya no pertenecen a ninguna de ellas.
+    """
+
+    def __init__(self, output_dir, keep=KEEP_GENERATIONS):
+        """
+        Args:
+            output_dir (str): Directorio de salida del informe.
+            keep (int): Generaciones cuyos recursos se conservan (ver KEEP_GENERATIONS).
+        """
+        self.output_dir = output_dir
+        self.directory = os.path.join(output_dir, STATIC_DIRNAME)
+        self.keep = max(1, keep)
+        self.files = []
+        self.written = 0
+
+    def add(self, stem, ext, content):
+        """
+        Guarda un recurso (si no existe ya con el mismo contenido).
+
+        Args:
+            stem (str): Nombre del recurso sin extensión (p. ej. 'informe').
+            ext (str): Extensión, con el punto (p. ej. '.css').
+            content (str or bytes): Contenido; el texto se guarda en UTF-8.
+
+        Returns:
+            str: URL del recurso relativa a `output_dir` (p. ej. 'static/informe.3f2a9c1b0d.css').
+        """
+        data = content.encode('utf-8') if isinstance(content, str) else content
+        name = f'{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}'
+        path = os.path.join(self.directory, name)
+        if not os.path.exists(path):
+            os.makedirs(self.directory, exist_ok=True)
+            # Se escribe en un temporal y se renombra: quien lo pida nunca recibe un archivo a medias.
+            tmp_path = f'{path}.tmp{os.getpid()}'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            self.written += 1
+        if name not in self.files:
+            self.files.append(name)
+        return f'{STATIC_DIRNAME}/{name}'
+
+    def add_json(self, stem, data):
+        """Guarda `data` como JSON compacto (ver add) y devuelve su URL."""
+        return self.add(stem, '.json', json.dumps(data, ensure_ascii=False, separators=(',', ':')))
+
+    def add_page(self, path):
+        """
+        Guarda una copia con hash de un HTML del directorio de salida (p. ej. el mapa del iframe).
+        La copia lleva un <base href> al directorio original, así sus URL relativas no cambian.
+
+        Args:
+            path (str): Ruta del HTML, dentro de `output_dir`.
+
+        Returns:
+            str: URL de la copia relativa a `output_dir`.
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        relative_dir = os.path.relpath(os.path.dirname(path), self.directory).replace(os.sep, '/')
+        stem = os.path.splitext(os.path.basename(path))[0]
+        return self.add(stem, '.html', rebase_html(html, relative_dir.rstrip('/') + '/'))
+
+    def finish(self):
+        """
+        Registra los recursos de esta generación en el manifiesto y borra los de las generaciones
+        que ya no se conservan (las versiones precomprimidas huérfanas las borra bundle.precompress_tree).
+
+        Returns:
+            int: Cantidad de archivos borrados.
+        """
+        manifest_path = os.path.join(self.directory, 'manifest.json')
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                generations = json.load(f)['generaciones']
+        except (OSError, ValueError, KeyError):
+            generations = []
+        current = sorted(self.files)
+        # Una generación igual a la anterior (nada cambió) no desplaza a las demás.
+        generations = ([current] + [files for files in generations if files != current])[:self.keep]
+        os.makedirs(self.directory, exist_ok=True)
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump({'generaciones': generations}, f, ensure_ascii=False, indent=1)
+
+        kept = {name for files in generations for name in files}
+        removed = 0
+        for name in os.listdir(self.directory):
+            if name == 'manifest.json' or name.endswith(('.gz', '.br')) or name in kept:
+                continue
+            os.remove(os.path.join(self.directory, name))
+            removed += 1
+        return removed
@@ -0,0 +1,335 @@
+import json
+import math
+import os
+import shutil
+
+import numpy as np
+from branca.element import MacroElement
+from jinja2 import Template
+
+from geometry import _iter_polygons, simplify_collections
+
+# Rango de zoom de la pirámide de teselas. Por debajo del mínimo y por encima del máximo,
+# Leaflet escala las teselas más cercanas.
+DEFAULT_MIN_ZOOM = 6
+DEFAULT_MAX_ZOOM = 12
+TILE_SIZE = 256
+# Margen alrededor de cada tesela, en píxeles: los bordes creados por el recorte quedan fuera
+# del área visible y no se dibujan como límites.
+TILE_BUFFER_PX = 8
+# Tolerancia de simplificación por zoom, en píxeles de pantalla.
+SIMPLIFY_TOLERANCE_PX = 0.5
+# Subdirectorio (junto al HTML del mapa) con la pirámide de teselas.
+MAP_TILES_DIRNAME = 'mapa_tiles'
+
+
+# --- Geometría de teselas (Web Mercator, esquema z/x/y) ---
+
+def _tile_range(bounds, zoom):
+    """Rango (x0, y0, x1, y1) de teselas que cubren una caja (oeste, sur, este, norte) en un zoom."""
+    n = 2 ** zoom
+
+    def tile_x(lon):
+        return min(n - 1, max(0, int((lon + 180) / 360 * n)))
+
+    def tile_y(lat):
+        lat = max(-85.0511, min(85.0511, lat))
+        return min(n - 1, max(0, int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)))
+
+    west, south, east, north = bounds
+    return tile_x(west), tile_y(north), tile_x(east), tile_y(south)
+
+
+def tile_bounds(x, y, zoom):
+    """
+    Devuelve la caja (oeste, sur, este, norte) en grados de una tesela.
+
+    Args:
+        x (int): Columna de la tesela.
+        y (int): Fila de la tesela.
+        zoom (int): Nivel de zoom.
+
+    Returns:
+        tuple: (oeste, sur, este, norte).
+    """
+    n = 2 ** zoom
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360 - 180, lat(y + 1), (x + 1) / n * 360 - 180, lat(y)
+
+
+def _clip_ring(ring, box):
+    """
+    Recorta un anillo a una caja alineada con los ejes (Sutherland-Hodgman), vectorizado por arista.
+
+    Args:
+        ring (np.ndarray): Puntos (n, 2) del anillo cerrado.
+        box (tuple): (oeste, sur, este, norte).
+
+    Returns:
+        np.ndarray or None: El anillo recortado (cerrado) o None si queda vacío.
+    """
+    points = ring[:-1] if len(ring) > 1 and np.array_equal(ring[0], ring[-1]) else ring
+    for axis, bound, keep_greater in ((0, box[0], True), (0, box[2], False), (1, box[1], True), (1, box[3], False)):
+        if not len(points):
+            return None
+        current = points
+        following = np.roll(points, -1, axis=0)
+        inside_cur = current[:, axis] >= bound if keep_greater else current[:, axis] <= bound
+        inside_next = following[:, axis] >= bound if keep_greater else following[:, axis] <= bound
+        if inside_cur.all():
+            continue
+        crossing = inside_cur != inside_next
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (bound - current[:, axis]) / (following[:, axis] - current[:, axis])
+            intersection = current + (following - current) * t[:, None]
+        intersection[:, axis] = bound
+        # Cada arista emite: la intersección (si cruza el borde) y luego el punto siguiente (si está dentro).
+        emitted = np.empty((len(points), 2, 2))
+        emitted[:, 0] = intersection
+        emitted[:, 1] = following
+        mask = np.stack([crossing, inside_next], axis=1)
+        points = emitted[mask]
+    if len(points) < 3:
+        return None
+    return np.vstack([points, points[:1]])
+
+
+def _clip_geometry(polygons, box):
+    """Recorta una lista de polígonos (lista de anillos como arreglos) a una caja. Devuelve coordenadas MultiPolygon."""
+    clipped = []
+    for rings in polygons:
+        exterior = _clip_ring(rings[0], box)
+        if exterior is None:
+            continue
+        polygon = [exterior]
+        for hole in rings[1:]:
+            clipped_hole = _clip_ring(hole, box)
+            if clipped_hole is not None:
+                polygon.append(clipped_hole)
+        clipped.append(polygon)
+    return clipped
+
+
+def _round_coords(polygons, precision):
+    return [[np.round(ring, precision).tolist() for ring in polygon] for polygon in polygons]
+
+
+# --- Pirámide de teselas ---
+
+def build_tile_pyramid(collection, output_dir, min_zoom=DEFAULT_MIN_ZOOM, max_zoom=DEFAULT_MAX_ZOOM):
+    """
+    Corta una FeatureCollection en una pirámide estática de teselas z/x/y en GeoJSON.
+    Para cada zoom, las geometrías se simplifican (preservando los límites compartidos) con una
+    tolerancia de medio píxel y se recortan a cada tesela, con las propiedades de cada feature
+    (votos, color, popup) incluidas. Solo se escriben las teselas que contienen geometría.
+
+    Args:
+        collection (dict): FeatureCollection de polígonos (sin simplificar).
+        output_dir (str): Directorio de salida; se reemplaza por completo.
+        min_zoom (int): Zoom mínimo de la pirámide.
+        max_zoom (int): Zoom máximo de la pirámide.
+
+    Returns:
+        dict: Índice de la pirámide: {'minzoom', 'maxzoom', 'bounds': [oeste, sur, este, norte],
+        'tiles': {zoom: ['x/y', ...]}}. También se guarda como 'index.json' en `output_dir`.
+    """
+    if os.path.exists(output_dir):
+        shutil.rmtree(output_dir)
+    os.makedirs(output_dir)
+    index = {'minzoom': min_zoom, 'maxzoom': max_zoom, 'bounds': None, 'tiles': {}}
+
+    for zoom in range(min_zoom, max_zoom + 1):
+        degrees_per_px = 360 / (TILE_SIZE * 2 ** zoom)
+        # Decimales suficientes para una precisión de ~1/10 de píxel en este zoom.
+        precision = max(0, int(math.ceil(-math.log10(degrees_per_px / 10))))
+        simplified = simplify_collections([collection], tolerance=degrees_per_px * SIMPLIFY_TOLERANCE_PX,
+                                          precision=precision)[0]
+        tiles = {}
+        for feature in simplified['features']:
+            polygons = [[np.asarray(ring, dtype=float) for ring in polygon]
+                        for polygon in _iter_polygons(feature['geometry'])]
+            if not polygons:
+                continue
+            points = np.vstack([polygon[0] for polygon in polygons])
+            bounds = (points[:, 0].min(), points[:, 1].min(), points[:, 0].max(), points[:, 1].max())
+            if zoom == min_zoom:
+                previous = index['bounds'] or list(bounds)
+                index['bounds'] = [min(previous[0], bounds[0]), min(previous[1], bounds[1]),
+                                   max(previous[2], bounds[2]), max(previous[3], bounds[3])]
+            x0, y0, x1, y1 = _tile_range(bounds, zoom)
+            buffer = degrees_per_px * TILE_BUFFER_PX
+            for x in range(x0, x1 + 1):
+                for y in range(y0, y1 + 1):
+                    west, south, east, north = tile_bounds(x, y, zoom)
+                    # El margen en latitud se aproxima con el de longitud (alcanza para ocultar los bordes del recorte).
+                    clipped = _clip_geometry(polygons, (west - buffer, south - buffer, east + buffer, north + buffer))
+                    if clipped:
+                        tiles.setdefault((x, y), []).append({
+                            'type': 'Feature',
+                            'properties': feature['properties'],
+                            'geometry': {'type': 'MultiPolygon', 'coordinates': _round_coords(clipped, precision)},
+                        })
+        for (x, y), features in tiles.items():
+            tile_dir = os.path.join(output_dir, str(zoom), str(x))
+            os.makedirs(tile_dir, exist_ok=True)
+            with open(os.path.join(tile_dir, f'{y}.geojson'), 'w', encoding='utf-8') as f:
+                json.dump({'type': 'FeatureCollection', 'features': features}, f,
+                          ensure_ascii=False, separators=(',', ':'))
+        index['tiles'][str(zoom)] = sorted(f'{x}/{y}' for x, y in tiles)
+
+    with open(os.path.join(output_dir, 'index.json'), 'w', encoding='utf-8') as f:
+        json.dump(index, f, separators=(',', ':'))
+    return index
+
+
+# --- Capa de Leaflet que carga las teselas bajo demanda ---
+
+class TiledGeoJson(MacroElement):
+    """
+    Capa de Folium que dibuja una pirámide de build_tile_pyramid. Es un L.GridLayer que
+    descarga cada tesela solo cuando entra en pantalla y la dibuja en un canvas con el
+    color de relleno de cada feature ('fillColor'). Al hacer clic, busca el polígono en
+    la tesela cargada y abre un popup con la propiedad 'popup'. Si las features traen
+    'colors' (un relleno por vista), setView(clave) redibuja las teselas con esa vista.
+
+    Las teselas se descargan con fetch, así que el mapa debe servirse por HTTP (por ejemplo,
+    con el modo en vivo) y no abrirse como archivo local.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function () {
+                var index = {{ this.index|tojson }};
+                var tileUrl = {{ this.url|tojson }};
+                var style = {{ this.style|tojson }};
+                var available = {};
+                Object.keys(index.tiles).forEach(function (z) {
+                    index.tiles[z].forEach(function (xy) { available[z + '/' + xy] = true; });
+                });
+                var loaded = {};
+                // Vista activa (ver map_views.MapViews): elige el relleno de feature.properties.colors.
+                var view = null;
+
+                function drawTile(canvas, features, coords, map) {
+                    var ctx = canvas.getContext('2d');
+                    var origin = coords.scaleBy(L.point(canvas.width, canvas.height));
+                    features.forEach(function (feature) {
+                        ctx.beginPath();
+                        feature.geometry.coordinates.forEach(function (polygon) {
+                            polygon.forEach(function (ring) {
+                                ring.forEach(function (coord, i) {
+                                    var p = map.project([coord[1], coord[0]], coords.z).subtract(origin);
+                                    if (i === 0) { ctx.moveTo(p.x, p.y); } else { ctx.lineTo(p.x, p.y); }
+                                });
+                                ctx.closePath();
+                            });
+                        });
+                        ctx.globalAlpha = style.fillOpacity;
+                        ctx.fillStyle = (view && feature.properties.colors && feature.properties.colors[view])
+                            || feature.properties.fillColor || style.fillColor;
+                        ctx.fill('evenodd');
+                        ctx.globalAlpha = 1;
+                        ctx.lineWidth = style.weight;
+                        ctx.strokeStyle = style.color;
+                        ctx.stroke();
+                    });
+                }
+
+                function ringContains(ring, lon, lat) {
+                    var inside = false;
+                    for (var i = 0, j = ring.length - 1; i < ring.length; j = i++) {
+                        var xi = ring[i][0], yi = ring[i][1], xj = ring[j][0], yj = ring[j][1];
+                        if ((yi > lat) !== (yj > lat) && lon < (xj - xi) * (lat - yi) / (yj - yi) + xi) {
+                            inside = !inside;
+                        }
+                    }
+                    return inside;
+                }
+
+                var Layer = L.GridLayer.extend({
+                    createTile: function (coords, done) {
+                        var tile = L.DomUtil.create('canvas', 'leaflet-tile');
+                        var size = this.getTileSize();
+                        tile.width = size.x;
+                        tile.height = size.y;
+                        var key = coords.z + '/' + coords.x + '/' + coords.y;
+                        if (!available[key]) {
+                            setTimeout(function () { done(null, tile); }, 0);
+                            return tile;
+                        }
+                        var map = this._map;
+                        fetch(tileUrl.replace('{z}', coords.z).replace('{x}', coords.x).replace('{y}', coords.y))
+                            .then(function (response) { return response.json(); })
+                            .then(function (data) {
+                                loaded[key] = data.features;
+                                drawTile(tile, data.features, coords, map);
+                                done(null, tile);
+                            })
+                            .catch(function (error) { done(error, tile); });
+                        return tile;
+                    }
+                });
+
+                var layer = new Layer({
+                    minNativeZoom: index.minzoom,
+                    maxNativeZoom: index.maxzoom,
+                    bounds: L.latLngBounds([index.bounds[1], index.bounds[0]], [index.bounds[3], index.bounds[2]])
+                }).addTo({{ this._parent.get_name() }});
+
+                // Cambia la vista redibujando las teselas ya cargadas, sin volver a descargarlas.
+                layer.setView = function (key) {
+                    view = key;
+                    Object.keys(layer._tiles).forEach(function (id) {
+                        var tile = layer._tiles[id];
+                        var features = loaded[tile.coords.z + '/' + tile.coords.x + '/' + tile.coords.y];
+                        if (features) {
+                            tile.el.getContext('2d').clearRect(0, 0, tile.el.width, tile.el.height);
+                            drawTile(tile.el, features, tile.coords, layer._map);
+                        }
+                    });
+                };
+
+                {{ this._parent.get_name() }}.on('click', function (e) {
+                    var map = {{ this._parent.get_name() }};
+                    var z = Math.max(index.minzoom, Math.min(index.maxzoom, Math.round(map.getZoom())));
+                    var tile = map.project(e.latlng, z).divideBy(256).floor();
+                    var features = loaded[z + '/' + tile.x + '/' + tile.y] || [];
+                    for (var f = 0; f < features.length; f++) {
+                        var count = 0;
+                        features[f].geometry.coordinates.forEach(function (polygon) {
+                            polygon.forEach(function (ring) {
+                                if (ringContains(ring, e.latlng.lng, e.latlng.lat)) { count++; }
+                            });
+                        });
+                        if (count % 2 === 1) {
+                            L.popup({maxWidth: 300}).setLatLng(e.latlng)
+                                .setContent(features[f].properties.popup).openOn(map);
+                            return;
+                        }
+                    }
+                });
+                return layer;
+            })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, index, url, style=None):
+        """
+        Args:
+            index (dict): Índice devuelto por build_tile_pyramid.
+            url (str): Plantilla de URL de las teselas, relativa al HTML del mapa ('.../{z}/{x}/{y}.geojson').
+            style (dict): Estilo de dibujo: 'color', 'weight', 'fillOpacity' y 'fillColor' por defecto.
+        """
+        super().__init__()
+        self._name = 'TiledGeoJson'
+        self.index = index
+        self.url = url
+        self.style = dict({'color': 'black', 'weight': 1, 'fillOpacity': 0.6, 'fillColor': '#cccccc'}, **(style or {}))
+
+    def bounds(self):
+        """Límites de la pirámide como [[sur, oeste], [norte, este]], para fit_bounds."""
+        west, south, east, north = self.index['bounds']
+        return [[south, west], [north, east]]
@@ -0,0 +1,471 @@
+import csv
+from collections import namedtuple
+
+from datasets import _INT_PATTERN, _PERCENT_PATTERN, _ZERO_VALUES, KEY_COLUMNS, PERCENT_SUFFIX, _unique_names
+
+# Cantidad máxima de problemas que se informan por columna (o por archivo, en las filas mal formadas).
+MAX_PROBLEMS_PER_COLUMN = 5
+
+# Gravedad de una discrepancia entre archivos: los errores son datos que no cierran; los avisos,
+# diferencias que el informe tolera (p. ej. un nombre escrito sin acento en otro archivo).
+SEVERITY_ERROR = 'error'
+SEVERITY_WARNING = 'aviso'
+# Diferencia máxima, en puntos, entre un porcentaje del CSV y el recalculado (los CSV redondean a 0,1).
+PERCENT_TOLERANCE = 0.1
+# Columna con el total de votos emitidos, base de los porcentajes del CSV de presidente.
+EMITTED_COLUMN = 'Votos Totales Emitidos'
+# Columna de conteos de la que sale cada porcentaje cuando sus nombres no coinciden.
+PERCENT_BASES = {'Votos Blancos (%)': 'Votos en Blanco'}
+# Cantidad máxima de discrepancias por control que se muestran como texto (el reporte JSON las incluye todas).
+MAX_DISCREPANCIES_PER_CHECK = 10
+
+# Una discrepancia: control que la detectó, gravedad, archivo, fila y columna (según el control:
+# unidad, candidato o celda), valor esperado y encontrado, y una descripción legible.
+Discrepancy = namedtuple('Discrepancy', ['check', 'severity', 'source', 'row', 'column', 'expected', 'found',
+                                         'detail'])
+
+
+# --- Validación de formato de cada CSV ---
+
+def validate_csv(path):
+    """
+    Verifica que un CSV electoral tenga el formato que espera datasets.parse_election_csv, sin
+    convertirlo (solo usa el módulo csv, así que no importa numpy ni pandas): encabezado con
+    al menos una columna clave, todas las filas con la misma cantidad de columnas, nombres no
+    vacíos en las columnas clave y, en cada columna de datos, solo conteos ('1.574', '-') o
+    solo porcentajes ('9,40%').
+
+    Args:
+        path (str): Ruta al CSV.
+
+    Returns:
+        list: Descripciones de los problemas encontrados (vacía si el archivo es válido).
+    """
+    try:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            rows = [(reader.line_num, row) for row in reader if any(cell.strip() for cell in row)]
+    except FileNotFoundError:
+        return [f"no existe el archivo {path}"]
+    except (OSError, UnicodeDecodeError, csv.Error) as e:
+        return [f"no se pudo leer {path}: {e}"]
+    if not header:
+        return [f"{path} está vacío"]
+
+    problems = []
+    header = [name.strip() for name in header]
+    if not any(name in KEY_COLUMNS for name in header):
+        problems.append(f"{path}: el encabezado no tiene ninguna columna clave ({', '.join(KEY_COLUMNS)})")
+    malformed = [line for line, row in rows if len(row) != len(header)]
+    for line in malformed[:MAX_PROBLEMS_PER_COLUMN]:
+        problems.append(f"{path}:{line}: la fila no tiene {len(header)} columnas como el encabezado")
+    if len(malformed) > MAX_PROBLEMS_PER_COLUMN:
+        problems.append(f"{path}: ... y {len(malformed) - MAX_PROBLEMS_PER_COLUMN} fila(s) mal formadas más")
+    rows = [(line, row) for line, row in rows if len(row) == len(header)]
+
+    for index, name in enumerate(header):
+        cells = [(line, row[index].strip()) for line, row in rows]
+        if name in KEY_COLUMNS:
+            bad = [(line, value) for line, value in cells if not value]
+            reason = 'nombre vacío'
+        elif cells and all(_PERCENT_PATTERN.match(value) for _, value in cells):
+            continue
+        else:
+            bad = [(line, value) for line, value in cells
+                   if value not in _ZERO_VALUES and not _INT_PATTERN.match(value)]
+            reason = 'no es un conteo ni un porcentaje'
+        for line, value in bad[:MAX_PROBLEMS_PER_COLUMN]:
+            problems.append(f"{path}:{line}: columna '{name}': {reason} ({value!r})")
+        if len(bad) > MAX_PROBLEMS_PER_COLUMN:
+            problems.append(f"{path}: columna '{name}': ... y {len(bad) - MAX_PROBLEMS_PER_COLUMN} celda(s) más")
+    return problems
+
+
+def validate_files(paths):
+    """
+    Valida varios CSV (ver validate_csv).
+
+    Args:
+        paths (list): Rutas a los CSV.
+
+    Returns:
+        dict: Mapa de ruta a lista de problemas.
+    """
+    return {path: validate_csv(path) for path in paths}
+
+
+# --- Consistencia entre archivos ---
+# numpy, pandas e ingest (que importa pandas) se importan dentro de las funciones, como en
+# datasets.py: la validación de formato de arriba no debe pagar el costo de importarlos.
+
+# Tabla leída para los controles: columnas clave como texto, columnas de datos como float64
+# (NaN donde la celda no es un número) y máscara de las celdas de datos vacías.
+_Table = namedtuple('_Table', ['path', 'keys', 'data', 'missing'])
+
+
+def _read_table(path):
+    """
+    Lee un CSV electoral y convierte todas sus columnas de datos en bloque, con las mismas reglas
+    que datasets.parse_election_csv ('1.574' -> 1574, '-' -> 0, '9,40%' -> 9.4 en una columna con
+    el sufijo ' (%)'), pero sin rechazar el archivo: los valores negativos se conservan y las
+    celdas vacías se marcan en lugar de valer 0.
+    """
+    import numpy as np
+    import pandas as pd
+
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        header = [name.strip() for name in next(csv.reader(f), [])]
+    key_columns = [i for i, name in enumerate(header) if name in KEY_COLUMNS]
+    # El parser de C convierte los conteos ('1.574' con separador de miles y '-' como NaN, que vale 0).
+    # Solo las columnas que no quedan numéricas (con celdas vacías, porcentajes o valores inválidos)
+    # se revisan después como texto.
+    raw = pd.read_csv(path, header=None, skiprows=1, names=list(range(len(header))), skipinitialspace=True,
+                      thousands='.', decimal=',', keep_default_na=False,
+                      na_values={i: ['-'] for i in range(len(header)) if i not in key_columns},
+                      dtype={i: str for i in key_columns}, on_bad_lines='skip', encoding='utf-8')
+    text = {i: raw[i].fillna('-').astype(str).str.strip() for i in raw.columns if raw[i].dtype.kind not in 'iuf'}
+    # Las filas vacías (',,,') se ignoran, como en parse_election_csv; solo puede haberlas si ninguna columna es numérica.
+    keep = np.ones(len(raw), dtype=bool)
+    if len(text) == len(header) and len(raw):
+        keep = ~(pd.DataFrame(text) == '').all(axis=1).to_numpy()
+    index = pd.RangeIndex(int(keep.sum()))
+
+    keys, data, missing, names = {}, {}, {}, []
+    for i, name in enumerate(header):
+        if name in KEY_COLUMNS:
+            keys[name] = pd.Series(text[i].to_numpy()[keep], index=index, dtype=object)
+            continue
+        empty = pd.Series(False, index=index)
+        if i not in text:
+            parsed = pd.Series(raw[i].to_numpy(dtype=np.float64)[keep], index=index).fillna(0)
+        else:
+            values = pd.Series(text[i].to_numpy()[keep], index=index, dtype=object)
+            empty = values == ''
+            filled = values[~empty]
+            if len(filled) and filled.str.fullmatch(_PERCENT_PATTERN.pattern).all():
+                parsed = pd.to_numeric(filled.str.rstrip('%').str.replace(',', '.', regex=False)).reindex(index)
+                if not name.endswith(PERCENT_SUFFIX):
+                    name += PERCENT_SUFFIX
+            else:
+                parsed = pd.to_numeric(values.mask(values == '-', '0').str.replace('.', '', regex=False),
+                                       errors='coerce').astype(np.float64)
+        names.append(name)
+        data[len(names) - 1], missing[len(names) - 1] = parsed, empty
+    names = _unique_names(names)
+    return _Table(path, keys,
+                  pd.DataFrame({name: data[i] for i, name in enumerate(names)}, index=index),
+                  pd.DataFrame({name: missing[i] for i, name in enumerate(names)}, index=index))
+
+
+def _normalized(names):
+    """Nombres normalizados (ver ingest.normalize_name), calculados una sola vez por nombre distinto."""
+    import numpy as np
+    import pandas as pd
+    from ingest import normalize_name
+
+    codes, uniques = pd.factorize(pd.Series(names, dtype=object).astype(str), use_na_sentinel=False)
+    # Los nombres ASCII (casi todos) no tienen acentos: basta pasarlos a minúsculas y unir los espacios.
+    uniques = pd.Series(uniques, dtype=object)
+    ascii_names = uniques.str.isascii().to_numpy(dtype=bool)
+    keys = np.empty(len(uniques), dtype=object)
+    keys[ascii_names] = [' '.join(name.lower().split()) for name in uniques[ascii_names]]
+    keys[~ascii_names] = [normalize_name(name) for name in uniques[~ascii_names]]
+    return keys[codes]
+
+
+def _match(reference, names):
+    """Posición en `reference` de cada nombre de `names` (-1 si no está; con repetidos, la primera)."""
+    import numpy as np
+    import pandas as pd
+
+    positions = pd.Series(np.arange(len(reference)), index=pd.Index(reference, dtype=object))
+    positions = positions[~positions.index.duplicated()]
+    return positions.reindex(pd.Index(names, dtype=object)).fillna(-1).to_numpy(dtype=np.int64)
+
+
+def _group(names):
+    """
+    Agrupa nombres por su forma normalizada.
+
+    Returns:
+        tuple: (etiqueta de cada grupo —el primer nombre—, grupo de cada nombre, clave de cada grupo).
+    """
+    import numpy as np
+    import pandas as pd
+
+    codes, keys = pd.factorize(pd.Series(_normalized(names), dtype=object))
+    first = np.unique(codes, return_index=True)[1]
+    return [names[i] for i in first], codes, list(keys)
+
+
+def _row_labels(table):
+    """Etiqueta de cada fila: el valor de su primera columna clave (o el número de fila)."""
+    for name in KEY_COLUMNS:
+        if name in table.keys:
+            return table.keys[name].tolist()
+    return [str(i + 1) for i in range(len(table.data))]
+
+
+def _check_cells(table):
+    """Celdas de datos vacías, nombres vacíos y valores negativos o fuera de 0-100 %."""
+    import numpy as np
+
+    labels = _row_labels(table)
+    columns = list(table.data.columns)
+    values = table.data.to_numpy()
+    percent = np.array([name.endswith(PERCENT_SUFFIX) for name in columns], dtype=bool)
+    found = []
+    for row, col in zip(*np.nonzero(table.missing.to_numpy())):
+        found.append(Discrepancy('faltante', SEVERITY_ERROR, table.path, labels[row], columns[col], None, None,
+                                 f"fila '{labels[row]}', columna '{columns[col]}': celda vacía"))
+    for name, values_ in table.keys.items():
+        for row in np.flatnonzero((values_ == '').to_numpy()):
+            found.append(Discrepancy('faltante', SEVERITY_ERROR, table.path, str(row + 1), name, None, None,
+                                     f"fila {row + 1}: columna '{name}' sin nombre"))
+    with np.errstate(invalid='ignore'):
+        negative = values < 0
+        out_of_range = percent[None, :] & (values > 100)
+    for row, col in zip(*np.nonzero(negative | out_of_range)):
+        found.append(Discrepancy('negativo' if negative[row, col] else 'porcentaje', SEVERITY_ERROR, table.path,
+                                 labels[row], columns[col], None, float(values[row, col]),
+                                 f"fila '{labels[row]}', columna '{columns[col]}': valor fuera de rango "
+                                 f"({values[row, col]:g})"))
+    return found
+
+
+def _check_duplicates(table, source_kind):
+    """Unidades (o candidatos) repetidos sin distinguir mayúsculas ni acentos: el cubo los sumaría."""
+    import numpy as np
+    import pandas as pd
+
+    groups = []
+    if source_kind == 'departamentos':
+        groups.append(('Candidato', table.keys.get('Candidato')))
+        groups.append(('departamento', pd.Series(list(table.data.columns), dtype=object)))
+    else:
+        name = 'Localidad' if source_kind == 'localidades' else 'Departamento'
+        groups.append((name, table.keys.get(name)))
+    found = []
+    for name, values in groups:
+        if values is None or not len(values):
+            continue
+        keys = _normalized(values.tolist())
+        for position in np.flatnonzero(pd.Series(keys).duplicated().to_numpy()):
+            first = values.iloc[int(np.flatnonzero(keys == keys[position])[0])]
+            found.append(Discrepancy('duplicado', SEVERITY_WARNING, table.path, values.iloc[position], name,
+                                     first, values.iloc[position],
+                                     f"'{values.iloc[position]}' repite a '{first}' ({name}); sus votos se suman"))
+    return found
+
+
+def _check_names(reference_names, names, source, other, severity, spelling=True):
+    """
+    Cruza dos listas de nombres por su forma normalizada: informa los nombres de `names` que
+    no tienen par (con `severity`) y, con `spelling`, los que solo coinciden ignorando acentos
+    y mayúsculas (aviso). Los departamentos no se controlan así: el CSV de departamentos los
+    escribe en minúsculas y el informe ya los muestra capitalizados.
+    """
+    import numpy as np
+
+    positions = _match(_normalized(reference_names), _normalized(names))
+    found = []
+    for name, position in zip(names, positions.tolist()):
+        if not name:
+            continue  # Los nombres vacíos ya se informan como celdas faltantes.
+        if position < 0:
+            found.append(Discrepancy('sin_par', severity, source, name, None, None, name,
+                                     f"'{name}' no aparece en {other}"))
+        elif spelling and reference_names[position] != name:
+            found.append(Discrepancy('nombre', SEVERITY_WARNING, source, name, None, reference_names[position], name,
+                                     f"'{name}' figura como '{reference_names[position]}' en {other}"))
+    return found
+
+
+def _check_totals(departamentos, localidades):
+    """
+    Compara los votos de Gobernador de cada departamento y candidato del CSV de departamentos
+    con la suma de las localidades de ese departamento, cruzando los nombres normalizados.
+    """
+    import numpy as np
+
+    if 'Departamento' not in localidades.keys or 'Candidato' not in departamentos.keys:
+        return []
+    # Ambos lados se agrupan por nombre normalizado, como en el cubo (los repetidos se suman):
+    # localidades por departamento y, en el CSV de departamentos, columnas y filas repetidas.
+    candidates_l = [name for name in localidades.data.columns if not name.endswith(PERCENT_SUFFIX)]
+    departments_l, codes_l, groups_l = _group(localidades.keys['Departamento'].tolist())
+    sums = np.zeros((len(groups_l), len(candidates_l)))
+    np.add.at(sums, codes_l, np.nan_to_num(localidades.data[candidates_l].to_numpy()))
+
+    columns_d = [name for name in departamentos.data.columns if not name.endswith(PERCENT_SUFFIX)]
+    departments_d, codes_d, groups_d = _group(columns_d)
+    candidates_d, rows_d, keys_d = _group(departamentos.keys['Candidato'].tolist())
+    matrix = np.zeros((len(groups_d), len(keys_d)))  # departamentos × candidatos
+    np.add.at(matrix, (codes_d[None, :], rows_d[:, None]), np.nan_to_num(departamentos.data[columns_d].to_numpy()))
+
+    found = []
+    found += _check_names(departments_l, departments_d, departamentos.path, localidades.path, SEVERITY_ERROR,
+                          spelling=False)
+    found += _check_names(departments_d, departments_l, localidades.path, departamentos.path, SEVERITY_ERROR,
+                          spelling=False)
+    found += _check_names(candidates_l, candidates_d, departamentos.path, localidades.path, SEVERITY_ERROR)
+    found += [d for d in _check_names(candidates_d, candidates_l, localidades.path, departamentos.path, SEVERITY_ERROR)
+              if d.check == 'sin_par']
+
+    rows = _match(groups_l, groups_d)
+    cols = _match(_normalized(candidates_l), keys_d)
+    rows_d, cols_d = np.flatnonzero(rows >= 0), np.flatnonzero(cols >= 0)
+    expected = matrix[np.ix_(rows_d, cols_d)]
+    summed = sums[np.ix_(rows[rows_d], cols[cols_d])]
+    for i, j in zip(*np.nonzero(expected != summed)):
+        department, candidate = departments_d[rows_d[i]], candidates_d[cols_d[j]]
+        found.append(Discrepancy('totales', SEVERITY_ERROR, departamentos.path, department, candidate,
+                                 int(expected[i, j]), int(summed[i, j]),
+                                 f"{department} / {candidate}: {int(expected[i, j])} votos en el CSV de departamentos, "
+                                 f"{int(summed[i, j])} sumando sus localidades ({int(summed[i, j] - expected[i, j]):+d})"))
+    return found
+
+
+def _check_percentages(table):
+    """
+    Recalcula cada porcentaje que tiene una columna de conteos de base (p. ej. 'Votos Blancos (%)'
+    sobre 'Votos en Blanco') como base / votos emitidos y verifica que los conteos no superen
+    el total emitido.
+    """
+    import numpy as np
+
+    columns = list(table.data.columns)
+    if EMITTED_COLUMN not in columns:
+        return []
+    labels = _row_labels(table)
+    emitted = table.data[EMITTED_COLUMN].to_numpy()
+    pairs = [(name, PERCENT_BASES.get(name, name[:-len(PERCENT_SUFFIX)])) for name in columns
+             if name.endswith(PERCENT_SUFFIX)]
+    pairs = [(name, base) for name, base in pairs if base in columns]
+    found = []
+    if pairs:
+        percents = table.data[[name for name, _ in pairs]].to_numpy()
+        bases = table.data[[base for _, base in pairs]].to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            recomputed = np.where(emitted[:, None] > 0, bases / emitted[:, None] * 100, np.nan)
+        wrong = np.abs(recomputed - percents) > PERCENT_TOLERANCE + 1e-9
+        for row, k in zip(*np.nonzero(wrong)):
+            found.append(Discrepancy('porcentaje', SEVERITY_ERROR, table.path, labels[row], pairs[k][0],
+                                     round(float(recomputed[row, k]), 2), float(percents[row, k]),
+                                     f"{labels[row]}: '{pairs[k][0]}' es {percents[row, k]:g}% pero "
+                                     f"{pairs[k][1]} / {EMITTED_COLUMN} da {recomputed[row, k]:.2f}%"))
+    counts = [name for name in columns if not name.endswith(PERCENT_SUFFIX) and name != EMITTED_COLUMN]
+    components = np.nansum(table.data[counts].to_numpy(), axis=1)
+    for row in np.flatnonzero(components > emitted):
+        found.append(Discrepancy('emitidos', SEVERITY_ERROR, table.path, labels[row], EMITTED_COLUMN,
+                                 float(emitted[row]), float(components[row]),
+                                 f"{labels[row]}: los votos suman {components[row]:g}, más que los "
+                                 f"{emitted[row]:g} emitidos"))
+    return found
+
+
+def validate_consistency(departamentos_path=None, localidades_path=None, presidente_path=None, references=None):
+    """
+    Controla que los CSV del informe sean consistentes entre sí, con operaciones en bloque de
+    NumPy y pandas (el costo casi no depende de la cantidad de localidades o mesas):
+
+    - celdas vacías, nombres vacíos, valores negativos y porcentajes fuera de 0-100;
+    - unidades o candidatos repetidos en un mismo archivo;
+    - votos de cada departamento y candidato contra la suma de sus localidades;
+    - nombres de departamentos y candidatos cruzados sin distinguir mayúsculas ni acentos entre
+      archivos (y con `references`), avisando si solo coinciden así ('Ramon' y 'Ramón');
+    - porcentajes de presidente recalculados desde los conteos y el total de votos emitidos.
+
+    Args:
+        departamentos_path (str): CSV de Gobernador por departamento (candidato × departamento).
+        localidades_path (str): CSV de Gobernador por localidad.
+        presidente_path (str): CSV de Presidente por departamento.
+        references (list): Otros nombres de candidatos usados por el informe, como tuplas
+            (cargo, origen, nombres); p. ej. ('Gobernador', 'CANDIDATE_IMAGES_GOBERNADOR', [...]).
+
+    Returns:
+        list: Las Discrepancy encontradas (vacía si los datos son consistentes).
+    """
+    from ingest import CARGO_GOBERNADOR, CARGO_PRESIDENTE
+
+    found = []
+    tables = {}
+    for kind, path in (('departamentos', departamentos_path), ('localidades', localidades_path),
+                       ('presidente', presidente_path)):
+        if path is None:
+            continue
+        try:
+            tables[kind] = _read_table(path)
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            found.append(Discrepancy('archivo', SEVERITY_ERROR, path, None, None, None, None,
+                                     f"no se pudo leer {path}: {e}"))
+            continue
+        found += _check_cells(tables[kind])
+        found += _check_duplicates(tables[kind], kind)
+
+    if 'departamentos' in tables and 'localidades' in tables:
+        found += _check_totals(tables['departamentos'], tables['localidades'])
+    if 'presidente' in tables:
+        found += _check_percentages(tables['presidente'])
+        if 'Departamento' in tables['presidente'].keys:
+            departments = ([name for name in tables['departamentos'].data.columns] if 'departamentos' in tables
+                           else tables['localidades'].keys.get('Departamento', []).unique().tolist()
+                           if 'localidades' in tables else None)
+            if departments:
+                found += _check_names(departments, tables['presidente'].keys['Departamento'].unique().tolist(),
+                                      presidente_path, 'los datos de Gobernador', SEVERITY_WARNING,
+                                      spelling=False)
+
+    # Candidatos de cada cargo, tal como los nombran los datos, para cruzar con `references`.
+    candidates = {}
+    if 'departamentos' in tables and 'Candidato' in tables['departamentos'].keys:
+        candidates[CARGO_GOBERNADOR] = tables['departamentos'].keys['Candidato'].tolist()
+    elif 'localidades' in tables:
+        candidates[CARGO_GOBERNADOR] = [name for name in tables['localidades'].data.columns
+                                        if not name.endswith(PERCENT_SUFFIX)]
+    if 'presidente' in tables:
+        candidates[CARGO_PRESIDENTE] = [name for name in tables['presidente'].data.columns
+                                        if not name.endswith(PERCENT_SUFFIX) and not name.startswith('Votos ')]
+    for cargo, origin, names in references or []:
+        if candidates.get(cargo):
+            found += _check_names(candidates[cargo], list(names), origin, f'los datos de {cargo}', SEVERITY_WARNING)
+    return found
+
+
+def consistency_report(discrepancies):
+    """
+    Arma el reporte estructurado (serializable como JSON) de una lista de discrepancias.
+
+    Returns:
+        dict: {'errores', 'avisos', 'controles': discrepancias por control, 'discrepancias': una por dict}.
+    """
+    checks = {}
+    for discrepancy in discrepancies:
+        checks[discrepancy.check] = checks.get(discrepancy.check, 0) + 1
+    return {
+        'errores': sum(1 for d in discrepancies if d.severity == SEVERITY_ERROR),
+        'avisos': sum(1 for d in discrepancies if d.severity == SEVERITY_WARNING),
+        'controles': checks,
+        'discrepancias': [d._asdict() for d in discrepancies],
+    }
+
+
+def summarize_discrepancies(discrepancies, limit=MAX_DISCREPANCIES_PER_CHECK):
+    """
+    Describe las discrepancias en texto, primero los errores, con hasta `limit` por control.
+
+    Returns:
+        list: Una línea por discrepancia (y una línea '... y N más' por control recortado).
+    """
+    lines = []
+    for severity in (SEVERITY_ERROR, SEVERITY_WARNING):
+        by_check = {}
+        for discrepancy in discrepancies:
+            if discrepancy.severity == severity:
+                by_check.setdefault(discrepancy.check, []).append(discrepancy)
+        for check, items in by_check.items():
+            lines += [f"[{severity}: {check}] {item.detail}" for item in items[:limit]]
+            if len(items) > limit:
+                lines.append(f"[{severity}: {check}] ... y {len(items) - limit} más")
+    return lines